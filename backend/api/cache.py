@@ -0,0 +1,124 @@
+from contextlib import contextmanager
+from hashlib import md5
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseNotModified
+from rest_framework.response import Response
+
+VERSION_KEY = 'api:version:{}'
+RESPONSE_KEY = 'api:response:{}'
+
+
+def get_versions(*scopes):
+    keys = [VERSION_KEY.format(scope) for scope in scopes]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, 1, None)
+            versions[key] = cache.get(key, 1)
+    return [versions[key] for key in keys]
+
+
+def bump_versions(*scopes):
+    versions = []
+    for scope in scopes:
+        key = VERSION_KEY.format(scope)
+        try:
+            versions.append(cache.incr(key))
+        except ValueError:
+            cache.set(key, 2, None)
+            versions.append(2)
+    return versions
+
+
+@contextmanager
+def anonymous_request(request):
+    user = request.user
+    request.user = AnonymousUser()
+    try:
+        yield
+    finally:
+        request.user = user
+
+
+class CachedResponseMixin:
+    cache_scopes = ()
+    cache_bypass_params = ()
+    cache_personalized = False
+    cache_timeout = settings.API_CACHE_TIMEOUT
+
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+    def is_personal_request(self, request):
+        return request.user.is_authenticated and any(
+            param in request.query_params
+            for param in self.cache_bypass_params
+        )
+
+    def get_response_cache_key(self, request):
+        params = sorted(
+            (key, sorted(values))
+            for key, values in request.query_params.lists()
+        )
+        raw_key = '|'.join((
+            request.get_host(),
+            request.path,
+            request.accepted_renderer.format,
+            repr(params),
+            repr(get_versions(*self.cache_scopes)),
+        ))
+        return md5(raw_key.encode()).hexdigest()
+
+    def personalize_cached_data(self, data):
+        return data
+
+    def get_personal_etag(self, request, key):
+        return None
+
+    def get_cached_response(self, handler, request, *args, **kwargs):
+        key = self.get_response_cache_key(request)
+        is_shared = not (
+            self.cache_personalized and request.user.is_authenticated
+        )
+        etag = f'"{key}"' if is_shared else self.get_personal_etag(
+            request, key
+        )
+        if etag and etag in request.headers.get('If-None-Match', ''):
+            response = HttpResponseNotModified()
+            response['ETag'] = etag
+            return response
+        if self.is_personal_request(request):
+            response = handler(request, *args, **kwargs)
+            if etag and response.status_code == 200:
+                response['ETag'] = etag
+            return response
+        data = cache.get(RESPONSE_KEY.format(key))
+        if data is None:
+            with anonymous_request(request):
+                response = handler(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            data = (
+                response.data if isinstance(response, Response)
+                else response.content
+            )
+            cache.set(RESPONSE_KEY.format(key), data, self.cache_timeout)
+        if isinstance(data, bytes):
+            response = HttpResponse(
+                data, content_type=request.accepted_renderer.media_type
+            )
+        else:
+            response = Response(self.personalize_cached_data(data))
+        if etag:
+            response['ETag'] = etag
+        return response
@@ -0,0 +1,131 @@
+from uuid import uuid4
+
+from django.contrib.auth.models import AnonymousUser
+from django.db import transaction
+
+from recipes.models import RecipeDocument
+from .plain import serialize_recipes
+from .renderers import dumps
+from .viewer import get_viewer_state
+
+ORIGIN = b'\x00'
+IS_SUBSCRIBED = b'\x01'
+IS_FAVORITED = b'\x02'
+IS_IN_SHOPPING_CART = b'\x03'
+FAVORITES_COUNT = b'\x04'
+CARTS_COUNT = b'\x05'
+FOLLOWERS_COUNT = b'\x06'
+FOLLOWING_COUNT = b'\x07'
+LIST_FIELDS = (
+    'id',
+    'author',
+    'author__followers_count',
+    'author__following_count',
+    'pub_date',
+    'favorites_count',
+    'carts_count',
+    'score',
+    'cooking_time',
+)
+BATCH_SIZE = 500
+
+
+class DocumentRequest:
+    user = AnonymousUser()
+
+    def __init__(self, origin):
+        self.origin = origin
+
+    def build_absolute_uri(self, location):
+        return self.origin + location
+
+
+def build_documents(recipe_ids):
+    token = uuid4().hex
+    request = DocumentRequest(f'{token}:origin')
+    documents = []
+    for data in serialize_recipes(list(recipe_ids), request):
+        data['author']['is_subscribed'] = f'{token}:is_subscribed'
+        data['author']['followers_count'] = f'{token}:followers_count'
+        data['author']['following_count'] = f'{token}:following_count'
+        data['is_favorited'] = f'{token}:is_favorited'
+        data['is_in_shopping_cart'] = f'{token}:is_in_shopping_cart'
+        data['favorites_count'] = f'{token}:favorites_count'
+        data['carts_count'] = f'{token}:carts_count'
+        body = dumps(data).replace(f'{token}:origin'.encode(), ORIGIN)
+        for name, marker in (
+            ('is_subscribed', IS_SUBSCRIBED),
+            ('followers_count', FOLLOWERS_COUNT),
+            ('following_count', FOLLOWING_COUNT),
+            ('is_favorited', IS_FAVORITED),
+            ('is_in_shopping_cart', IS_IN_SHOPPING_CART),
+            ('favorites_count', FAVORITES_COUNT),
+            ('carts_count', CARTS_COUNT),
+        ):
+            body = body.replace(f'"{token}:{name}"'.encode(), marker)
+        documents.append(RecipeDocument(recipe_id=data['id'], body=body))
+    RecipeDocument.objects.bulk_create(
+        documents,
+        update_conflicts=True,
+        unique_fields=('recipe',),
+        update_fields=('body', 'built_at')
+    )
+    return {document.recipe_id: document.body for document in documents}
+
+
+def build_missing_documents(recipe_ids):
+    recipe_ids = set(recipe_ids) - set(RecipeDocument.objects.filter(
+        recipe_id__in=recipe_ids
+    ).values_list('recipe_id', flat=True))
+    return build_documents(recipe_ids) if recipe_ids else {}
+
+
+def invalidate_documents(recipes):
+    RecipeDocument.objects.filter(recipe__in=recipes).delete()
+
+
+def refresh_documents(recipe_ids):
+    invalidate_documents(recipe_ids)
+    transaction.on_commit(lambda: build_missing_documents(recipe_ids))
+
+
+def get_documents(recipe_ids):
+    documents = {
+        recipe_id: bytes(body)
+        for recipe_id, body in RecipeDocument.objects.filter(
+            recipe_id__in=recipe_ids
+        ).values_list('recipe_id', 'body')
+    }
+    missing = [
+        recipe_id for recipe_id in recipe_ids if recipe_id not in documents
+    ]
+    if missing:
+        documents.update(build_documents(missing))
+    return documents
+
+
+def render_recipe_list(request, recipes, envelope):
+    documents = get_documents([recipe.id for recipe in recipes])
+    state = get_viewer_state(request)
+    state.load_recipes(recipes)
+    origin = request.build_absolute_uri('/')[:-1].encode()
+    results = []
+    for recipe in recipes:
+        body = documents[recipe.id]
+        for marker, value in (
+            (ORIGIN, origin),
+            (IS_SUBSCRIBED, recipe.author_id in state.subscribed),
+            (FOLLOWERS_COUNT, recipe.author.followers_count),
+            (FOLLOWING_COUNT, recipe.author.following_count),
+            (IS_FAVORITED, recipe.id in state.favorited),
+            (IS_IN_SHOPPING_CART, recipe.id in state.in_shopping_cart),
+            (FAVORITES_COUNT, recipe.favorites_count),
+            (CARTS_COUNT, recipe.carts_count),
+        ):
+            if not isinstance(value, bytes):
+                value = dumps(value)
+            body = body.replace(marker, value)
+        results.append(body)
+    return (
+        dumps(envelope)[:-1] + b',"results":[' + b','.join(results) + b']}'
+    )
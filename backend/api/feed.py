@@ -0,0 +1,134 @@
+from heapq import merge
+from itertools import islice
+from operator import itemgetter
+
+from django.conf import settings
+from django.core.cache import cache
+
+from recipes.models import Recipe
+from users.models import Subscriptions
+
+FEED_KEY = 'api:feed:{}'
+FEED_ORDERING = ('-pub_date', '-id')
+FEED_FIELDS = ('pub_date', 'id', 'author_id')
+ENTRY_ORDER = itemgetter(0, 1)
+
+
+def get_feed_key(user_id):
+    return FEED_KEY.format(user_id)
+
+
+def is_fanout_author(followers_count):
+    return followers_count < settings.FEED_FANOUT_LIMIT
+
+
+def get_timeline(author_ids):
+    return Recipe.objects.filter(author_id__in=author_ids).order_by(
+        *FEED_ORDERING
+    ).values_list(*FEED_FIELDS)
+
+
+def build_feed(user_id, followed):
+    push = {
+        author_id for author_id, followers_count, _ in followed
+        if is_fanout_author(followers_count)
+    }
+    entries = list(get_timeline(push)[:settings.FEED_LENGTH]) if push else []
+    feed = {
+        'push': push,
+        'entries': entries,
+        'complete': len(entries) < settings.FEED_LENGTH,
+    }
+    cache.set(get_feed_key(user_id), feed, settings.FEED_CACHE_TIMEOUT)
+    return feed
+
+
+def get_follower_feeds(author_id):
+    keys = [
+        get_feed_key(user_id)
+        for user_id in Subscriptions.objects.filter(
+            following_id=author_id
+        ).values_list('user_id', flat=True)
+    ]
+    return {
+        key: feed for key, feed in cache.get_many(keys).items()
+        if author_id in feed['push']
+    }
+
+
+def push_recipe(recipe):
+    if not is_fanout_author(recipe.author.followers_count):
+        return
+    entry = (recipe.pub_date, recipe.id, recipe.author_id)
+    feeds = get_follower_feeds(recipe.author_id)
+    for feed in feeds.values():
+        feed['entries'].append(entry)
+        feed['entries'].sort(key=ENTRY_ORDER, reverse=True)
+        if len(feed['entries']) > settings.FEED_LENGTH:
+            del feed['entries'][settings.FEED_LENGTH:]
+            feed['complete'] = False
+    cache.set_many(feeds, settings.FEED_CACHE_TIMEOUT)
+
+
+def remove_recipe(recipe):
+    feeds = get_follower_feeds(recipe.author_id)
+    for feed in feeds.values():
+        feed['entries'] = [
+            entry for entry in feed['entries'] if entry[1] != recipe.id
+        ]
+    cache.set_many(feeds, settings.FEED_CACHE_TIMEOUT)
+
+
+def invalidate_feed(user_id):
+    cache.delete(get_feed_key(user_id))
+
+
+class Feed:
+    def __init__(self, user, queryset):
+        self.user_id = user.id
+        self.queryset = queryset
+        self.followed = list(Subscriptions.objects.filter(
+            user=user
+        ).values_list(
+            'following_id',
+            'following__followers_count',
+            'following__recipes_count'
+        ))
+
+    def count(self):
+        return sum(recipes_count for _, _, recipes_count in self.followed)
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        ids = self.get_ids(index.start or 0, index.stop)
+        recipes = self.queryset.in_bulk(ids)
+        return [recipes[pk] for pk in ids if pk in recipes]
+
+    def get_ids(self, start, stop):
+        if not self.followed:
+            return []
+        feed = cache.get(get_feed_key(self.user_id)) or build_feed(
+            self.user_id, self.followed
+        )
+        pull = {
+            author_id for author_id, followers_count, _ in self.followed
+            if author_id not in feed['push']
+            or not is_fanout_author(followers_count)
+        }
+        pushed = [entry for entry in feed['entries'] if entry[2] not in pull]
+        if not feed['complete'] and stop > len(pushed):
+            return [
+                pk for _, pk, _ in get_timeline(
+                    [author_id for author_id, _, _ in self.followed]
+                )[start:stop]
+            ]
+        pulled = get_timeline(pull)[:stop] if pull else ()
+        return [
+            pk for _, pk, _ in islice(
+                merge(pushed, pulled, key=ENTRY_ORDER, reverse=True),
+                start,
+                stop
+            )
+        ]
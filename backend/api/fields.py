@@ -1,12 +1,71 @@
 from base64 import b64decode
-from django.core.files.base import ContentFile
-from rest_framework.serializers import ImageField
+from binascii import Error as BinasciiError
+from hashlib import sha256
+
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from rest_framework.serializers import Field, ImageField
+
+DECODE_CHUNK_SIZE = 64 * 1024
+
+
+def build_url(url, request):
+    return request.build_absolute_uri(url) if request else url
+
+
+def get_srcsets(value, request):
+    return {
+        format: ', '.join(
+            f'{build_url(default_storage.url(name), request)} {width}w'
+            for width, name in sorted(
+                widths.items(), key=lambda item: int(item[0])
+            )
+        )
+        for format, widths in value.get('variants', {}).items()
+    }
 
 
 class Base64ImageField(ImageField):
+    default_error_messages = {
+        'invalid_base64': 'Изображение должно быть закодировано в base64.',
+        'too_large': 'Размер изображения не должен превышать {max_size} байт.',
+    }
+    max_size = 10 * 1024 * 1024
+
     def to_internal_value(self, data):
         if isinstance(data, str) and data.startswith('data:image'):
-            format, imgstr = data.split(';base64,')
+            format, _, imgstr = data.partition(';base64,')
             ext = format.split('/')[-1]
-            data = ContentFile(b64decode(imgstr), name='temp.' + ext)
+            if len(imgstr) // 4 * 3 > self.max_size:
+                self.fail('too_large', max_size=self.max_size)
+            data = self.decode(imgstr, ext)
         return super().to_internal_value(data)
+
+    def decode(self, imgstr, ext):
+        file = TemporaryUploadedFile(
+            'temp.' + ext, 'image/' + ext, 0, None
+        )
+        digest = sha256()
+        try:
+            for start in range(0, len(imgstr), DECODE_CHUNK_SIZE):
+                chunk = b64decode(
+                    imgstr[start:start + DECODE_CHUNK_SIZE], validate=True
+                )
+                digest.update(chunk)
+                file.write(chunk)
+        except (BinasciiError, ValueError):
+            file.close()
+            self.fail('invalid_base64')
+        file.size = file.tell()
+        file.seek(0)
+        file.name = f'{digest.hexdigest()}.{ext}'
+        return file
+
+
+class ImageVariantsField(Field):
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        return get_srcsets(value, self.context.get('request'))
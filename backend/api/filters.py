@@ -1,8 +1,26 @@
-from django_filters.rest_framework import (BooleanFilter, FilterSet,
+from django_filters.rest_framework import (BooleanFilter, CharFilter,
+                                           ChoiceFilter, FilterSet,
                                            ModelMultipleChoiceFilter)
 from rest_framework.filters import SearchFilter
 
 from recipes.models import Recipe, Tag
+from recipes.search import SEARCH_ORDERING, search_recipes
+
+DEFAULT_RECIPE_ORDERING = ('-pub_date', '-id')
+RECIPE_ORDERINGS = {
+    'popular': ('-favorites_count', '-carts_count', '-id'),
+    'trending': ('-score', '-id'),
+    'cooking_time': ('cooking_time', '-id'),
+}
+
+
+def get_recipe_ordering(request):
+    ordering = request.query_params.get('ordering')
+    if ordering in RECIPE_ORDERINGS:
+        return RECIPE_ORDERINGS[ordering]
+    if request.query_params.get('search'):
+        return SEARCH_ORDERING
+    return DEFAULT_RECIPE_ORDERING
 
 
 class IngredientFilter(SearchFilter):
@@ -17,10 +35,22 @@ class RecipeFilter(FilterSet):
     )
     is_in_shopping_cart = BooleanFilter(method='get_is_in_shopping_cart')
     is_favorited = BooleanFilter(method='get_is_favorited')
+    search = CharFilter(method='get_search')
+    ordering = ChoiceFilter(
+        choices=[(ordering, ordering) for ordering in RECIPE_ORDERINGS],
+        method='get_ordering'
+    )
 
     class Meta:
         model = Recipe
-        fields = ('tags', 'author', 'is_in_shopping_cart', 'is_favorited')
+        fields = (
+            'tags',
+            'author',
+            'is_in_shopping_cart',
+            'is_favorited',
+            'search',
+            'ordering'
+        )
 
     def get_is_in_shopping_cart(self, queryset, name, value):
         if self.request.user.is_authenticated and value:
@@ -31,3 +61,9 @@ class RecipeFilter(FilterSet):
         if self.request.user.is_authenticated and value:
             return queryset.filter(favorite_recipe__user=self.request.user)
         return queryset
+
+    def get_search(self, queryset, name, value):
+        return search_recipes(queryset, value)
+
+    def get_ordering(self, queryset, name, value):
+        return queryset.order_by(*RECIPE_ORDERINGS[value])
@@ -1,13 +1,31 @@
 from ingredients.models import Ingredient
+from ingredients.search import SEARCH_LIMIT, ingredient_index
+from rest_framework.response import Response
 from rest_framework.viewsets import ReadOnlyModelViewSet
 
+from ..cache import CachedResponseMixin
 from ..filters import IngredientFilter
+from ..plain import PlainListMixin, serialize_ingredients
 from .serializers import IngredientSerializer
 
 
-class IngredientViewSet(ReadOnlyModelViewSet):
+class IngredientViewSet(
+    CachedResponseMixin, PlainListMixin, ReadOnlyModelViewSet
+):
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
+    plain_serializer = staticmethod(serialize_ingredients)
     pagination_class = None
     filter_backends = (IngredientFilter,)
     search_fields = ('^name',)
+    cache_scopes = ('ingredients',)
+
+    def list(self, request, *args, **kwargs):
+        name = request.query_params.get(IngredientFilter.search_param)
+        if not name:
+            return super().list(request, *args, **kwargs)
+        limit = request.query_params.get('limit', '')
+        return Response(ingredient_index.search(
+            name,
+            int(limit) if limit.isdigit() else SEARCH_LIMIT
+        ))
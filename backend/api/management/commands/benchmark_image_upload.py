@@ -0,0 +1,118 @@
+import os
+import statistics
+import time
+import tracemalloc
+from base64 import b64decode, b64encode
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from PIL import Image
+from rest_framework.serializers import ImageField
+
+from recipes.images import get_variant_names, render_variants
+from recipes.storage import recipe_storage
+from api.fields import Base64ImageField
+
+
+class LegacyBase64ImageField(ImageField):
+    def to_internal_value(self, data):
+        if isinstance(data, str) and data.startswith('data:image'):
+            format, imgstr = data.split(';base64,')
+            ext = format.split('/')[-1]
+            data = ContentFile(b64decode(imgstr), name='temp.' + ext)
+        return super().to_internal_value(data)
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнение задержки и пика памяти Python при загрузке изображения '
+        'в base64 и времени построения вариантов вне запроса'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--size',
+            type=float,
+            default=5,
+            help='Примерный размер изображения, МБ'
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=3,
+            help='Сколько раз повторить каждый замер'
+        )
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1 or options['size'] <= 0:
+            raise CommandError('--size и --repeat должны быть больше нуля')
+        self.repeat = options['repeat']
+        content = self.make_image(options['size'])
+        data = 'data:image/png;base64,' + b64encode(content).decode()
+        self.stdout.write(
+            f'Изображение: {len(content) / 1024 / 1024:.1f} МБ, '
+            f'в base64 {len(data) / 1024 / 1024:.1f} МБ'
+        )
+        self.write_result('в памяти', self.measure(
+            lambda: LegacyBase64ImageField().to_internal_value(data)
+        ))
+        upload = Base64ImageField()
+        upload.max_size = len(content)
+        self.write_result('по частям', self.measure(
+            lambda: upload.to_internal_value(data)
+        ))
+        with transaction.atomic():
+            name = recipe_storage.save(
+                'recipes/images/benchmark.png', ContentFile(content)
+            )
+            try:
+                self.write_result('варианты в фоне', self.measure(
+                    lambda: self.render(name)
+                ))
+            finally:
+                self.delete_files(name)
+            transaction.set_rollback(True)
+
+    def make_image(self, size):
+        side = int((size * 1024 * 1024 / 3) ** 0.5)
+        buffer = BytesIO()
+        Image.frombytes(
+            'RGB', (side, side), os.urandom(side * side * 3)
+        ).save(buffer, 'PNG')
+        return buffer.getvalue()
+
+    def render(self, name):
+        self.delete_variants(name)
+        return render_variants(name)
+
+    def delete_variants(self, name):
+        for variant in get_variant_names(name):
+            default_storage.delete(variant)
+
+    def delete_files(self, name):
+        self.delete_variants(name)
+        recipe_storage.delete(name)
+
+    def measure(self, handler):
+        timings = []
+        for _ in range(self.repeat):
+            started = time.perf_counter()
+            handler()
+            timings.append(time.perf_counter() - started)
+        tracemalloc.start()
+        try:
+            handler()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        return statistics.median(timings), peak
+
+    def write_result(self, name, result):
+        duration, peak = result
+        self.stdout.write(self.style.SUCCESS(
+            f'{name}: {duration * 1000:.0f} мс, '
+            f'пик памяти {peak / 1024 / 1024:.1f} МБ'
+        ))
@@ -0,0 +1,66 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ingredients.models import Ingredient
+from ingredients.search import ingredient_index
+from api.ingredients.serializers import IngredientSerializer
+
+PREFIX_LENGTHS = (1, 2, 3)
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнение задержки поиска ингредиентов по префиксу: запрос к БД '
+        'и индекс в памяти'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--prefixes',
+            type=int,
+            default=50,
+            help='Сколько префиксов каждой длины проверить'
+        )
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        if options['prefixes'] < 2:
+            raise CommandError('Нужно хотя бы два префикса каждой длины')
+        names = list(Ingredient.objects.values_list('name', flat=True))
+        if not names:
+            raise CommandError(
+                'Нет ингредиентов, сначала выполните load_ingredients'
+            )
+        rng = random.Random(options['seed'])
+        ingredient_index.search('')
+        for length in PREFIX_LENGTHS:
+            prefixes = [
+                name[:length]
+                for name in rng.choices(names, k=options['prefixes'])
+            ]
+            before = self.measure(prefixes, lambda prefix: (
+                IngredientSerializer(
+                    Ingredient.objects.filter(name__istartswith=prefix),
+                    many=True
+                ).data
+            ))
+            after = self.measure(prefixes, ingredient_index.search)
+            self.stdout.write(self.style.SUCCESS(
+                f'{length} симв.: БД p50 {before[0]:.2f} мс, '
+                f'p95 {before[1]:.2f} мс, {before[2]:.0f} строк; '
+                f'индекс p50 {after[0]:.2f} мс, p95 {after[1]:.2f} мс, '
+                f'{after[2]:.0f} строк'
+            ))
+
+    def measure(self, prefixes, search):
+        timings = []
+        sizes = []
+        for prefix in prefixes:
+            started = time.perf_counter()
+            sizes.append(len(search(prefix)))
+            timings.append((time.perf_counter() - started) * 1000)
+        percentiles = statistics.quantiles(timings, n=100, method='inclusive')
+        return percentiles[49], percentiles[94], statistics.fmean(sizes)
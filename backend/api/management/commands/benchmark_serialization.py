@@ -0,0 +1,153 @@
+import json
+import statistics
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+from rest_framework.renderers import JSONRenderer
+
+from ingredients.models import Ingredient
+from recipes.models import Recipe
+from tags.models import Tag
+from api.ingredients.serializers import IngredientSerializer
+from api.plain import (serialize_ingredients, serialize_recipes,
+                       serialize_short_recipes, serialize_tags)
+from api.recipes.serializers import RecipeSerializer
+from api.renderers import FastJSONRenderer, orjson
+from api.tags.serializers import TagSerializer
+from api.users.serializers import RecipeShortSerializer
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Сравнение скорости сериализации DRF и упрощённого пути'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=500,
+            help='Сколько объектов сериализовать за один проход'
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=5,
+            help='Сколько раз повторить каждый замер'
+        )
+        parser.add_argument(
+            '--username',
+            help='Пользователь, от имени которого строятся ответы'
+        )
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1 or options['limit'] < 1:
+            raise CommandError('--limit и --repeat должны быть больше нуля')
+        self.repeat = options['repeat']
+        self.request = request = self.get_request(options['username'])
+        context = {'request': request}
+        recipe_ids = list(
+            Recipe.objects.order_by('id').values_list(
+                'id', flat=True
+            )[:options['limit']]
+        )
+        if not recipe_ids:
+            raise CommandError(
+                'Нет рецептов, сначала выполните seed_foodgram'
+            )
+        tags = Tag.objects.all()
+        ingredients = Ingredient.objects.all()[:options['limit']]
+        recipes = Recipe.objects.filter(pk__in=recipe_ids).order_by('id')
+        data = serialize_recipes(recipe_ids, request)
+        cases = (
+            (
+                'tags',
+                tags.count(),
+                lambda: TagSerializer(tags.all(), many=True).data,
+                lambda: serialize_tags(tags.all()),
+            ),
+            (
+                'ingredients',
+                ingredients.count(),
+                lambda: IngredientSerializer(
+                    ingredients.all(), many=True
+                ).data,
+                lambda: serialize_ingredients(ingredients.all()),
+            ),
+            (
+                'short_recipes',
+                len(recipe_ids),
+                lambda: RecipeShortSerializer(
+                    recipes.all(), many=True, context=context
+                ).data,
+                lambda: serialize_short_recipes(recipes.all(), request),
+            ),
+            (
+                'recipes',
+                len(recipe_ids),
+                lambda: RecipeSerializer(
+                    recipes.with_related().select_related('author'),
+                    many=True,
+                    context=context
+                ).data,
+                lambda: serialize_recipes(recipe_ids, request),
+            ),
+            (
+                'render',
+                len(data),
+                lambda: JSONRenderer().render(data),
+                lambda: FastJSONRenderer().render(data),
+            ),
+        )
+        if orjson is None:
+            self.stdout.write(self.style.WARNING(
+                'orjson не установлен, render сравнивает json с самим собой'
+            ))
+        for name, count, before, after in cases:
+            self.write_result(name, count, before, after)
+
+    def get_request(self, username):
+        hosts = [
+            host.lstrip('.') for host in settings.ALLOWED_HOSTS
+            if '*' not in host
+        ]
+        request = RequestFactory(
+            SERVER_NAME=hosts[0] if hosts else 'localhost'
+        ).get('/')
+        request.user = AnonymousUser()
+        if username:
+            request.user = User.objects.filter(username=username).first()
+            if request.user is None:
+                raise CommandError(f'Пользователь {username} не найден')
+        return request
+
+    def measure(self, handler):
+        timings = []
+        for _ in range(self.repeat):
+            vars(self.request).pop('viewer_state', None)
+            started = time.perf_counter()
+            result = handler()
+            timings.append(time.perf_counter() - started)
+        return statistics.median(timings), result
+
+    def write_result(self, name, count, before, after):
+        before_time, before_result = self.measure(before)
+        after_time, after_result = self.measure(after)
+        line = (
+            f'{name}: {count} объектов, DRF {count / before_time:.0f} об/с, '
+            f'упрощённо {count / after_time:.0f} об/с, '
+            f'ускорение ×{before_time / after_time:.1f}'
+        )
+        if self.normalize(before_result) != self.normalize(after_result):
+            self.stdout.write(self.style.ERROR(line + ', ответы различаются'))
+            return
+        self.stdout.write(self.style.SUCCESS(line))
+
+    def normalize(self, result):
+        if isinstance(result, bytes):
+            return json.loads(result)
+        return json.loads(json.dumps(result, ensure_ascii=False))
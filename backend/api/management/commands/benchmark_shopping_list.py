@@ -0,0 +1,188 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Sum
+from django.http import HttpResponse
+from django.urls import resolve
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from recipes.models import IngredientRecipe, Recipe
+from shoppingcarts.models import ShoppingCart, ShoppingCartItem
+
+User = get_user_model()
+
+SHOPPING_LIST_URL = '/api/recipes/download_shopping_cart/'
+BASELINE = 'baseline'
+VARIANTS = {'legacy': 'целиком', 'streaming': 'потоком'}
+
+
+def build_legacy_response(user):
+    ingredients = IngredientRecipe.objects.filter(
+        recipe__shopping_cart__user=user
+    ).values(
+        'ingredient__name', 'ingredient__measurement_unit'
+    ).annotate(amount=Sum('amount'))
+    shop_string = 'Ингредиенты к покупке:\n\n'
+    shop_string += '\n'.join([
+        f'- {ingredient["ingredient__name"]}, '
+        f'{ingredient["ingredient__measurement_unit"]}: '
+        f'{ingredient["amount"]}'
+        for ingredient in ingredients
+    ])
+    return HttpResponse(shop_string, content_type='text/plain, charset=utf8')
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнение выгрузки списка покупок целиком и потоком: время до '
+        'первого байта, общее время и пик RSS процесса'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--recipes',
+            type=int,
+            default=500,
+            help='Сколько рецептов положить в корзину'
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=5,
+            help='Сколько раз повторить каждый замер'
+        )
+        parser.add_argument(
+            '--username',
+            help='Пользователь, для которого собирается корзина'
+        )
+        parser.add_argument(
+            '--variant',
+            choices=(BASELINE, *VARIANTS),
+            help=argparse.SUPPRESS
+        )
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1 or options['recipes'] < 1:
+            raise CommandError('--recipes и --repeat должны быть больше нуля')
+        user = self.get_user(options['username'])
+        recipe_ids = self.get_recipe_ids(options['recipes'])
+        if options['variant']:
+            self.run_variant(options['variant'], user, recipe_ids, options)
+            return
+        baseline = self.spawn(BASELINE, options)['rss']
+        self.stdout.write(
+            f'Рецептов в корзине: {len(recipe_ids)}, '
+            f'пик RSS без выгрузки {baseline / 1024 / 1024:.1f} МБ'
+        )
+        for variant, name in VARIANTS.items():
+            result = self.spawn(variant, options)
+            self.stdout.write(self.style.SUCCESS(
+                f'{name}: первый байт {result["first_byte"] * 1000:.1f} мс, '
+                f'всего {result["total"] * 1000:.1f} мс, '
+                f'пик RSS {result["rss"] / 1024 / 1024:.1f} МБ '
+                f'(+{(result["rss"] - baseline) / 1024:.0f} КБ), '
+                f'ответ {result["size"]} байт'
+            ))
+
+    def get_user(self, username):
+        if username:
+            user = User.objects.filter(username=username).first()
+            if user is None:
+                raise CommandError(f'Пользователь {username} не найден')
+            return user
+        user = User.objects.order_by('id').first()
+        if user is None:
+            raise CommandError(
+                'Нет пользователей, сначала выполните seed_foodgram'
+            )
+        return user
+
+    def get_recipe_ids(self, count):
+        recipe_ids = list(
+            Recipe.objects.order_by('id').values_list('id', flat=True)[:count]
+        )
+        if not recipe_ids:
+            raise CommandError(
+                'Нет рецептов, сначала выполните seed_foodgram'
+            )
+        return recipe_ids
+
+    def spawn(self, variant, options):
+        command = [
+            sys.executable,
+            str(settings.BASE_DIR / 'manage.py'),
+            'benchmark_shopping_list',
+            '--variant', variant,
+            '--recipes', str(options['recipes']),
+            '--repeat', str(options['repeat']),
+        ]
+        if options['username']:
+            command += ['--username', options['username']]
+        process = subprocess.Popen(command, stdout=subprocess.PIPE)
+        with process.stdout:
+            output = process.stdout.read()
+        _, status, usage = os.wait4(process.pid, 0)
+        process.returncode = os.waitstatus_to_exitcode(status)
+        if process.returncode:
+            raise CommandError(
+                f'Замер {variant} завершился с кодом {process.returncode}'
+            )
+        result = json.loads(output.decode().splitlines()[-1])
+        result['rss'] = usage.ru_maxrss * (
+            1 if sys.platform == 'darwin' else 1024
+        )
+        return result
+
+    def run_variant(self, variant, user, recipe_ids, options):
+        view = resolve(SHOPPING_LIST_URL).func
+        handler = {
+            'legacy': lambda: build_legacy_response(user),
+            'streaming': lambda: self.get_streaming_response(view, user),
+        }.get(variant)
+        with transaction.atomic():
+            self.fill_cart(user, recipe_ids)
+            timings = [
+                self.consume(handler) for _ in range(options['repeat'])
+            ] if handler else [(0, 0, 0)]
+            transaction.set_rollback(True)
+        self.stdout.write(json.dumps({
+            'first_byte': statistics.median(
+                first_byte for first_byte, _, _ in timings
+            ),
+            'total': statistics.median(total for _, total, _ in timings),
+            'size': timings[-1][2],
+        }))
+
+    def fill_cart(self, user, recipe_ids):
+        ShoppingCart.objects.filter(user=user).delete()
+        ShoppingCart.objects.bulk_create(
+            ShoppingCart(user=user, recipe_id=recipe_id)
+            for recipe_id in recipe_ids
+        )
+        ShoppingCartItem.objects.filter(user=user).delete()
+        ShoppingCartItem.objects.add_recipes(user.id, recipe_ids)
+
+    def get_streaming_response(self, view, user):
+        request = APIRequestFactory().get(
+            SHOPPING_LIST_URL, {'format': 'txt'}
+        )
+        force_authenticate(request, user)
+        return view(request)
+
+    def consume(self, handler):
+        started = time.perf_counter()
+        chunks = iter(handler())
+        size = len(next(chunks, b''))
+        first_byte = time.perf_counter() - started
+        for chunk in chunks:
+            size += len(chunk)
+        return first_byte, time.perf_counter() - started, size
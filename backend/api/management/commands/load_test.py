@@ -0,0 +1,250 @@
+import json
+import random
+import statistics
+import subprocess
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from ingredients.models import Ingredient
+from recipes.models import Recipe
+
+User = get_user_model()
+
+SCENARIOS = (
+    'recipes',
+    'recipes_authenticated',
+    'subscriptions',
+    'download_shopping_cart',
+    'ingredient_search',
+    'feed',
+)
+
+
+class Command(BaseCommand):
+    help = 'Нагрузочное тестирование основных эндпоинтов API'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=200,
+            help='Сколько запросов выполнить в каждом сценарии'
+        )
+        parser.add_argument(
+            '--users',
+            type=int,
+            default=20,
+            help='Сколько пользователей использовать для запросов'
+        )
+        parser.add_argument(
+            '--scenario',
+            action='append',
+            choices=SCENARIOS,
+            help='Сценарий для запуска, по умолчанию все'
+        )
+        parser.add_argument(
+            '--base-url',
+            help='Адрес запущенного сервера вместо тестового клиента'
+        )
+        parser.add_argument(
+            '--cold',
+            action='store_true',
+            help='Очищать кеш перед каждым запросом'
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='Файл для сохранения JSON')
+        parser.add_argument(
+            '--compare',
+            help='JSON предыдущего запуска для сравнения'
+        )
+
+    def handle(self, *args, **options):
+        if options['requests'] < 2:
+            raise CommandError('Нужно хотя бы два запроса на сценарий')
+        self.rng = random.Random(options['seed'])
+        self.base_url = options['base_url']
+        self.cold = options['cold']
+        self.tokens = self.get_tokens(options['users'])
+        self.feed_tokens = self.get_feed_tokens(options['users'])
+        scenarios = self.get_scenarios(options['scenario'])
+        self.page_count = max(1, Recipe.objects.count() // 6)
+        self.prefixes = self.get_prefixes()
+        if self.base_url:
+            import requests
+            self.session = requests.Session()
+        else:
+            self.client = Client(SERVER_NAME=self.get_host())
+        results = {
+            name: self.run_scenario(name, options['requests'])
+            for name in scenarios
+        }
+        report = {
+            'created_at': timezone.now().isoformat(),
+            'commit': self.get_commit(),
+            'database': connection.vendor,
+            'mode': 'server' if self.base_url else 'client',
+            'cold': self.cold,
+            'requests': options['requests'],
+            'scenarios': results,
+        }
+        previous = self.load_report(options['compare'])
+        for name, result in results.items():
+            self.write_result(name, result, previous.get(name))
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf8') as file:
+                json.dump(report, file, ensure_ascii=False, indent=2)
+
+    def get_tokens(self, count):
+        users = User.objects.filter(
+            shopping_cart__isnull=False,
+            follower__isnull=False
+        ).distinct().order_by('id')[:count]
+        tokens = [Token.objects.get_or_create(user=user)[0].key
+                  for user in users]
+        if not tokens:
+            raise CommandError(
+                'Нет пользователей с корзиной и подписками, '
+                'сначала выполните seed_foodgram'
+            )
+        return tokens
+
+    def get_feed_tokens(self, count):
+        users = User.objects.filter(
+            following_count__gt=0
+        ).order_by('-following_count', 'id')[:count]
+        return [Token.objects.get_or_create(user=user)[0].key
+                for user in users]
+
+    def get_scenarios(self, selected):
+        scenarios = selected or SCENARIOS
+        if self.feed_tokens or 'feed' not in scenarios:
+            return scenarios
+        message = (
+            'Нет пользователей с подписками для сценария feed, '
+            'сначала выполните seed_foodgram с --feed-users'
+        )
+        if selected:
+            raise CommandError(message)
+        self.stderr.write(self.style.WARNING(message + ', сценарий пропущен'))
+        return [name for name in scenarios if name != 'feed']
+
+    def get_prefixes(self):
+        names = Ingredient.objects.order_by('?').values_list(
+            'name', flat=True
+        )[:100]
+        return [name[:3] for name in names] or ['а']
+
+    def get_host(self):
+        hosts = [
+            host.lstrip('.') for host in settings.ALLOWED_HOSTS
+            if '*' not in host
+        ]
+        return hosts[0] if hosts else 'localhost'
+
+    def get_commit(self):
+        try:
+            return subprocess.run(
+                ('git', 'rev-parse', '--short', 'HEAD'),
+                capture_output=True,
+                check=True,
+                cwd=settings.BASE_DIR,
+                text=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    def get_request(self, name):
+        if name == 'feed':
+            return (
+                f'/api/recipes/feed/?page={self.rng.randint(1, 5)}',
+                self.rng.choice(self.feed_tokens)
+            )
+        page = self.rng.randint(1, self.page_count)
+        token = self.rng.choice(self.tokens)
+        return {
+            'recipes': (f'/api/recipes/?page={page}', None),
+            'recipes_authenticated': (f'/api/recipes/?page={page}', token),
+            'subscriptions': (
+                '/api/users/subscriptions/?recipes_limit=3', token
+            ),
+            'download_shopping_cart': (
+                '/api/recipes/download_shopping_cart/', token
+            ),
+            'ingredient_search': (
+                f'/api/ingredients/?name={self.rng.choice(self.prefixes)}',
+                None
+            ),
+        }[name]
+
+    def request(self, path, token):
+        headers = {'Authorization': f'Token {token}'} if token else {}
+        if self.base_url:
+            response = self.session.get(self.base_url + path, headers=headers)
+            return response.status_code, None
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(path, headers=headers)
+            if response.streaming:
+                b''.join(response.streaming_content)
+        return response.status_code, len(queries)
+
+    def run_scenario(self, name, count):
+        timings = []
+        query_counts = []
+        errors = 0
+        for _ in range(count):
+            path, token = self.get_request(name)
+            if self.cold:
+                cache.clear()
+            started = time.perf_counter()
+            status, queries = self.request(path, token)
+            timings.append((time.perf_counter() - started) * 1000)
+            if status >= 400:
+                errors += 1
+            if queries is not None:
+                query_counts.append(queries)
+        percentiles = statistics.quantiles(timings, n=100, method='inclusive')
+        return {
+            'requests': count,
+            'errors': errors,
+            'mean_ms': round(statistics.fmean(timings), 2),
+            'p50_ms': round(percentiles[49], 2),
+            'p95_ms': round(percentiles[94], 2),
+            'p99_ms': round(percentiles[98], 2),
+            'queries_mean': (
+                round(statistics.fmean(query_counts), 2)
+                if query_counts else None
+            ),
+            'queries_max': max(query_counts) if query_counts else None,
+        }
+
+    def load_report(self, path):
+        if not path:
+            return {}
+        try:
+            with open(path, encoding='utf8') as file:
+                return json.load(file)['scenarios']
+        except (OSError, ValueError, KeyError) as error:
+            raise CommandError(f'Не удалось прочитать {path}: {error}')
+
+    def write_result(self, name, result, previous):
+        line = (
+            f'{name}: p50 {result["p50_ms"]} мс, p95 {result["p95_ms"]} мс, '
+            f'p99 {result["p99_ms"]} мс, запросов к БД '
+            f'{result["queries_mean"]}, ошибок {result["errors"]}'
+        )
+        if previous:
+            line += ' (было: ' + ', '.join(
+                f'{key} {previous.get(key)}'
+                for key in ('p50_ms', 'p95_ms', 'p99_ms', 'queries_mean')
+            ) + ')'
+        style = self.style.ERROR if result['errors'] else self.style.SUCCESS
+        self.stdout.write(style(line))
@@ -0,0 +1,223 @@
+import logging
+import re
+import threading
+from collections import Counter, defaultdict
+from hashlib import md5
+from time import perf_counter
+
+from django.conf import settings
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .relations import relation_cache
+from .renderers import PrometheusRenderer
+
+logger = logging.getLogger(__name__)
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+FINGERPRINT_LIMIT = 200
+IN_LIST = re.compile(r'\((?:\s*%s\s*,)+\s*%s\s*\)')
+LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+TRANSACTION_STATEMENT = re.compile(
+    r'\s*(?:BEGIN|COMMIT|ROLLBACK|SAVEPOINT|RELEASE|START\s+TRANSACTION)\b',
+    re.IGNORECASE
+)
+TOTALS = (
+    ('db_queries', 'Число запросов к БД'),
+    ('db_seconds', 'Время запросов к БД, с'),
+    ('app_seconds', 'Время представления и сериализации без БД, с'),
+    ('render_seconds', 'Время рендеринга ответа, с'),
+    ('response_bytes', 'Размер ответов, байт'),
+    ('duplicate_queries', 'Число повторяющихся запросов (N+1)'),
+)
+RELATION_CACHE_STATS = (
+    ('entries', 'gauge', 'Записей в кеше связей пользователей'),
+    ('max_entries', 'gauge', 'Предельное число записей в кеше связей'),
+    ('ids', 'gauge', 'Идентификаторов в кеше связей'),
+    ('bytes', 'gauge', 'Память под идентификаторы в кеше связей, байт'),
+    ('hits', 'counter', 'Попадания в локальный кеш связей'),
+    ('shared_hits', 'counter', 'Попадания в общий кеш связей'),
+    ('misses', 'counter', 'Загрузки связей из БД'),
+    ('evictions', 'counter', 'Вытеснения из кеша связей'),
+    ('hit_ratio', 'gauge', 'Доля попаданий в кеш связей'),
+)
+
+
+def get_fingerprint(sql):
+    return ' '.join(LITERAL.sub('?', IN_LIST.sub('(%s, ...)', sql)).split())
+
+
+def escape_label(value):
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace(
+        '\n', r'\n'
+    )
+
+
+class QueryRecorder:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0
+        self.fingerprints = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += perf_counter() - started
+            self.count += 1
+            if not TRANSACTION_STATEMENT.match(sql):
+                self.fingerprints[get_fingerprint(sql)] += 1
+
+    def get_duplicates(self):
+        return {
+            fingerprint: count
+            for fingerprint, count in self.fingerprints.items() if count > 1
+        }
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.requests = Counter()
+        self.buckets = defaultdict(lambda: [0] * len(DURATION_BUCKETS))
+        self.durations = Counter()
+        self.totals = defaultdict(Counter)
+        self.duplicates = Counter()
+        self.fingerprints = {}
+
+    def observe(self, view, method, status, duration, recorder,
+                app_seconds, render_seconds, size):
+        duplicates = recorder.get_duplicates()
+        with self.lock:
+            self.requests[view, method, status] += 1
+            self.durations[view] += duration
+            buckets = self.buckets[view]
+            for position, bound in enumerate(DURATION_BUCKETS):
+                if duration <= bound:
+                    buckets[position] += 1
+            totals = self.totals[view]
+            totals['db_queries'] += recorder.count
+            totals['db_seconds'] += recorder.duration
+            totals['app_seconds'] += app_seconds
+            totals['render_seconds'] += render_seconds
+            totals['response_bytes'] += size
+            for fingerprint, count in duplicates.items():
+                totals['duplicate_queries'] += count - 1
+                key = md5(fingerprint.encode()).hexdigest()[:12]
+                if key in self.fingerprints or (
+                    len(self.fingerprints) < FINGERPRINT_LIMIT
+                ):
+                    self.fingerprints[key] = fingerprint
+                    self.duplicates[view, key] += count - 1
+        if duplicates:
+            level = (
+                logging.WARNING
+                if max(duplicates.values()) > (
+                    settings.METRICS_N_PLUS_ONE_THRESHOLD
+                )
+                else logging.DEBUG
+            )
+            logger.log(
+                level,
+                'Повторяющиеся запросы в %s: %s',
+                view,
+                '; '.join(
+                    f'{count}× {fingerprint}'
+                    for fingerprint, count in duplicates.items()
+                )
+            )
+
+    def render(self):
+        with self.lock:
+            lines = [
+                '# HELP foodgram_requests_total Число запросов',
+                '# TYPE foodgram_requests_total counter',
+            ]
+            for (view, method, status), count in sorted(
+                self.requests.items()
+            ):
+                lines.append(
+                    f'foodgram_requests_total{{view="{escape_label(view)}",'
+                    f'method="{method}",status="{status}"}} {count}'
+                )
+            lines += [
+                '# HELP foodgram_request_duration_seconds Время ответа, с',
+                '# TYPE foodgram_request_duration_seconds histogram',
+            ]
+            counts = Counter()
+            for (view, _, _), count in self.requests.items():
+                counts[view] += count
+            for view in sorted(counts):
+                label = escape_label(view)
+                for bound, count in zip(DURATION_BUCKETS, self.buckets[view]):
+                    lines.append(
+                        'foodgram_request_duration_seconds_bucket'
+                        f'{{view="{label}",le="{bound}"}} {count}'
+                    )
+                lines += [
+                    'foodgram_request_duration_seconds_bucket'
+                    f'{{view="{label}",le="+Inf"}} {counts[view]}',
+                    'foodgram_request_duration_seconds_sum'
+                    f'{{view="{label}"}} {self.durations[view]:.6f}',
+                    'foodgram_request_duration_seconds_count'
+                    f'{{view="{label}"}} {counts[view]}',
+                ]
+            for name, description in TOTALS:
+                lines += [
+                    f'# HELP foodgram_{name}_total {description}',
+                    f'# TYPE foodgram_{name}_total counter',
+                ]
+                for view in sorted(self.totals):
+                    value = self.totals[view][name]
+                    if isinstance(value, float):
+                        value = f'{value:.6f}'
+                    lines.append(
+                        f'foodgram_{name}_total'
+                        f'{{view="{escape_label(view)}"}} {value}'
+                    )
+            lines += [
+                '# HELP foodgram_duplicate_query_fingerprint_total '
+                'Повторы запроса по отпечатку',
+                '# TYPE foodgram_duplicate_query_fingerprint_total counter',
+            ]
+            for key, fingerprint in sorted(self.fingerprints.items()):
+                lines.append(f'# {key}: {fingerprint}')
+            for (view, key), count in sorted(self.duplicates.items()):
+                lines.append(
+                    'foodgram_duplicate_query_fingerprint_total'
+                    f'{{view="{escape_label(view)}",fingerprint="{key}"}} '
+                    f'{count}'
+                )
+        stats = relation_cache.get_stats()
+        for name, kind, description in RELATION_CACHE_STATS:
+            metric = f'foodgram_relation_cache_{name}'
+            if kind == 'counter':
+                metric += '_total'
+            value = stats[name]
+            if isinstance(value, float):
+                value = f'{value:.6f}'
+            lines += [
+                f'# HELP {metric} {description}',
+                f'# TYPE {metric} {kind}',
+                f'{metric} {value}',
+            ]
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+
+class MetricsView(APIView):
+    permission_classes = (IsAdminUser,)
+    renderer_classes = (PrometheusRenderer,)
+
+    def get(self, request):
+        return Response(
+            registry.render(),
+            content_type=PrometheusRenderer.content_type
+        )
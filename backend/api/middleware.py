@@ -0,0 +1,61 @@
+import random
+from contextlib import ExitStack
+from time import perf_counter
+
+from django.conf import settings
+from django.db import connections
+
+from .metrics import QueryRecorder, registry
+
+
+class MetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = settings.METRICS_SAMPLE_RATE
+
+    def __call__(self, request):
+        if random.random() >= self.sample_rate:
+            return self.get_response(request)
+        request.metrics_timings = timings = {}
+        recorder = QueryRecorder()
+        started = perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+        finished = perf_counter()
+        view_finished = timings.get('view_finished', finished)
+        render_seconds = timings.get('render_finished', view_finished) - (
+            view_finished
+        )
+        app_seconds = max(view_finished - started - recorder.duration, 0)
+        user = getattr(request, 'user', None)
+        if settings.DEBUG or (user is not None and user.is_staff):
+            response['Server-Timing'] = ', '.join((
+                f'db;dur={recorder.duration * 1000:.1f};'
+                f'desc="{recorder.count} queries"',
+                f'app;dur={app_seconds * 1000:.1f}',
+                f'render;dur={render_seconds * 1000:.1f}',
+                f'total;dur={(finished - started) * 1000:.1f}',
+            ))
+        match = request.resolver_match
+        registry.observe(
+            view=match.view_name if match else 'unresolved',
+            method=request.method,
+            status=response.status_code,
+            duration=finished - started,
+            recorder=recorder,
+            app_seconds=app_seconds,
+            render_seconds=render_seconds,
+            size=0 if response.streaming else len(response.content)
+        )
+        return response
+
+    def process_template_response(self, request, response):
+        timings = getattr(request, 'metrics_timings', None)
+        if timings is not None:
+            timings['view_finished'] = perf_counter()
+            response.add_post_render_callback(
+                lambda response: timings.update(render_finished=perf_counter())
+            )
+        return response
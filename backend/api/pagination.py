@@ -1,6 +1,118 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+from collections import OrderedDict
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
 
 class CustomPagination(PageNumberPagination):
     page_size = 6
     page_size_query_param = "limit"
+    cursor_query_param = 'cursor'
+    cursor_ordering = ('-id',)
+    invalid_cursor_message = 'Некорректный курсор.'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_mode = self.cursor_query_param in request.query_params
+        if not self.cursor_mode:
+            return super().paginate_queryset(queryset, request, view)
+        self.request = request
+        ordering = getattr(view, 'cursor_ordering', self.cursor_ordering)
+        fields = [field.lstrip('-') for field in ordering]
+        page_size = self.get_page_size(request)
+        queryset = queryset.order_by(*ordering)
+        cursor = request.query_params[self.cursor_query_param]
+        if cursor:
+            values = self.decode_cursor(cursor, queryset, fields)
+            queryset = queryset.filter(self.get_keyset_filter(
+                ordering, fields, values
+            ))
+        try:
+            page = list(queryset[:page_size + 1])
+        except OverflowError:
+            raise NotFound(self.invalid_cursor_message)
+        self.has_next = len(page) > page_size
+        page = page[:page_size]
+        self.next_values = (
+            [getattr(page[-1], field) for field in fields]
+            if self.has_next else None
+        )
+        return page
+
+    def get_envelope(self):
+        if not self.cursor_mode:
+            return OrderedDict([
+                ('count', self.page.paginator.count),
+                ('next', self.get_next_link()),
+                ('previous', self.get_previous_link())
+            ])
+        return OrderedDict([
+            ('count', None),
+            ('next', self.get_next_cursor_link()),
+            ('previous', None)
+        ])
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            *self.get_envelope().items(),
+            ('results', data)
+        ]))
+
+    def get_keyset_filter(self, ordering, fields, values):
+        keyset = Q()
+        for position, field in enumerate(ordering):
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition = Q(**{
+                f'{fields[position]}__{lookup}': values[position]
+            })
+            for equal_field, value in zip(fields[:position], values):
+                condition &= Q(**{equal_field: value})
+            keyset |= condition
+        return keyset
+
+    def encode_cursor(self, values):
+        return urlsafe_b64encode(
+            json.dumps(values, default=str).encode()
+        ).decode()
+
+    def get_cursor_field(self, queryset, name):
+        if name in queryset.query.annotations:
+            return queryset.query.annotations[name].output_field
+        return queryset.model._meta.get_field(name)
+
+    def decode_cursor(self, cursor, queryset, fields):
+        try:
+            values = json.loads(urlsafe_b64decode(cursor.encode()))
+            if not isinstance(values, list) or len(values) != len(fields):
+                raise ValueError
+            decoded = []
+            for name, value in zip(fields, values):
+                if value is None:
+                    raise ValueError
+                field = self.get_cursor_field(queryset, name)
+                value = field.to_python(value)
+                field.run_validators(value)
+                decoded.append(value)
+            return decoded
+        except (BinasciiError, DjangoValidationError, TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_cursor_link(self):
+        if not self.has_next:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            self.encode_cursor(self.next_values)
+        )
+
+
+class PageNumberOnlyPagination(PageNumberPagination):
+    page_size = CustomPagination.page_size
+    page_size_query_param = CustomPagination.page_size_query_param
@@ -0,0 +1,144 @@
+from django.contrib.auth import get_user_model
+from rest_framework.response import Response
+
+from recipes.models import IngredientRecipe, Recipe
+from .fields import build_url, get_srcsets
+from .viewer import get_viewer_state
+
+User = get_user_model()
+
+TAG_FIELDS = ('id', 'name', 'color', 'slug')
+INGREDIENT_FIELDS = ('id', 'name', 'measurement_unit')
+USER_FIELDS = (
+    'email',
+    'id',
+    'username',
+    'first_name',
+    'last_name',
+    'followers_count',
+    'following_count',
+)
+SHORT_RECIPE_FIELDS = (
+    'id',
+    'name',
+    'image',
+    'image_variants',
+    'cooking_time',
+)
+RECIPE_FIELDS = (
+    'id',
+    'author_id',
+    'favorites_count',
+    'carts_count',
+    'name',
+    'image',
+    'image_variants',
+    'text',
+    'cooking_time',
+)
+
+
+def get_image_url(name, request):
+    if not name:
+        return None
+    return build_url(Recipe.image.field.storage.url(name), request)
+
+
+def serialize_tags(queryset):
+    return list(queryset.values(*TAG_FIELDS))
+
+
+def serialize_ingredients(queryset):
+    return list(queryset.values(*INGREDIENT_FIELDS))
+
+
+def serialize_short_recipes(queryset, request=None):
+    return [
+        {
+            'id': row['id'],
+            'name': row['name'],
+            'image': get_image_url(row['image'], request),
+            'image_variants': get_srcsets(row['image_variants'], request),
+            'cooking_time': row['cooking_time'],
+        }
+        for row in queryset.values(*SHORT_RECIPE_FIELDS)
+    ]
+
+
+def group_rows(rows, fields):
+    groups = {}
+    for recipe_id, *values in rows:
+        groups.setdefault(recipe_id, []).append(dict(zip(fields, values)))
+    return groups
+
+
+def serialize_recipes(recipe_ids, request):
+    rows = {
+        row['id']: row
+        for row in Recipe.objects.filter(
+            pk__in=recipe_ids
+        ).order_by().values(*RECIPE_FIELDS)
+    }
+    if not rows:
+        return []
+    tags = group_rows(
+        Recipe.tags.through.objects.filter(
+            recipe_id__in=rows
+        ).order_by('tag_id').values_list(
+            'recipe_id', 'tag_id', 'tag__name', 'tag__color', 'tag__slug'
+        ),
+        TAG_FIELDS
+    )
+    ingredients = group_rows(
+        IngredientRecipe.objects.filter(recipe_id__in=rows).values_list(
+            'recipe_id',
+            'ingredient_id',
+            'ingredient__name',
+            'ingredient__measurement_unit',
+            'amount'
+        ),
+        INGREDIENT_FIELDS + ('amount',)
+    )
+    author_ids = {row['author_id'] for row in rows.values()}
+    authors = {
+        author['id']: author
+        for author in User.objects.filter(
+            pk__in=author_ids
+        ).values(*USER_FIELDS)
+    }
+    state = get_viewer_state(request)
+    state.load(rows, author_ids)
+    recipes = []
+    for recipe_id in recipe_ids:
+        row = rows.get(recipe_id)
+        if row is None:
+            continue
+        author = authors[row['author_id']]
+        recipes.append({
+            'id': recipe_id,
+            'tags': tags.get(recipe_id, []),
+            'author': {
+                **author,
+                'is_subscribed': author['id'] in state.subscribed,
+            },
+            'ingredients': ingredients.get(recipe_id, []),
+            'is_favorited': recipe_id in state.favorited,
+            'is_in_shopping_cart': recipe_id in state.in_shopping_cart,
+            'favorites_count': row['favorites_count'],
+            'carts_count': row['carts_count'],
+            'name': row['name'],
+            'image': get_image_url(row['image'], request),
+            'image_variants': get_srcsets(row['image_variants'], request),
+            'text': row['text'],
+            'cooking_time': row['cooking_time'],
+        })
+    return recipes
+
+
+class PlainListMixin:
+    plain_serializer = None
+
+    def list(self, request, *args, **kwargs):
+        return Response(self.plain_serializer(
+            self.filter_queryset(self.get_queryset())
+        ))
@@ -1,27 +1,44 @@
-from django.db.models import F
-from django.shortcuts import get_object_or_404
+from django.db import transaction
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 
-from favorites.models import Favorite
 from ingredients.models import Ingredient
-from shoppingcarts.models import ShoppingCart
+from shoppingcarts.models import ShoppingCartItem
 from tags.models import Tag
+from recipes.matching import mark_recipes_changed
 from recipes.models import IngredientRecipe, Recipe
-from ..fields import Base64ImageField
+from recipes.search import update_search_index
+from ..cache import bump_versions
+from ..fields import Base64ImageField, ImageVariantsField
 from ..tags.serializers import TagSerializer
 from ..users.serializers import CustomUserSerializer
+from ..viewer import ViewerStateListSerializer, get_viewer_state
+
+
+class IngredientAmountSerializer(serializers.ModelSerializer):
+    id = serializers.ReadOnlyField(source='ingredient.id')
+    name = serializers.ReadOnlyField(source='ingredient.name')
+    measurement_unit = serializers.ReadOnlyField(
+        source='ingredient.measurement_unit'
+    )
+
+    class Meta:
+        model = IngredientRecipe
+        fields = ('id', 'name', 'measurement_unit', 'amount')
 
 
 class RecipeSerializer(serializers.ModelSerializer):
-    ingredients = serializers.SerializerMethodField(
-        method_name='get_ingredients'
+    ingredients = IngredientAmountSerializer(
+        source='ingredientrecipes',
+        many=True,
+        read_only=True
     )
     tags = TagSerializer(many=True, read_only=True)
     author = CustomUserSerializer(read_only=True)
     image = Base64ImageField(
         max_length=None, use_url=True,
     )
+    image_variants = ImageVariantsField()
     is_favorited = serializers.SerializerMethodField(
         method_name='get_is_favorited'
     )
@@ -38,36 +55,34 @@ class RecipeSerializer(serializers.ModelSerializer):
             'ingredients',
             'is_favorited',
             'is_in_shopping_cart',
+            'favorites_count',
+            'carts_count',
             'name',
             'image',
+            'image_variants',
             'text',
             'cooking_time'
         )
+        list_serializer_class = ViewerStateListSerializer
 
-    def get_ingredients(self, obj):
-        recipe = obj
-        return (
-            recipe.ingredients.values(
-                'id',
-                'name',
-                'measurement_unit',
-                amount=F('ingredientrecipes__amount')
-            )
-        )
+    def load_viewer_state(self, recipes):
+        get_viewer_state(self.context['request']).load_recipes(recipes)
+
+    def to_representation(self, instance):
+        self.load_viewer_state([instance])
+        return super().to_representation(instance)
 
     def get_is_favorited(self, obj):
-        user = self.context['request'].user
-        return user.is_authenticated and Favorite.objects.filter(
-            user=user,
-            recipe=obj
-        ).exists()
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
+        return get_viewer_state(self.context['request']).is_favorited(obj.id)
 
     def get_is_in_shopping_cart(self, obj):
-        user = self.context['request'].user
-        return user.is_authenticated and ShoppingCart.objects.filter(
-            user=user,
-            recipe=obj
-        ).exists()
+        if hasattr(obj, 'is_in_shopping_cart'):
+            return obj.is_in_shopping_cart
+        return get_viewer_state(
+            self.context['request']
+        ).is_in_shopping_cart(obj.id)
 
 
 class IngredientRecipeSerializer(serializers.ModelSerializer):
@@ -90,21 +105,60 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
     cooking_time = serializers.IntegerField()
 
     def _create_ingredients(self, ingredients, recipe):
-        ingredient_list = []
-        for ingredient in ingredients:
-            current_ingredient = get_object_or_404(
-                Ingredient,
-                id=ingredient.get('id')
+        IngredientRecipe.objects.bulk_create(
+            IngredientRecipe(
+                recipe=recipe,
+                ingredient_id=ingredient['id'],
+                amount=ingredient['amount']
             )
-            amount = ingredient.get('amount')
-            ingredient_list.append(
-                IngredientRecipe(
-                    recipe=recipe,
-                    ingredient=current_ingredient,
-                    amount=amount
-                )
+            for ingredient in ingredients
+        )
+        update_search_index([recipe.id])
+        transaction.on_commit(mark_recipes_changed)
+        bump_versions('recipes')
+
+    def _update_ingredients(self, ingredients, recipe):
+        current = {
+            item.ingredient_id: item
+            for item in recipe.ingredientrecipes.all()
+        }
+        old_amounts = {
+            ingredient_id: item.amount
+            for ingredient_id, item in current.items()
+        }
+        new_amounts = {
+            ingredient['id']: ingredient['amount']
+            for ingredient in ingredients
+        }
+        if new_amounts == old_amounts:
+            return
+        removed = [
+            item.pk for ingredient_id, item in current.items()
+            if ingredient_id not in new_amounts
+        ]
+        changed = []
+        for ingredient_id, item in current.items():
+            amount = new_amounts.get(ingredient_id, item.amount)
+            if amount != item.amount:
+                item.amount = amount
+                changed.append(item)
+        if removed:
+            IngredientRecipe.objects.filter(pk__in=removed).delete()
+        if changed:
+            IngredientRecipe.objects.bulk_update(changed, ('amount',))
+        IngredientRecipe.objects.bulk_create(
+            IngredientRecipe(
+                recipe=recipe,
+                ingredient_id=ingredient_id,
+                amount=amount
             )
-        IngredientRecipe.objects.bulk_create(ingredient_list)
+            for ingredient_id, amount in new_amounts.items()
+            if ingredient_id not in current
+        )
+        ShoppingCartItem.objects.change_recipe(
+            recipe.id, old_amounts, new_amounts
+        )
+        transaction.on_commit(mark_recipes_changed)
 
     def validate_ingredients(self, value):
         ingredients = value
@@ -124,8 +178,19 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
                 raise ValidationError({
                     'amount': 'Количество ингредиента не должно быть <= 0'
                 })
+        missing = ingredients_roster - Ingredient.objects.only(
+            'id'
+        ).in_bulk(ingredients_roster).keys()
+        if missing:
+            raise ValidationError({
+                'ingredients': (
+                    'Ингредиенты не найдены: '
+                    + ', '.join(map(str, sorted(missing)))
+                )
+            })
         return value
 
+    @transaction.atomic
     def create(self, validated_data):
         ingredients = validated_data.pop('ingredients')
         tags = validated_data.pop('tags')
@@ -135,18 +200,31 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
         self._create_ingredients(ingredients, recipe)
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         tags = validated_data.pop('tags', None)
-        instance.tags.set(tags)
+        if tags is not None:
+            instance.tags.set(tags)
         ingredients = validated_data.pop('ingredients', None)
-        instance.ingredients.clear()
-        self._create_ingredients(ingredients, instance)
+        if ingredients is not None:
+            self._update_ingredients(ingredients, instance)
         return super().update(instance, validated_data)
 
+    def save(self, **kwargs):
+        try:
+            return super().save(**kwargs)
+        finally:
+            image = self.validated_data.get('image')
+            if image is not None:
+                image.close()
+
     def to_representation(self, instance):
+        request = self.context.get('request')
         serializer = RecipeSerializer(
-            instance,
-            context={'request': self.context.get('request')}
+            Recipe.objects.with_related().select_related('author').get(
+                pk=instance.pk
+            ),
+            context={'request': request}
         )
 
         return serializer.data
@@ -163,3 +241,14 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
             'text',
             'cooking_time',
         )
+
+
+class RecipeIdsSerializer(serializers.Serializer):
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=100
+    )
+
+    def validate_ids(self, value):
+        return list(dict.fromkeys(value))
@@ -1,34 +1,187 @@
-from django.http import HttpResponse
-from django.db.models import Sum
+from hashlib import md5
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Max
+from django.http import HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import (IsAuthenticated,
                                         IsAuthenticatedOrReadOnly)
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
 
 from favorites.models import Favorite
-from shoppingcarts.models import ShoppingCart
-from recipes.models import IngredientRecipe, Recipe
-from api.filters import RecipeFilter
+from shoppingcarts.models import ShoppingCart, ShoppingCartItem
+from recipes.matching import recipe_ingredient_index
+from recipes.models import Recipe
+from api.cache import CachedResponseMixin, bump_versions, get_versions
+from api.documents import LIST_FIELDS, render_recipe_list
+from api.feed import Feed
+from api.filters import RecipeFilter, get_recipe_ordering
+from api.pagination import PageNumberOnlyPagination
 from api.permissions import IsAuthorOrReadOnly
+from api.plain import serialize_recipes
+from api.relations import RELATION_KINDS, relation_cache
+from api.renderers import SHOPPING_LIST_RENDERERS
+from api.viewer import get_viewer_state
 from ..users.serializers import RecipeShortSerializer
-from .serializers import RecipeCreateSerializer, RecipeSerializer
+from .serializers import (RecipeCreateSerializer, RecipeIdsSerializer,
+                          RecipeSerializer)
+
+MAX_HAVE = 100
 
 
-class RecipeViewSet(ModelViewSet):
-    queryset = Recipe.objects.all()
+class RecipeViewSet(CachedResponseMixin, ModelViewSet):
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipeFilter
     permission_classes = (IsAuthenticatedOrReadOnly, IsAuthorOrReadOnly)
+    cache_scopes = ('recipes',)
+    cache_bypass_params = ('is_favorited', 'is_in_shopping_cart')
+    cache_personalized = True
+
+    @property
+    def cursor_ordering(self):
+        return get_recipe_ordering(self.request)
+
+    def get_queryset(self):
+        return Recipe.objects.with_related().select_related('author')
+
+    def renders_documents(self, request):
+        return self.action == 'list' and isinstance(
+            request.accepted_renderer, JSONRenderer
+        )
+
+    def list(self, request, *args, **kwargs):
+        if not self.renders_documents(request):
+            return super().list(request, *args, **kwargs)
+        return self.get_cached_response(
+            self.list_documents, request, *args, **kwargs
+        )
+
+    def list_documents(self, request, *args, **kwargs):
+        recipes = self.paginate_queryset(
+            self.filter_queryset(
+                Recipe.objects.select_related('author').only(*LIST_FIELDS)
+            )
+        )
+        return HttpResponse(
+            render_recipe_list(
+                request, recipes, self.paginator.get_envelope()
+            ),
+            content_type='application/json'
+        )
+
+    def is_personal_request(self, request):
+        return super().is_personal_request(request) or (
+            request.user.is_authenticated and self.renders_documents(request)
+        )
+
+    def personalize_cached_data(self, data):
+        if not self.request.user.is_authenticated:
+            return data
+        recipes = data['results'] if 'results' in data else [data]
+        state = get_viewer_state(self.request)
+        state.load(
+            [recipe['id'] for recipe in recipes],
+            [recipe['author']['id'] for recipe in recipes]
+        )
+        for recipe in recipes:
+            recipe['is_favorited'] = recipe['id'] in state.favorited
+            recipe['is_in_shopping_cart'] = (
+                recipe['id'] in state.in_shopping_cart
+            )
+            recipe['author']['is_subscribed'] = (
+                recipe['author']['id'] in state.subscribed
+            )
+        return data
+
+    def get_personal_etag(self, request, key):
+        queryset = self.filter_queryset(Recipe.objects.all())
+        if self.action == 'retrieve':
+            queryset = queryset.filter(pk=self.kwargs['pk'])
+        state = queryset.aggregate(
+            updated_at=Max('updated_at'),
+            count=Count('pk')
+        )
+        user_id = request.user.id
+        versions = get_versions(
+            f'favorites:{user_id}',
+            f'shopping_cart:{user_id}',
+            f'subscriptions:{user_id}'
+        )
+        raw_etag = f'{key}|{state["updated_at"]}|{state["count"]}|{versions}'
+        return f'"{md5(raw_etag.encode()).hexdigest()}"'
 
     def get_serializer_class(self):
         if self.action in ('create', 'partial_update'):
             return RecipeCreateSerializer
         return RecipeSerializer
 
+    def _bulk_add(self, model, counter, request):
+        serializer = RecipeIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = serializer.validated_data['ids']
+        with transaction.atomic():
+            found = set(
+                Recipe.objects.filter(id__in=ids).values_list('id', flat=True)
+            )
+            while True:
+                existing = set(model.objects.filter(
+                    user=request.user, recipe_id__in=found
+                ).values_list('recipe_id', flat=True))
+                added = [
+                    recipe_id for recipe_id in ids
+                    if recipe_id in found and recipe_id not in existing
+                ]
+                try:
+                    with transaction.atomic():
+                        model.objects.bulk_create(
+                            model(user=request.user, recipe_id=recipe_id)
+                            for recipe_id in added
+                        )
+                    break
+                except IntegrityError:
+                    continue
+            Recipe.objects.filter(id__in=added).change_counter(counter, 1)
+            relation_cache.add(
+                RELATION_KINDS[model][0], request.user.id, *added
+            )
+        statuses = [
+            {
+                'id': recipe_id,
+                'status': (
+                    'not_found' if recipe_id not in found
+                    else 'exists' if recipe_id in existing
+                    else 'added'
+                )
+            }
+            for recipe_id in ids
+        ]
+        return added, statuses
+
+    def _bulk_remove(self, model, request):
+        serializer = RecipeIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = serializer.validated_data['ids']
+        with transaction.atomic():
+            items = model.objects.filter(user=request.user, recipe_id__in=ids)
+            removed = set(items.select_for_update().values_list(
+                'recipe_id', flat=True
+            ))
+            items.delete()
+        statuses = [
+            {
+                'id': recipe_id,
+                'status': 'removed' if recipe_id in removed else 'absent'
+            }
+            for recipe_id in ids
+        ]
+        return removed, statuses
+
     @action(
         detail=True,
         methods=['POST'],
@@ -36,49 +189,53 @@ class RecipeViewSet(ModelViewSet):
     )
     def favorite(self, request, pk):
         recipe = get_object_or_404(Recipe, id=pk)
-        user = request.user
-        if user.is_authenticated:
-            if not Favorite.objects.filter(
-                user=user,
-                recipe=recipe
-            ).exists():
-                Favorite.objects.create(
-                    user=user,
-                    recipe=recipe
-                )
-                serializer = RecipeShortSerializer(
-                    recipe,
-                    context={'request': request}
-                )
-                return Response(serializer.data)
+        try:
+            with transaction.atomic():
+                Favorite.objects.create(user=request.user, recipe=recipe)
+        except IntegrityError:
             return Response(
                 'Рецепт уже в избранном',
                 status=status.HTTP_400_BAD_REQUEST
             )
-        return Response(
-            'Требуется авторизация',
-            status=status.HTTP_401_UNAUTHORIZED
+        serializer = RecipeShortSerializer(
+            recipe,
+            context={'request': request}
         )
+        return Response(serializer.data)
 
     @favorite.mapping.delete
     def remove_favorite(self, request, pk):
         recipe = get_object_or_404(Recipe, id=pk)
-        user = request.user
-        if user.is_authenticated:
-            favorite = Favorite.objects.filter(
-                user=user, recipe=recipe)
-            if favorite.exists():
-                favorite.delete()
-                return Response('Удален из избранного')
-            return Response(
-                'Рецепта нет в избранном',
-                status=status.HTTP_400_BAD_REQUEST
-            )
+        deleted, _ = Favorite.objects.filter(
+            user=request.user, recipe=recipe).delete()
+        if deleted:
+            return Response('Удален из избранного')
         return Response(
-            'Необходма авторизация',
-            status=status.HTTP_401_UNAUTHORIZED
+            'Рецепта нет в избранном',
+            status=status.HTTP_400_BAD_REQUEST
         )
 
+    @action(
+        detail=False,
+        methods=['POST'],
+        url_path='favorite',
+        permission_classes=[IsAuthenticated]
+    )
+    def bulk_favorite(self, request):
+        added, statuses = self._bulk_add(
+            Favorite, 'favorites_count', request
+        )
+        if added:
+            bump_versions('recipes', f'favorites:{request.user.id}')
+        return Response(statuses)
+
+    @bulk_favorite.mapping.delete
+    def bulk_remove_favorite(self, request):
+        removed, statuses = self._bulk_remove(Favorite, request)
+        if removed:
+            bump_versions('recipes', f'favorites:{request.user.id}')
+        return Response(statuses)
+
     @action(
         detail=True,
         methods=['POST'],
@@ -86,13 +243,14 @@ class RecipeViewSet(ModelViewSet):
     )
     def shopping_cart(self, request, pk):
         recipe = get_object_or_404(Recipe, id=pk)
-        if ShoppingCart.objects.filter(user=request.user,
-                                       recipe=recipe).exists():
+        try:
+            with transaction.atomic():
+                ShoppingCart.objects.create(user=request.user, recipe=recipe)
+        except IntegrityError:
             return Response(
                 {'errors': 'УЖе находится в списке покупок'},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        ShoppingCart.objects.create(user=request.user, recipe=recipe)
         serializer = RecipeShortSerializer(recipe, many=False)
         return Response(data=serializer.data, status=status.HTTP_201_CREATED)
 
@@ -105,27 +263,96 @@ class RecipeViewSet(ModelViewSet):
 
     @action(
         detail=False,
-        methods=['GET'],
+        methods=['POST'],
+        url_path='shopping_cart',
         permission_classes=[IsAuthenticated]
     )
+    def bulk_shopping_cart(self, request):
+        with transaction.atomic():
+            added, statuses = self._bulk_add(
+                ShoppingCart, 'carts_count', request
+            )
+            if added:
+                ShoppingCartItem.objects.add_recipes(request.user.id, added)
+        if added:
+            bump_versions('recipes', f'shopping_cart:{request.user.id}')
+        return Response(statuses)
+
+    @bulk_shopping_cart.mapping.delete
+    def bulk_remove_from_shopping_cart(self, request):
+        removed, statuses = self._bulk_remove(ShoppingCart, request)
+        if removed:
+            bump_versions('recipes', f'shopping_cart:{request.user.id}')
+        return Response(statuses)
+
+    @action(
+        detail=False,
+        methods=['GET'],
+        permission_classes=[IsAuthenticated],
+        pagination_class=PageNumberOnlyPagination
+    )
+    def feed(self, request):
+        page = self.paginate_queryset(
+            Feed(request.user, Recipe.objects.only('id'))
+        )
+        return self.get_paginated_response(serialize_recipes(
+            [recipe.id for recipe in page], request
+        ))
+
+    @action(
+        detail=False,
+        methods=['GET'],
+        url_path='by_ingredients',
+        pagination_class=PageNumberOnlyPagination
+    )
+    def by_ingredients(self, request):
+        try:
+            ingredient_ids = {
+                int(value)
+                for value in request.query_params.get('have', '').split(',')
+                if value.strip()
+            }
+        except ValueError:
+            raise ValidationError(
+                {'have': 'Укажите id ингредиентов через запятую'}
+            )
+        if not ingredient_ids or len(ingredient_ids) > MAX_HAVE:
+            raise ValidationError(
+                {'have': f'Укажите от 1 до {MAX_HAVE} ингредиентов'}
+            )
+        matches = self.paginate_queryset(
+            recipe_ingredient_index.match(ingredient_ids)
+        )
+        counts = {
+            recipe_id: (matched, size) for recipe_id, matched, size in matches
+        }
+        recipes = serialize_recipes(list(counts), request)
+        for recipe in recipes:
+            matched, size = counts[recipe['id']]
+            recipe['matched_count'] = matched
+            recipe['missing_count'] = size - matched
+        return self.get_paginated_response(recipes)
+
+    @action(
+        detail=False,
+        methods=['GET'],
+        permission_classes=[IsAuthenticated],
+        renderer_classes=SHOPPING_LIST_RENDERERS
+    )
     def download_shopping_cart(self, request):
-        ingredients = IngredientRecipe.objects.filter(
-            recipe__shopping_cart__user=request.user).values(
-                'ingredient__name', 'ingredient__measurement_unit').annotate(
-                    amount=Sum('amount')
+        ingredients = ShoppingCartItem.objects.filter(
+            user=request.user
+        ).values(
+            name=F('ingredient__name'),
+            measurement_unit=F('ingredient__measurement_unit'),
+            amount=F('total_amount')
+        ).order_by('name', 'measurement_unit')
+        renderer = request.accepted_renderer
+        response = StreamingHttpResponse(
+            renderer.stream(ingredients.iterator()),
+            content_type=f'{renderer.media_type}; charset={renderer.charset}'
         )
-        shop_string = (
-            'Ингредиенты к покупке:\n\n')
-        shop_string += '\n'.join([
-            f'- {ingredient["ingredient__name"]}, '
-            f'{ingredient["ingredient__measurement_unit"]}: '
-            f'{ingredient["amount"]}'
-            for ingredient in ingredients
-        ])
-        response = HttpResponse(
-            shop_string,
-            content_type='text/plain, charset=utf8'
+        response['Content-Disposition'] = (
+            f'attachment; filename="shopping_list.{renderer.format}"'
         )
-        response['Content-Disposition'] = 'attachment; '
-        'filename="shopping_list.txt"'
         return response
@@ -0,0 +1,181 @@
+import sys
+import threading
+from array import array
+from bisect import bisect_left, insort
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import models, transaction
+
+from favorites.models import Favorite
+from shoppingcarts.models import ShoppingCart
+from users.models import Subscriptions
+from .cache import bump_versions, get_versions
+
+FAVORITES = 'favorites'
+SHOPPING_CART = 'shopping_cart'
+SUBSCRIPTIONS = 'subscriptions'
+RELATIONS = {
+    FAVORITES: (Favorite, 'recipe_id'),
+    SHOPPING_CART: (ShoppingCart, 'recipe_id'),
+    SUBSCRIPTIONS: (Subscriptions, 'following_id'),
+}
+RELATION_KINDS = {
+    model: (kind, field) for kind, (model, field) in RELATIONS.items()
+}
+RELATION_KEY = 'api:relations:{}:{}'
+
+
+def get_scope(kind, user_id):
+    return f'relations:{kind}:{user_id}'
+
+
+def contains(ids, pk):
+    position = bisect_left(ids, pk)
+    return position < len(ids) and ids[position] == pk
+
+
+class RelationCache:
+    def __init__(self, max_entries, shared=False, timeout=None):
+        self.max_entries = max_entries
+        self.shared = shared
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0
+
+    def get_many(self, user_id, kinds=tuple(RELATIONS)):
+        versions = dict(zip(
+            kinds, get_versions(*(get_scope(kind, user_id) for kind in kinds))
+        ))
+        relations = {}
+        with self.lock:
+            for kind in kinds:
+                entry = self.entries.get((kind, user_id))
+                if entry and entry[0] == versions[kind]:
+                    self.entries.move_to_end((kind, user_id))
+                    relations[kind] = entry[1]
+            self.hits += len(relations)
+        missing = [kind for kind in kinds if kind not in relations]
+        if missing and self.shared:
+            for kind, ids in self._get_shared(
+                user_id, missing, versions
+            ).items():
+                relations[kind] = ids
+                self._store(kind, user_id, versions[kind], ids)
+            missing = [kind for kind in kinds if kind not in relations]
+        if missing:
+            with self.lock:
+                self.misses += len(missing)
+            for kind, ids in self._load(user_id, missing).items():
+                relations[kind] = ids
+                self._store(kind, user_id, versions[kind], ids)
+                self._set_shared(kind, user_id, versions[kind], ids)
+        return relations
+
+    def add(self, kind, user_id, *ids):
+        if ids:
+            transaction.on_commit(
+                lambda: self._apply(kind, user_id, ids, True)
+            )
+
+    def discard(self, kind, user_id, *ids):
+        if ids:
+            transaction.on_commit(
+                lambda: self._apply(kind, user_id, ids, False)
+            )
+
+    def get_stats(self):
+        with self.lock:
+            lookups = self.hits + self.shared_hits + self.misses
+            return {
+                'entries': len(self.entries),
+                'max_entries': self.max_entries,
+                'ids': sum(len(ids) for _, ids in self.entries.values()),
+                'bytes': sum(
+                    sys.getsizeof(ids) for _, ids in self.entries.values()
+                ),
+                'hits': self.hits,
+                'shared_hits': self.shared_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': (
+                    (self.hits + self.shared_hits) / lookups
+                    if lookups else 0
+                ),
+            }
+
+    def _load(self, user_id, kinds):
+        queries = [
+            RELATIONS[kind][0].objects.filter(user_id=user_id).values_list(
+                models.Value(position, output_field=models.IntegerField()),
+                RELATIONS[kind][1]
+            )
+            for position, kind in enumerate(kinds)
+        ]
+        relations = {kind: [] for kind in kinds}
+        for position, pk in queries[0].union(*queries[1:], all=True):
+            relations[kinds[position]].append(pk)
+        return {
+            kind: array('q', sorted(ids)) for kind, ids in relations.items()
+        }
+
+    def _store(self, kind, user_id, version, ids):
+        if not self.enabled:
+            return
+        with self.lock:
+            self.entries[kind, user_id] = (version, ids)
+            self.entries.move_to_end((kind, user_id))
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def _get_shared(self, user_id, kinds, versions):
+        keys = {RELATION_KEY.format(kind, user_id): kind for kind in kinds}
+        relations = {}
+        for key, (version, data) in cache.get_many(keys).items():
+            kind = keys[key]
+            if version == versions[kind]:
+                relations[kind] = array('q')
+                relations[kind].frombytes(data)
+        with self.lock:
+            self.shared_hits += len(relations)
+        return relations
+
+    def _set_shared(self, kind, user_id, version, ids):
+        if self.shared:
+            cache.set(
+                RELATION_KEY.format(kind, user_id),
+                (version, ids.tobytes()),
+                self.timeout
+            )
+
+    def _apply(self, kind, user_id, ids, added):
+        [version] = bump_versions(get_scope(kind, user_id))
+        with self.lock:
+            entry = self.entries.pop((kind, user_id), None)
+        if entry is None or entry[0] + 1 != version:
+            return
+        current = array('q', entry[1])
+        for pk in ids:
+            if added and not contains(current, pk):
+                insort(current, pk)
+            elif not added and contains(current, pk):
+                del current[bisect_left(current, pk)]
+        self._store(kind, user_id, version, current)
+        self._set_shared(kind, user_id, version, current)
+
+
+relation_cache = RelationCache(
+    settings.RELATION_CACHE_SIZE,
+    settings.RELATION_CACHE_SHARED,
+    settings.RELATION_CACHE_TIMEOUT
+)
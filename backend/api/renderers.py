@@ -0,0 +1,102 @@
+import csv
+import json
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+SHOPPING_LIST_HEADER = ('Ингредиент', 'Единица измерения', 'Количество')
+
+
+def dumps(data):
+    if orjson is None:
+        return json.dumps(
+            data, cls=JSONEncoder, ensure_ascii=False, separators=(',', ':')
+        ).encode()
+    return orjson.dumps(
+        data,
+        default=JSONEncoder().default,
+        option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+    )
+
+
+class FastJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or self.get_indent(
+            accepted_media_type, renderer_context or {}
+        ):
+            return super().render(
+                data, accepted_media_type, renderer_context
+            )
+        return dumps(data).replace(
+            '\u2028'.encode(), b'\\u2028'
+        ).replace('\u2029'.encode(), b'\\u2029')
+
+
+class Echo:
+    def write(self, value):
+        return value
+
+
+class ShoppingListTextRenderer(BaseRenderer):
+    media_type = 'text/plain'
+    format = 'txt'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if isinstance(data, dict):
+            data = '\n'.join(f'{key}: {value}' for key, value in data.items())
+        return str(data).encode(self.charset)
+
+    def stream(self, ingredients):
+        yield 'Ингредиенты к покупке:\n\n'
+        for ingredient in ingredients:
+            yield (
+                f'- {ingredient["name"]}, '
+                f'{ingredient["measurement_unit"]}: '
+                f'{ingredient["amount"]}\n'
+            )
+
+
+class PrometheusRenderer(ShoppingListTextRenderer):
+    format = 'prometheus'
+    content_type = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class ShoppingListCSVRenderer(ShoppingListTextRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+
+    def stream(self, ingredients):
+        writer = csv.writer(Echo())
+        yield writer.writerow(SHOPPING_LIST_HEADER)
+        for ingredient in ingredients:
+            yield writer.writerow((
+                ingredient['name'],
+                ingredient['measurement_unit'],
+                ingredient['amount']
+            ))
+
+
+class ShoppingListJSONRenderer(JSONRenderer):
+    charset = 'utf-8'
+
+    def stream(self, ingredients):
+        separator = '['
+        for ingredient in ingredients:
+            yield separator + json.dumps(ingredient, ensure_ascii=False)
+            separator = ','
+        yield ']' if separator == ',' else '[]'
+
+
+SHOPPING_LIST_RENDERERS = (
+    ShoppingListTextRenderer,
+    ShoppingListCSVRenderer,
+    ShoppingListJSONRenderer,
+)
@@ -0,0 +1,145 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete)
+from django.dispatch import receiver
+
+from favorites.models import Favorite
+from ingredients.models import Ingredient
+from recipes.models import IngredientRecipe, Recipe
+from shoppingcarts.models import ShoppingCart
+from tags.models import Tag
+from users.models import Subscriptions
+from .cache import bump_versions
+from .documents import invalidate_documents, refresh_documents
+from .feed import invalidate_feed, push_recipe, remove_recipe
+from .relations import RELATION_KINDS, relation_cache
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_save, sender=IngredientRecipe)
+@receiver(post_delete, sender=IngredientRecipe)
+@receiver(post_save, sender=Favorite)
+@receiver(post_delete, sender=Favorite)
+@receiver(post_save, sender=ShoppingCart)
+@receiver(post_delete, sender=ShoppingCart)
+@receiver(post_save, sender=Subscriptions)
+@receiver(post_delete, sender=Subscriptions)
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def invalidate_recipes(sender, **kwargs):
+    bump_versions('recipes')
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def invalidate_tags(sender, **kwargs):
+    bump_versions('tags', 'recipes')
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def invalidate_ingredients(sender, **kwargs):
+    bump_versions('ingredients', 'recipes')
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_authors(sender, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) <= {'last_login', 'password'}:
+        return
+    bump_versions('recipes')
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_delete, sender=Favorite)
+def invalidate_user_favorites(sender, instance, **kwargs):
+    bump_versions(f'favorites:{instance.user_id}')
+
+
+@receiver(post_save, sender=ShoppingCart)
+@receiver(post_delete, sender=ShoppingCart)
+def invalidate_user_shopping_cart(sender, instance, **kwargs):
+    bump_versions(f'shopping_cart:{instance.user_id}')
+
+
+@receiver(post_save, sender=Subscriptions)
+@receiver(post_delete, sender=Subscriptions)
+def invalidate_user_subscriptions(sender, instance, **kwargs):
+    bump_versions(f'subscriptions:{instance.user_id}')
+    invalidate_feed(instance.user_id)
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_save, sender=ShoppingCart)
+@receiver(post_save, sender=Subscriptions)
+def add_user_relation(sender, instance, created, **kwargs):
+    if created:
+        kind, field = RELATION_KINDS[sender]
+        relation_cache.add(kind, instance.user_id, getattr(instance, field))
+
+
+@receiver(post_delete, sender=Favorite)
+@receiver(post_delete, sender=ShoppingCart)
+@receiver(post_delete, sender=Subscriptions)
+def discard_user_relation(sender, instance, **kwargs):
+    kind, field = RELATION_KINDS[sender]
+    relation_cache.discard(kind, instance.user_id, getattr(instance, field))
+
+
+@receiver(post_save, sender=Recipe)
+def push_recipe_to_feeds(sender, instance, created, **kwargs):
+    if created:
+        transaction.on_commit(lambda: push_recipe(instance))
+
+
+@receiver(post_delete, sender=Recipe)
+def remove_recipe_from_feeds(sender, instance, **kwargs):
+    remove_recipe(instance)
+
+
+@receiver(post_save, sender=Recipe)
+def refresh_recipe_document(sender, instance, **kwargs):
+    refresh_documents([instance.pk])
+
+
+@receiver(post_save, sender=IngredientRecipe)
+@receiver(post_delete, sender=IngredientRecipe)
+def refresh_ingredient_recipe_document(sender, instance, **kwargs):
+    refresh_documents([instance.recipe_id])
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def refresh_tagged_recipe_documents(sender, instance, action, reverse,
+                                    pk_set, **kwargs):
+    if not reverse:
+        if action.startswith('post_'):
+            refresh_documents([instance.pk])
+    elif action == 'pre_clear':
+        invalidate_documents(instance.recipes.all())
+    elif action in ('post_add', 'post_remove'):
+        invalidate_documents(pk_set)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(pre_delete, sender=Tag)
+def invalidate_tag_documents(sender, instance, **kwargs):
+    invalidate_documents(instance.recipes.all())
+
+
+@receiver(post_save, sender=Ingredient)
+def invalidate_ingredient_documents(sender, instance, created, **kwargs):
+    if not created:
+        invalidate_documents(Recipe.objects.filter(ingredients=instance))
+
+
+@receiver(post_save, sender=User)
+def invalidate_author_documents(sender, instance, created, update_fields=None,
+                                **kwargs):
+    if created or (
+        update_fields and set(update_fields) <= {'last_login', 'password'}
+    ):
+        return
+    invalidate_documents(instance.recipes.all())
@@ -1,10 +1,14 @@
 from rest_framework.viewsets import ReadOnlyModelViewSet
 
 from tags.models import Tag
+from ..cache import CachedResponseMixin
+from ..plain import PlainListMixin, serialize_tags
 from .serializers import TagSerializer
 
 
-class TagViewSet(ReadOnlyModelViewSet):
+class TagViewSet(CachedResponseMixin, PlainListMixin, ReadOnlyModelViewSet):
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
+    plain_serializer = staticmethod(serialize_tags)
     pagination_class = None
+    cache_scopes = ('tags',)
@@ -0,0 +1,827 @@
+import json
+import re
+import uuid
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import date, datetime, time, timezone
+from decimal import Decimal
+from unittest import mock
+from urllib.parse import parse_qs, urlparse
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.db.models.signals import post_delete
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.client import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from favorites.models import Favorite
+from ingredients.models import Ingredient
+from recipes.matching import RecipeIngredientIndex
+from recipes.models import IngredientRecipe, Recipe
+from shoppingcarts.models import (ShoppingCart, ShoppingCartItem,
+                                  get_live_totals)
+from tags.models import Tag
+from users.models import Subscriptions
+from .feed import FEED_ORDERING, get_feed_key
+from .recipes.serializers import RecipeSerializer
+from .renderers import FastJSONRenderer, orjson
+
+User = get_user_model()
+
+RECIPES_URL = '/api/recipes/'
+PAGE_SIZES = (5, 20)
+INGREDIENT_WRITE = re.compile(
+    r'\s*(?:INSERT INTO|UPDATE|DELETE FROM) "?recipes_ingredientrecipe\b'
+)
+
+
+class FoodgramTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='reader',
+            email='reader@example.com',
+            first_name='Анна',
+            last_name='Иванова',
+            password='foodgram-test'
+        )
+        cls.authors = [
+            User.objects.create_user(
+                username=f'author{number}',
+                email=f'author{number}@example.com',
+                first_name='Иван',
+                last_name='Петров',
+                password='foodgram-test'
+            )
+            for number in range(3)
+        ]
+        cls.tags = [
+            Tag.objects.create(name=name, color=color, slug=slug)
+            for name, color, slug in (
+                ('Завтрак', '#E26C2D', 'breakfast'),
+                ('Обед', '#49B64E', 'lunch'),
+            )
+        ]
+        cls.ingredients = [
+            Ingredient.objects.create(
+                name=f'Ингредиент {number}', measurement_unit='г'
+            )
+            for number in range(3)
+        ]
+        cls.recipes = []
+        for number in range(max(PAGE_SIZES) + 5):
+            recipe = Recipe.objects.create(
+                author=cls.authors[number % len(cls.authors)],
+                name=f'Рецепт {number}',
+                text='Описание',
+                image='',
+                cooking_time=number + 1
+            )
+            recipe.tags.set(cls.tags[:number % len(cls.tags) + 1])
+            IngredientRecipe.objects.bulk_create(
+                IngredientRecipe(
+                    recipe=recipe, ingredient=ingredient, amount=number + 1
+                )
+                for ingredient in cls.ingredients
+            )
+            cls.recipes.append(recipe)
+        for recipe in cls.recipes[::2]:
+            Favorite.objects.create(user=cls.user, recipe=recipe)
+        for recipe in cls.recipes[::3]:
+            ShoppingCart.objects.create(user=cls.user, recipe=recipe)
+        Subscriptions.objects.create(user=cls.user, following=cls.authors[0])
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = APIClient()
+        self.reader_client = APIClient()
+        self.reader_client.force_authenticate(self.user)
+
+
+class RecipeListQueriesTest(FoodgramTestCase):
+    def get_list(self, client, limit):
+        response = client.get(RECIPES_URL, {'limit': limit})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['results']), limit)
+        return response
+
+    def assert_flat_queries(self, client):
+        for limit in PAGE_SIZES:
+            self.get_list(client, limit)
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            self.get_list(client, PAGE_SIZES[0])
+        for limit in PAGE_SIZES[1:]:
+            cache.clear()
+            with self.assertNumQueries(len(queries)):
+                self.get_list(client, limit)
+
+    def test_guest_list_queries_do_not_depend_on_page_size(self):
+        self.assert_flat_queries(self.guest_client)
+
+    def test_reader_list_queries_do_not_depend_on_page_size(self):
+        self.assert_flat_queries(self.reader_client)
+
+    def serialize(self, limit):
+        request = RequestFactory().get(RECIPES_URL)
+        request.user = self.user
+        data = RecipeSerializer(
+            Recipe.objects.with_related().select_related('author')[:limit],
+            many=True,
+            context={'request': request}
+        ).data
+        self.assertEqual(len(data), limit)
+
+    def test_serializer_queries_do_not_depend_on_page_size(self):
+        self.serialize(PAGE_SIZES[0])
+        with CaptureQueriesContext(connection) as queries:
+            self.serialize(PAGE_SIZES[0])
+        for limit in PAGE_SIZES[1:]:
+            with self.assertNumQueries(len(queries)):
+                self.serialize(limit)
+
+
+class RecipeNotModifiedTest(FoodgramTestCase):
+    def assert_not_modified(self, url):
+        response = self.reader_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        with mock.patch.object(
+            RecipeSerializer, 'to_representation'
+        ) as to_representation, mock.patch(
+            'api.recipes.views.render_recipe_list'
+        ) as render_recipe_list:
+            response = self.reader_client.get(
+                url, HTTP_IF_NONE_MATCH=response['ETag']
+            )
+        self.assertEqual(response.status_code, 304)
+        to_representation.assert_not_called()
+        render_recipe_list.assert_not_called()
+
+    def test_recipe_list_not_modified(self):
+        self.assert_not_modified(RECIPES_URL)
+
+    def test_recipe_detail_not_modified(self):
+        self.assert_not_modified(f'{RECIPES_URL}{self.recipes[0].id}/')
+
+
+class SubscriptionsQueriesTest(FoodgramTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        followed = User.objects.bulk_create(
+            User(
+                username=f'followed{number}',
+                email=f'followed{number}@example.com',
+                first_name='Мария',
+                last_name='Смирнова'
+            )
+            for number in range(100)
+        )
+        Recipe.objects.bulk_create(
+            Recipe(
+                author=author,
+                name=f'Рецепт {number}',
+                text='Описание',
+                image='',
+                cooking_time=number + 1
+            )
+            for author in followed
+            for number in range(3)
+        )
+        Subscriptions.objects.bulk_create(
+            Subscriptions(user=cls.user, following=author)
+            for author in reversed(followed)
+        )
+
+    def get_subscriptions(self, **params):
+        response = self.reader_client.get(
+            '/api/users/subscriptions/', {'recipes_limit': 2, **params}
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_queries_do_not_depend_on_followed_authors(self):
+        with CaptureQueriesContext(connection) as queries:
+            data = self.get_subscriptions(limit=5)
+        self.assertEqual(len(data['results']), 5)
+        with self.assertNumQueries(len(queries)):
+            data = self.get_subscriptions(limit=101)
+        self.assertEqual(len(data['results']), 101)
+        for author in data['results']:
+            self.assertLessEqual(len(author['recipes']), 2)
+
+    def test_cursor_follows_subscription_order(self):
+        expected = [
+            author['id'] for author in self.get_subscriptions(
+                limit=101
+            )['results']
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            data = self.get_subscriptions(limit=30, cursor='')
+        authors = [author['id'] for author in data['results']]
+        while data['next']:
+            with self.assertNumQueries(len(queries)):
+                data = self.reader_client.get(data['next']).json()
+            authors.extend(author['id'] for author in data['results'])
+        self.assertEqual(authors, expected)
+
+
+class RecipeSearchCursorTest(FoodgramTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        for number in range(7):
+            Recipe.objects.create(
+                author=cls.authors[0],
+                name='Борщ' if number % 2 else f'Суп {number}',
+                text=' '.join(['борщ'] * (number + 1)),
+                image='',
+                cooking_time=number + 1
+            )
+
+    def get_recipe_ids(self, data):
+        return [recipe['id'] for recipe in data['results']]
+
+    def test_cursor_keeps_search_rank_order(self):
+        expected = self.get_recipe_ids(self.guest_client.get(
+            RECIPES_URL, {'search': 'борщ', 'limit': 50}
+        ).json())
+        self.assertEqual(len(expected), 7)
+        data = self.guest_client.get(
+            RECIPES_URL, {'search': 'борщ', 'limit': 2, 'cursor': ''}
+        ).json()
+        recipe_ids = self.get_recipe_ids(data)
+        while data['next']:
+            data = self.guest_client.get(data['next']).json()
+            recipe_ids.extend(self.get_recipe_ids(data))
+        self.assertEqual(recipe_ids, expected)
+
+    def test_cursor_with_empty_search_query(self):
+        response = self.guest_client.get(
+            RECIPES_URL, {'search': '!!!', 'cursor': ''}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'], [])
+
+
+class CursorValidationTest(FoodgramTestCase):
+    def encode(self, values):
+        return urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+    def get_next_values(self):
+        data = self.guest_client.get(
+            RECIPES_URL, {'limit': 5, 'cursor': ''}
+        ).json()
+        cursor = parse_qs(urlparse(data['next']).query)['cursor'][0]
+        return json.loads(urlsafe_b64decode(cursor))
+
+    def test_valid_cursor(self):
+        response = self.guest_client.get(
+            RECIPES_URL,
+            {'limit': 5, 'cursor': self.encode(self.get_next_values())}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['results']), 5)
+
+    def test_malformed_cursors(self):
+        values = self.get_next_values()
+        cursors = [
+            'не курсор',
+            urlsafe_b64encode(b'{').decode(),
+            self.encode({'id': 1}),
+            self.encode(5),
+            self.encode(values[:-1]),
+            self.encode([None] * len(values)),
+            self.encode(values[:-1] + [None]),
+            self.encode(values[:-1] + [[1]]),
+            self.encode(values[:-1] + [10 ** 30]),
+        ]
+        for cursor in cursors:
+            with self.subTest(cursor=cursor):
+                response = self.guest_client.get(
+                    RECIPES_URL, {'cursor': cursor}
+                )
+                self.assertEqual(response.status_code, 404)
+
+
+class CartTotalsMixin:
+    def assert_cart_totals(self):
+        self.assertEqual(
+            set(ShoppingCartItem.objects.values_list(
+                'user', 'ingredient', 'total_amount'
+            )),
+            set(get_live_totals())
+        )
+
+
+class BulkRelationsTest(CartTotalsMixin, FoodgramTestCase):
+    def get_counters(self, counter):
+        return dict(Recipe.objects.values_list('id', counter))
+
+    def assert_bulk(self, url, method, ids, expected, counter, delta):
+        before = self.get_counters(counter)
+        response = getattr(self.reader_client, method)(
+            url, {'ids': ids}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json(),
+            [
+                {'id': recipe_id, 'status': status}
+                for recipe_id, status in zip(ids, expected)
+            ]
+        )
+        changed = {
+            recipe_id for recipe_id, status in zip(ids, expected)
+            if status in ('added', 'removed')
+        }
+        self.assertEqual(self.get_counters(counter), {
+            recipe_id: count + delta * (recipe_id in changed)
+            for recipe_id, count in before.items()
+        })
+
+    def test_bulk_favorite(self):
+        url = f'{RECIPES_URL}favorite/'
+        first, second, third = (
+            self.recipes[0].id, self.recipes[1].id, self.recipes[3].id
+        )
+        self.assert_bulk(
+            url, 'post', [second, first, 10 ** 6],
+            ['added', 'exists', 'not_found'], 'favorites_count', 1
+        )
+        self.assertTrue(Favorite.objects.filter(
+            user=self.user, recipe_id=second
+        ).exists())
+        self.assert_bulk(
+            url, 'delete', [first, second, third, 10 ** 6],
+            ['removed', 'removed', 'absent', 'absent'],
+            'favorites_count', -1
+        )
+        self.assertFalse(Favorite.objects.filter(
+            user=self.user, recipe_id__in=[first, second]
+        ).exists())
+
+    def test_bulk_shopping_cart(self):
+        url = f'{RECIPES_URL}shopping_cart/'
+        first, second, third = (recipe.id for recipe in self.recipes[:3])
+        self.assert_cart_totals()
+        self.assert_bulk(
+            url, 'post', [second, first, third, 10 ** 6],
+            ['added', 'exists', 'added', 'not_found'], 'carts_count', 1
+        )
+        self.assert_cart_totals()
+        self.assert_bulk(
+            url, 'delete', [first, third, 10 ** 6],
+            ['removed', 'removed', 'absent'], 'carts_count', -1
+        )
+        self.assert_cart_totals()
+        self.assertEqual(
+            set(ShoppingCart.objects.filter(
+                user=self.user, recipe_id__in=[first, second, third]
+            ).values_list('recipe_id', flat=True)),
+            {second}
+        )
+
+    def test_bulk_remove_sends_delete_signals(self):
+        deleted = []
+
+        def receiver(sender, instance, **kwargs):
+            deleted.append(instance.recipe_id)
+
+        post_delete.connect(receiver, sender=Favorite)
+        self.addCleanup(post_delete.disconnect, receiver, sender=Favorite)
+        ids = [recipe.id for recipe in self.recipes[:6:2]]
+        response = self.reader_client.delete(
+            f'{RECIPES_URL}favorite/', {'ids': ids}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sorted(deleted), sorted(ids))
+
+
+class ShoppingCartTotalsTest(CartTotalsMixin, FoodgramTestCase):
+    def setUp(self):
+        super().setUp()
+        self.recipe = self.recipes[0]
+        self.author_client = APIClient()
+        self.author_client.force_authenticate(self.recipe.author)
+        ShoppingCart.objects.create(user=self.authors[1], recipe=self.recipe)
+        self.assert_cart_totals()
+
+    def test_add_and_remove(self):
+        url = f'{RECIPES_URL}{self.recipes[1].id}/shopping_cart/'
+        self.assertEqual(self.reader_client.post(url).status_code, 201)
+        self.assert_cart_totals()
+        self.assertEqual(self.reader_client.delete(url).status_code, 204)
+        self.assert_cart_totals()
+
+    def test_recipe_edit(self):
+        extra = Ingredient.objects.create(
+            name='Новый ингредиент', measurement_unit='шт'
+        )
+        response = self.author_client.patch(
+            f'{RECIPES_URL}{self.recipe.id}/',
+            {
+                'ingredients': [
+                    {'id': self.ingredients[0].id, 'amount': 40},
+                    {'id': self.ingredients[1].id, 'amount': 1},
+                    {'id': extra.id, 'amount': 3},
+                ],
+            },
+            format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assert_cart_totals()
+        self.assertTrue(ShoppingCartItem.objects.filter(
+            user=self.user, ingredient=extra, total_amount=3
+        ).exists())
+
+    def test_recipe_delete(self):
+        response = self.author_client.delete(
+            f'{RECIPES_URL}{self.recipe.id}/'
+        )
+        self.assertEqual(response.status_code, 204)
+        self.assert_cart_totals()
+
+    def test_insert_adds_to_concurrently_created_row(self):
+        item = ShoppingCartItem.objects.get(
+            user=self.user, ingredient=self.ingredients[0]
+        )
+        ShoppingCartItem.objects.insert_amounts(
+            [(self.user.id, self.ingredients[0].id, 7)]
+        )
+        total = item.total_amount
+        item.refresh_from_db()
+        self.assertEqual(item.total_amount, total + 7)
+
+
+class SubscriptionCountersTest(FoodgramTestCase):
+    def get_counts(self, data):
+        return data['followers_count'], data['following_count']
+
+    def get_author_counts(self, author):
+        user = self.guest_client.get(f'/api/users/{author.id}/').json()
+        recipes = [
+            recipe['author']
+            for recipe in self.guest_client.get(
+                RECIPES_URL, {'limit': 50}
+            ).json()['results']
+            if recipe['author']['id'] == author.id
+        ]
+        detail = self.guest_client.get(
+            f'{RECIPES_URL}{author.recipes.first().id}/'
+        ).json()['author']
+        self.assertTrue(recipes)
+        for data in recipes + [detail]:
+            self.assertEqual(self.get_counts(data), self.get_counts(user))
+        return self.get_counts(user)
+
+    def test_subscribe_and_unsubscribe_change_counters(self):
+        author = self.authors[1]
+        url = f'/api/users/{author.id}/subscribe/'
+        self.assertEqual(self.get_author_counts(author), (0, 0))
+        self.assertEqual(
+            self.get_counts(self.guest_client.get(
+                f'/api/users/{self.user.id}/'
+            ).json()),
+            (0, 1)
+        )
+        response = self.reader_client.post(url)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.get_counts(response.json()), (1, 0))
+        self.assertEqual(self.get_author_counts(author), (1, 0))
+        self.assertEqual(
+            self.get_counts(self.guest_client.get(
+                f'/api/users/{self.user.id}/'
+            ).json()),
+            (0, 2)
+        )
+        subscriptions = self.reader_client.get(
+            '/api/users/subscriptions/'
+        ).json()['results']
+        self.assertEqual(
+            [self.get_counts(data) for data in subscriptions],
+            [(1, 0), (1, 0)]
+        )
+        self.assertEqual(self.reader_client.delete(url).status_code, 200)
+        self.assertEqual(self.get_author_counts(author), (0, 0))
+        self.assertEqual(
+            self.get_counts(self.guest_client.get(
+                f'/api/users/{self.user.id}/'
+            ).json()),
+            (0, 1)
+        )
+
+
+class RecipeIngredientsUpdateTest(CartTotalsMixin, FoodgramTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.pantry = [
+            Ingredient.objects.create(
+                name=f'Продукт {number}', measurement_unit='г'
+            )
+            for number in range(31)
+        ]
+        cls.small, cls.large = cls.recipes[0], cls.recipes[3]
+        IngredientRecipe.objects.filter(recipe=cls.large).delete()
+        IngredientRecipe.objects.bulk_create(
+            IngredientRecipe(recipe=cls.large, ingredient=ingredient, amount=5)
+            for ingredient in cls.pantry[:30]
+        )
+        ShoppingCartItem.objects.all().delete()
+        for user_id, ingredient_id, total in get_live_totals():
+            ShoppingCartItem.objects.create(
+                user_id=user_id, ingredient_id=ingredient_id,
+                total_amount=total
+            )
+
+    def setUp(self):
+        super().setUp()
+        self.author_client = APIClient()
+        self.author_client.force_authenticate(self.large.author)
+
+    def get_rows(self, recipe):
+        return {
+            ingredient_id: (pk, amount)
+            for pk, ingredient_id, amount in IngredientRecipe.objects.filter(
+                recipe=recipe
+            ).values_list('pk', 'ingredient_id', 'amount')
+        }
+
+    def edit(self, recipe, amounts, expected_queries=None):
+        capture = (
+            CaptureQueriesContext(connection) if expected_queries is None
+            else self.assertNumQueries(expected_queries)
+        )
+        with capture as queries:
+            response = self.author_client.patch(
+                f'{RECIPES_URL}{recipe.id}/',
+                {
+                    'ingredients': [
+                        {'id': ingredient_id, 'amount': amount}
+                        for ingredient_id, amount in amounts.items()
+                    ],
+                },
+                format='json'
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assert_cart_totals()
+        return [
+            query['sql'] for query in queries.captured_queries
+            if INGREDIENT_WRITE.match(query['sql'])
+        ], len(queries)
+
+    def change_one_amount(self, recipe, expected_queries=None):
+        rows = self.get_rows(recipe)
+        amounts = {
+            ingredient_id: amount
+            for ingredient_id, (_, amount) in rows.items()
+        }
+        changed = next(iter(amounts))
+        amounts[changed] += 1
+        writes, count = self.edit(recipe, amounts, expected_queries)
+        self.assertEqual(self.get_rows(recipe), {
+            ingredient_id: (pk, amounts[ingredient_id])
+            for ingredient_id, (pk, _) in rows.items()
+        })
+        self.assertEqual(len(writes), 1)
+        self.assertTrue(writes[0].startswith('UPDATE'))
+        return count
+
+    def test_one_amount_edit_does_not_depend_on_ingredient_count(self):
+        self.change_one_amount(self.small)
+        count = self.change_one_amount(self.small)
+        self.change_one_amount(self.large, count)
+
+    def test_same_ingredients_write_nothing(self):
+        rows = self.get_rows(self.large)
+        writes, _ = self.edit(self.large, {
+            ingredient_id: amount
+            for ingredient_id, (_, amount) in rows.items()
+        })
+        self.assertEqual(writes, [])
+        self.assertEqual(self.get_rows(self.large), rows)
+
+    def test_remove_and_add_ingredient(self):
+        rows = self.get_rows(self.large)
+        removed = self.pantry[0].id
+        added = self.pantry[30].id
+        amounts = {
+            ingredient_id: amount
+            for ingredient_id, (_, amount) in rows.items()
+            if ingredient_id != removed
+        }
+        amounts[added] = 4
+        self.edit(self.large, amounts)
+        updated = self.get_rows(self.large)
+        self.assertEqual(set(updated), set(amounts))
+        for ingredient_id, (pk, _) in rows.items():
+            if ingredient_id != removed:
+                self.assertEqual(updated[ingredient_id][0], pk)
+        items = dict(ShoppingCartItem.objects.filter(
+            user=self.user
+        ).values_list('ingredient', 'total_amount'))
+        self.assertNotIn(removed, items)
+        self.assertEqual(items[added], 4)
+
+
+class FeedTest(FoodgramTestCase):
+    def setUp(self):
+        super().setUp()
+        Subscriptions.objects.create(user=self.user, following=self.authors[1])
+        self.feed_key = get_feed_key(self.user.id)
+
+    def get_expected_ids(self):
+        return list(Recipe.objects.filter(
+            author__following__user=self.user
+        ).order_by(*FEED_ORDERING).values_list('id', flat=True))
+
+    def get_feed_ids(self, limit=4):
+        ids = []
+        page = 1
+        while True:
+            response = self.reader_client.get(
+                f'{RECIPES_URL}feed/', {'page': page, 'limit': limit}
+            )
+            self.assertEqual(response.status_code, 200)
+            data = response.json()
+            self.assertEqual(data['count'], len(self.get_expected_ids()))
+            ids += [recipe['id'] for recipe in data['results']]
+            if not data['next']:
+                return ids
+            page += 1
+
+    def assert_feed(self, limit=4):
+        self.assertEqual(self.get_feed_ids(limit), self.get_expected_ids())
+
+    def create_recipe(self, author):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Recipe.objects.create(
+                author=User.objects.get(pk=author.pk),
+                name='Новый рецепт',
+                text='Описание',
+                image='',
+                cooking_time=5
+            )
+
+    def test_push_feed(self):
+        self.assert_feed()
+        feed = cache.get(self.feed_key)
+        self.assertEqual(
+            feed['push'], {author.id for author in self.authors[:2]}
+        )
+        self.assertTrue(feed['complete'])
+
+    @override_settings(FEED_FANOUT_LIMIT=2)
+    def test_push_and_pull_merge(self):
+        Subscriptions.objects.create(
+            user=self.authors[2], following=self.authors[1]
+        )
+        self.assert_feed()
+        self.assertEqual(
+            cache.get(self.feed_key)['push'], {self.authors[0].id}
+        )
+        self.create_recipe(self.authors[1])
+        self.create_recipe(self.authors[0])
+        self.assert_feed()
+
+    @override_settings(FEED_LENGTH=5)
+    def test_truncated_feed_falls_back_to_timeline(self):
+        self.assert_feed(limit=3)
+        feed = cache.get(self.feed_key)
+        self.assertEqual(len(feed['entries']), 5)
+        self.assertFalse(feed['complete'])
+        self.create_recipe(self.authors[0])
+        self.assertEqual(len(cache.get(self.feed_key)['entries']), 5)
+        self.assert_feed(limit=3)
+
+    def test_created_recipe_is_pushed(self):
+        self.assert_feed()
+        recipe = self.create_recipe(self.authors[0])
+        self.create_recipe(self.authors[2])
+        self.assertEqual(cache.get(self.feed_key)['entries'][0][1], recipe.id)
+        self.assert_feed()
+
+    def test_deleted_recipe_is_removed(self):
+        self.assert_feed()
+        recipe = self.recipes[0]
+        recipe.delete()
+        self.assertNotIn(recipe.id, [
+            entry[1] for entry in cache.get(self.feed_key)['entries']
+        ])
+        self.assert_feed()
+
+    def test_subscription_invalidates_feed(self):
+        self.assert_feed()
+        Subscriptions.objects.create(user=self.user, following=self.authors[2])
+        self.assertIsNone(cache.get(self.feed_key))
+        self.assert_feed()
+        Subscriptions.objects.filter(
+            user=self.user, following=self.authors[0]
+        ).delete()
+        self.assertIsNone(cache.get(self.feed_key))
+        self.assert_feed()
+
+
+class FastJSONRendererTest(SimpleTestCase):
+    def test_matches_drf_renderer(self):
+        data = {
+            'aware': datetime(
+                2024, 3, 1, 12, 30, 15, 123456, tzinfo=timezone.utc
+            ),
+            'naive': datetime(2024, 3, 1, 12, 30, 15, 999999),
+            'whole': datetime(2024, 3, 1, 12, 30, tzinfo=timezone.utc),
+            'date': date(2024, 3, 1),
+            'time': time(12, 30, 15, 123456),
+            'uuid': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+            'decimal': Decimal('1.50'),
+            'text': 'Рецепт\u2028борща',
+            'items': [{'id': 1, 'created': datetime(2024, 3, 1)}],
+        }
+        if orjson is None:
+            self.skipTest('orjson не установлен')
+        self.assertEqual(
+            FastJSONRenderer().render(data), JSONRenderer().render(data)
+        )
+
+
+class RecipesByIngredientsTest(FoodgramTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.pantry = [
+            Ingredient.objects.create(
+                name=f'Запас {number}', measurement_unit='г'
+            )
+            for number in range(4)
+        ]
+        cls.matching = [
+            cls.create_recipe(cls.pantry[:2]),
+            cls.create_recipe(cls.pantry),
+            cls.create_recipe(cls.pantry[:1]),
+            cls.create_recipe([cls.pantry[0], cls.pantry[2]]),
+        ]
+
+    @classmethod
+    def create_recipe(cls, ingredients):
+        recipe = Recipe.objects.create(
+            author=cls.authors[1],
+            name='Из запасов',
+            text='Описание',
+            image='',
+            cooking_time=10
+        )
+        IngredientRecipe.objects.bulk_create(
+            IngredientRecipe(recipe=recipe, ingredient=ingredient, amount=1)
+            for ingredient in ingredients
+        )
+        return recipe
+
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch(
+            'api.recipes.views.recipe_ingredient_index',
+            RecipeIngredientIndex()
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def get_matches(self):
+        response = self.guest_client.get(
+            f'{RECIPES_URL}by_ingredients/',
+            {'have': f'{self.pantry[0].id},{self.pantry[1].id}'}
+        )
+        self.assertEqual(response.status_code, 200)
+        return [
+            (recipe['id'], recipe['matched_count'], recipe['missing_count'])
+            for recipe in response.json()['results']
+        ]
+
+    def test_ranks_by_matched_share(self):
+        first, second, third, fourth = self.matching
+        self.assertEqual(self.get_matches(), [
+            (first.id, 2, 0),
+            (third.id, 1, 0),
+            (second.id, 2, 2),
+            (fourth.id, 1, 1),
+        ])
+
+    def test_index_follows_created_and_deleted_recipes(self):
+        self.get_matches()
+        with self.captureOnCommitCallbacks(execute=True):
+            created = self.create_recipe(self.pantry[1:2])
+        self.assertEqual(self.get_matches()[:3], [
+            (self.matching[0].id, 2, 0),
+            (created.id, 1, 0),
+            (self.matching[2].id, 1, 0),
+        ])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.matching[0].delete()
+        self.assertNotIn(
+            self.matching[0].id,
+            [recipe_id for recipe_id, _, _ in self.get_matches()]
+        )
+        self.assertEqual(len(self.get_matches()), 4)
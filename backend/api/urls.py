@@ -2,6 +2,7 @@ from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
 from .ingredients.views import IngredientViewSet
+from .metrics import MetricsView
 from .recipes.views import RecipeViewSet
 from .tags.views import TagViewSet
 from .users.views import CustomUserViewSet
@@ -17,5 +18,6 @@ router_v1.register('users', CustomUserViewSet, basename='users')
 
 urlpatterns = [
     path('auth/', include('djoser.urls.authtoken')),
+    path('_metrics', MetricsView.as_view(), name='metrics'),
     path('', include(router_v1.urls)),
 ]
@@ -3,7 +3,9 @@ from djoser.serializers import UserCreateSerializer
 from rest_framework import serializers
 
 from recipes.models import Recipe
-from users.models import Subscriptions
+from ..fields import ImageVariantsField
+from ..plain import serialize_short_recipes
+from ..viewer import ViewerStateListSerializer, get_viewer_state
 
 User = get_user_model()
 
@@ -49,13 +51,20 @@ class CustomUserSerializer(serializers.ModelSerializer):
             'first_name',
             'last_name',
             'is_subscribed',
+            'followers_count',
+            'following_count',
         )
+        list_serializer_class = ViewerStateListSerializer
+
+    def load_viewer_state(self, users):
+        get_viewer_state(self.context['request']).load(author_ids=[
+            user.id for user in users if not hasattr(user, 'is_subscribed')
+        ])
 
     def get_is_subscribed(self, obj):
-        user = self.context['request'].user
-        if user.is_anonymous:
-            return False
-        return Subscriptions.objects.filter(user=user, following=obj).exists()
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
+        return get_viewer_state(self.context['request']).is_subscribed(obj.id)
 
 
 class CustomUserRecSerializer(CustomUserSerializer):
@@ -74,6 +83,8 @@ class CustomUserRecSerializer(CustomUserSerializer):
             'first_name',
             'last_name',
             'is_subscribed',
+            'followers_count',
+            'following_count',
             'recipes',
             'recipes_count',
         )
@@ -82,12 +93,14 @@ class CustomUserRecSerializer(CustomUserSerializer):
         request = self.context.get('request')
         if not (request and request.user.is_authenticated):
             return []
-        limit = request.GET.get('recipes_limit')
-        recipes = Recipe.objects.filter(author=obj)
-        if limit:
-            recipes = recipes[:int(limit)]
+        if not hasattr(obj, 'recipe_previews'):
+            limit = request.GET.get('recipes_limit', '')
+            recipes = Recipe.objects.filter(author=obj)
+            if limit.isdigit():
+                recipes = recipes[:int(limit)]
+            return serialize_short_recipes(recipes, request)
         serializer = RecipeShortSerializer(
-            recipes,
+            obj.recipe_previews,
             many=True,
             context={'request': request}
         )
@@ -95,12 +108,13 @@ class CustomUserRecSerializer(CustomUserSerializer):
 
     def get_recipes_count(self, obj):
         request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            return Recipe.objects.filter(author=obj).count()
-        return 0
+        if not (request and request.user.is_authenticated):
+            return 0
+        return obj.recipes_count
 
 
 class RecipeShortSerializer(serializers.ModelSerializer):
+    image_variants = ImageVariantsField()
 
     class Meta:
         model = Recipe
@@ -108,5 +122,6 @@ class RecipeShortSerializer(serializers.ModelSerializer):
             'id',
             'name',
             'image',
+            'image_variants',
             'cooking_time'
         )
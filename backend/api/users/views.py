@@ -1,4 +1,6 @@
 from django.contrib.auth import get_user_model
+from django.db.models import BooleanField, F, Prefetch, Value, Window
+from django.db.models.functions import RowNumber
 from django.shortcuts import get_object_or_404
 from djoser.views import UserViewSet
 from rest_framework import status
@@ -6,6 +8,7 @@ from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
+from recipes.models import Recipe
 from users.models import Subscriptions
 from .serializers import CustomUserRecSerializer
 
@@ -14,11 +17,48 @@ User = get_user_model()
 
 class CustomUserViewSet(UserViewSet):
 
+    @property
+    def cursor_ordering(self):
+        if self.action == 'subscriptions':
+            return ('-subscription_id',)
+        return ('-id',)
+
     def get_queryset(self):
         if self.action == 'subscriptions':
-            return User.objects.filter(following__user=self.request.user)
+            return User.objects.filter(
+                following__user=self.request.user
+            ).annotate(
+                is_subscribed=Value(True, output_field=BooleanField()),
+                subscription_id=F('following__id')
+            ).prefetch_related(
+                Prefetch(
+                    'recipes',
+                    queryset=self.get_recipe_previews(),
+                    to_attr='recipe_previews'
+                )
+            ).order_by(*self.cursor_ordering)
         return User.objects.all()
 
+    def get_recipe_previews(self):
+        recipes = Recipe.objects.only(
+            'id',
+            'name',
+            'image',
+            'image_variants',
+            'cooking_time',
+            'author_id'
+        )
+        limit = self.request.query_params.get('recipes_limit', '')
+        if not limit.isdigit():
+            return recipes
+        return recipes.annotate(
+            row_number=Window(
+                RowNumber(),
+                partition_by=F('author_id'),
+                order_by=(F('pub_date').desc(), F('id').desc())
+            )
+        ).filter(row_number__lte=int(limit))
+
     def get_serializer_class(self):
         if self.action == 'subscriptions':
             return CustomUserRecSerializer
@@ -53,6 +93,9 @@ class CustomUserViewSet(UserViewSet):
             user=user,
             following=following
         )
+        following.refresh_from_db(
+            fields=('followers_count', 'following_count')
+        )
         serializer = CustomUserRecSerializer(
             following,
             context={'request': request}
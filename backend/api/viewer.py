@@ -0,0 +1,116 @@
+from django.db import models
+from rest_framework import serializers
+
+from favorites.models import Favorite
+from shoppingcarts.models import ShoppingCart
+from users.models import Subscriptions
+from .relations import (FAVORITES, SHOPPING_CART, SUBSCRIPTIONS, contains,
+                        relation_cache)
+
+FAVORITED = 1
+IN_SHOPPING_CART = 2
+SUBSCRIBED = 3
+
+
+def get_state_query(user, recipe_ids, author_ids):
+    queries = []
+    if recipe_ids:
+        queries.extend(
+            model.objects.filter(
+                user=user, recipe_id__in=recipe_ids
+            ).values_list(
+                models.Value(kind, output_field=models.IntegerField()),
+                'recipe_id'
+            )
+            for kind, model in (
+                (FAVORITED, Favorite),
+                (IN_SHOPPING_CART, ShoppingCart),
+            )
+        )
+    if author_ids:
+        queries.append(Subscriptions.objects.filter(
+            user=user, following_id__in=author_ids
+        ).values_list(
+            models.Value(SUBSCRIBED, output_field=models.IntegerField()),
+            'following_id'
+        ))
+    return queries[0].union(*queries[1:], all=True)
+
+
+class ViewerState:
+    def __init__(self, user):
+        self.user = user
+        self.recipe_ids = set()
+        self.author_ids = set()
+        self.favorited = set()
+        self.in_shopping_cart = set()
+        self.subscribed = set()
+        self.relations = None
+
+    def load(self, recipe_ids=(), author_ids=()):
+        if not self.user.is_authenticated:
+            return
+        recipe_ids = set(recipe_ids) - self.recipe_ids
+        author_ids = set(author_ids) - self.author_ids
+        if not (recipe_ids or author_ids):
+            return
+        if relation_cache.enabled:
+            self.load_relations(recipe_ids, author_ids)
+            return
+        kinds = {
+            FAVORITED: self.favorited,
+            IN_SHOPPING_CART: self.in_shopping_cart,
+            SUBSCRIBED: self.subscribed,
+        }
+        for kind, pk in get_state_query(self.user, recipe_ids, author_ids):
+            kinds[kind].add(pk)
+        self.recipe_ids |= recipe_ids
+        self.author_ids |= author_ids
+
+    def load_relations(self, recipe_ids, author_ids):
+        if self.relations is None:
+            self.relations = relation_cache.get_many(self.user.id)
+        for ids, kind, loaded in (
+            (recipe_ids, FAVORITES, self.favorited),
+            (recipe_ids, SHOPPING_CART, self.in_shopping_cart),
+            (author_ids, SUBSCRIPTIONS, self.subscribed),
+        ):
+            loaded.update(
+                pk for pk in ids if contains(self.relations[kind], pk)
+            )
+        self.recipe_ids |= recipe_ids
+        self.author_ids |= author_ids
+
+    def load_recipes(self, recipes):
+        self.load(
+            [recipe.id for recipe in recipes],
+            [recipe.author_id for recipe in recipes]
+        )
+
+    def is_favorited(self, recipe_id):
+        self.load(recipe_ids=(recipe_id,))
+        return recipe_id in self.favorited
+
+    def is_in_shopping_cart(self, recipe_id):
+        self.load(recipe_ids=(recipe_id,))
+        return recipe_id in self.in_shopping_cart
+
+    def is_subscribed(self, author_id):
+        self.load(author_ids=(author_id,))
+        return author_id in self.subscribed
+
+
+def get_viewer_state(request):
+    state = getattr(request, 'viewer_state', None)
+    if state is None or state.user is not request.user:
+        state = request.viewer_state = ViewerState(request.user)
+    return state
+
+
+class ViewerStateListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        if isinstance(data, models.manager.BaseManager):
+            data = data.all()
+        data = list(data)
+        self.child.load_viewer_state(data)
+        return super().to_representation(data)
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.4 on 2026-10-18 12:10
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('favorites', '0004_favorite_recipe_user_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='favorite',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now, verbose_name='Дата добавления'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='favorite',
+            name='scored',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Учтено в рейтинге'),
+        ),
+        migrations.AddIndex(
+            model_name='favorite',
+            index=models.Index(condition=models.Q(('scored', False)), fields=['created_at'], name='favorite_unscored_idx'),
+        ),
+    ]
@@ -1,11 +1,17 @@
 from django.contrib.auth import get_user_model
 from django.db import models
 
-from recipes.models import Recipe
+from recipes.models import Recipe, RecipeRelationQuerySet
+from recipes.trending import FAVORITE_WEIGHT
 
 User = get_user_model()
 
 
+class FavoriteQuerySet(RecipeRelationQuerySet):
+    counter = 'favorites_count'
+    weight = FAVORITE_WEIGHT
+
+
 class Favorite(models.Model):
     user = models.ForeignKey(
         User,
@@ -19,6 +25,17 @@ class Favorite(models.Model):
         verbose_name='Рецепт',
         related_name='favorite_recipe'
     )
+    created_at = models.DateTimeField(
+        'Дата добавления',
+        auto_now_add=True
+    )
+    scored = models.BooleanField(
+        'Учтено в рейтинге',
+        default=False,
+        editable=False
+    )
+
+    objects = FavoriteQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'Рецепт в избранном'
@@ -30,6 +47,17 @@ class Favorite(models.Model):
                 name='unique_favorite'
             )
         ]
+        indexes = [
+            models.Index(
+                fields=['recipe', 'user'],
+                name='favorite_recipe_user_idx'
+            ),
+            models.Index(
+                fields=['created_at'],
+                condition=models.Q(scored=False),
+                name='favorite_unscored_idx'
+            ),
+        ]
 
     def __str__(self):
         return f'Рецепт "{self.recipe}" в избранном у {self.user}'
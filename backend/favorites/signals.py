@@ -0,0 +1,19 @@
+from django.db.models.signals import post_save, pre_delete
+from django.dispatch import receiver
+
+from recipes.models import Recipe
+from .models import Favorite, FavoriteQuerySet
+
+
+@receiver(post_save, sender=Favorite)
+def count_favorite(sender, instance, created, **kwargs):
+    if created:
+        Recipe.objects.filter(pk=instance.recipe_id).change_counter(
+            'favorites_count', 1
+        )
+
+
+@receiver(pre_delete, sender=Favorite)
+def release_favorite(sender, instance, origin=None, **kwargs):
+    if not isinstance(origin, FavoriteQuerySet):
+        Favorite.objects.release_instance(instance)
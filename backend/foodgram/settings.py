@@ -38,6 +38,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -78,6 +79,50 @@ DATABASES = {
     }
 }
 
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', default='foodgram'),
+    }
+}
+
+API_CACHE_TIMEOUT = int(os.getenv('API_CACHE_TIMEOUT', default=300))
+
+FEED_CACHE_TIMEOUT = int(os.getenv('FEED_CACHE_TIMEOUT', default=3600))
+
+FEED_FANOUT_LIMIT = int(os.getenv('FEED_FANOUT_LIMIT', default=1000))
+
+FEED_LENGTH = int(os.getenv('FEED_LENGTH', default=500))
+
+RELATION_CACHE_SIZE = int(os.getenv('RELATION_CACHE_SIZE', default=10000))
+
+RELATION_CACHE_SHARED = os.getenv(
+    'RELATION_CACHE_SHARED', default='False'
+) == 'True'
+
+RELATION_CACHE_TIMEOUT = int(
+    os.getenv('RELATION_CACHE_TIMEOUT', default=3600)
+)
+
+RECIPE_INDEX_SNAPSHOT = os.getenv(
+    'RECIPE_INDEX_SNAPSHOT', default=str(BASE_DIR / 'recipe_index.pickle')
+)
+
+IMAGE_VARIANT_WORKERS = int(os.getenv(
+    'IMAGE_VARIANT_WORKERS',
+    default=0 if DATABASES['default']['ENGINE'].endswith('sqlite3') else 2
+))
+
+METRICS_SAMPLE_RATE = float(os.getenv('METRICS_SAMPLE_RATE', default=0.01))
+
+METRICS_N_PLUS_ONE_THRESHOLD = int(
+    os.getenv('METRICS_N_PLUS_ONE_THRESHOLD', default=5)
+)
+
+TRENDING_HALF_LIFE_HOURS = float(
+    os.getenv('TRENDING_HALF_LIFE_HOURS', default=72)
+)
+
 
 AUTH_USER_MODEL = 'users.CustomUser'
 
@@ -117,6 +162,11 @@ REST_FRAMEWORK = {
     ],
 
     'DEFAULT_PAGINATION_CLASS': 'api.pagination.CustomPagination',
+
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
 }
 
 DJOSER = {
@@ -0,0 +1,59 @@
+# Generated by Django 4.2.4 on 2026-10-18 04:40
+
+from django.db import migrations, models
+
+
+def merge_duplicates(apps, schema_editor):
+    Ingredient = apps.get_model('ingredients', 'Ingredient')
+    IngredientRecipe = apps.get_model('recipes', 'IngredientRecipe')
+    ShoppingCartItem = apps.get_model('shoppingcarts', 'ShoppingCartItem')
+    duplicates = Ingredient.objects.values(
+        'name', 'measurement_unit'
+    ).annotate(
+        keep=models.Min('id'),
+        total=models.Count('id')
+    ).filter(total__gt=1).order_by()
+    for group in list(duplicates):
+        extra = Ingredient.objects.filter(
+            name=group['name'],
+            measurement_unit=group['measurement_unit']
+        ).exclude(id=group['keep'])
+        for item in IngredientRecipe.objects.filter(ingredient__in=extra):
+            kept = IngredientRecipe.objects.filter(
+                recipe_id=item.recipe_id,
+                ingredient_id=group['keep']
+            ).first()
+            if kept is None:
+                item.ingredient_id = group['keep']
+                item.save(update_fields=['ingredient'])
+            else:
+                kept.amount += item.amount
+                kept.save(update_fields=['amount'])
+                item.delete()
+        for item in ShoppingCartItem.objects.filter(ingredient__in=extra):
+            kept, _ = ShoppingCartItem.objects.get_or_create(
+                user_id=item.user_id,
+                ingredient_id=group['keep'],
+                defaults={'total_amount': 0}
+            )
+            kept.total_amount += item.total_amount
+            kept.save(update_fields=['total_amount'])
+            item.delete()
+        extra.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ingredients', '0001_initial'),
+        ('recipes', '0008_mediafile'),
+        ('shoppingcarts', '0004_shoppingcart_recipe_user_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='ingredient',
+            constraint=models.UniqueConstraint(fields=('name', 'measurement_unit'), name='unique_name_measurement_unit'),
+        ),
+    ]
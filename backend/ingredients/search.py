@@ -0,0 +1,77 @@
+import threading
+import time
+from bisect import bisect_left
+
+from .models import Ingredient
+
+SEARCH_LIMIT = 50
+INDEX_TTL = 300
+
+
+def normalize(value):
+    return value.casefold().replace('ё', 'е')
+
+
+class IngredientIndex:
+    def __init__(self, ttl=INDEX_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._snapshot = None
+        self._generation = 0
+
+    def invalidate(self):
+        with self._lock:
+            self._generation += 1
+            self._snapshot = None
+
+    def _get_fresh(self):
+        snapshot = self._snapshot
+        if snapshot is not None and time.monotonic() - snapshot[1] < self.ttl:
+            return snapshot[0]
+        return None
+
+    def _build(self):
+        ingredients = sorted(
+            Ingredient.objects.values(
+                'id', 'name', 'measurement_unit'
+            ).iterator(),
+            key=lambda item: (normalize(item['name']), item['id'])
+        )
+        return [normalize(item['name']) for item in ingredients], ingredients
+
+    def _get_data(self):
+        data = self._get_fresh()
+        if data is not None:
+            return data
+        with self._build_lock:
+            data = self._get_fresh()
+            if data is not None:
+                return data
+            with self._lock:
+                generation = self._generation
+            data = self._build()
+            with self._lock:
+                if self._generation == generation:
+                    self._snapshot = (data, time.monotonic())
+            return data
+
+    def search(self, query, limit=SEARCH_LIMIT):
+        query = normalize(query.strip())
+        keys, ingredients = self._get_data()
+        if not query:
+            return ingredients[:limit]
+        start = bisect_left(keys, query)
+        end = bisect_left(keys, query + '\uffff', lo=start)
+        result = ingredients[start:min(end, start + limit)]
+        if len(result) < limit:
+            for index, key in enumerate(keys):
+                if (start <= index < end) or query not in key:
+                    continue
+                result.append(ingredients[index])
+                if len(result) == limit:
+                    break
+        return result
+
+
+ingredient_index = IngredientIndex()
@@ -0,0 +1,63 @@
+from unittest import mock
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from .models import Ingredient
+from .search import IngredientIndex, ingredient_index
+
+
+class IngredientIndexTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for name in (
+            'фасоль', 'соль морская', 'масло', 'Соль', 'мёд', 'Медуница',
+            'ёлочные иглы'
+        ):
+            Ingredient.objects.create(name=name, measurement_unit='г')
+
+    def get_names(self, index, query):
+        return [item['name'] for item in index.search(query)]
+
+    def test_prefix_matches_come_before_substring_matches(self):
+        self.assertEqual(
+            self.get_names(IngredientIndex(), 'соль'),
+            ['Соль', 'соль морская', 'фасоль']
+        )
+
+    def test_yo_is_folded_to_ye(self):
+        index = IngredientIndex()
+        self.assertEqual(self.get_names(index, 'мед'), ['мёд', 'Медуница'])
+        self.assertEqual(self.get_names(index, 'МЁД'), ['мёд', 'Медуница'])
+        self.assertEqual(self.get_names(index, 'елоч'), ['ёлочные иглы'])
+
+    def test_endpoint_uses_index_order(self):
+        ingredient_index.invalidate()
+        response = APIClient().get('/api/ingredients/', {'name': 'соль'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [item['name'] for item in response.json()],
+            ['Соль', 'соль морская', 'фасоль']
+        )
+
+    def test_invalidation_during_rebuild_is_not_lost(self):
+        index = IngredientIndex()
+        build = index._build
+
+        def build_and_change():
+            data = build()
+            Ingredient.objects.create(
+                name='соль каменная', measurement_unit='г'
+            )
+            index.invalidate()
+            return data
+
+        with mock.patch.object(index, '_build', build_and_change):
+            self.assertEqual(
+                self.get_names(index, 'соль'),
+                ['Соль', 'соль морская', 'фасоль']
+            )
+        self.assertEqual(
+            self.get_names(index, 'соль'),
+            ['Соль', 'соль каменная', 'соль морская', 'фасоль']
+        )
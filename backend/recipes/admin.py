@@ -16,7 +16,8 @@ class RecipeAdmin(admin.ModelAdmin):
     list_display = (
         'name',
         'author',
-        'get_favorite_recipe_count'
+        'favorites_count',
+        'carts_count'
     )
     inlines = [IngredientInline]
     list_filter = (
@@ -28,10 +29,6 @@ class RecipeAdmin(admin.ModelAdmin):
         'tags',
     )
 
-    @admin.display(description='Добавлено в избранное')
-    def get_favorite_recipe_count(self, obj):
-        return obj.favorite_recipe.count()
-
 
 @admin.register(IngredientRecipe)
 class IngredientRecipeAdmin(admin.ModelAdmin):
@@ -0,0 +1,123 @@
+import logging
+import posixpath
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from PIL import Image, ImageOps
+
+from .storage import recipe_storage
+
+logger = logging.getLogger(__name__)
+
+VARIANT_WIDTHS = (320, 640, 1280)
+VARIANT_FORMATS = ('WEBP', 'AVIF')
+VARIANT_QUALITY = 80
+VARIANTS_DIR = 'recipes/images/variants/'
+
+executor = (
+    ThreadPoolExecutor(
+        max_workers=settings.IMAGE_VARIANT_WORKERS,
+        thread_name_prefix='recipe-images'
+    )
+    if settings.IMAGE_VARIANT_WORKERS else None
+)
+
+
+def get_variant_formats():
+    Image.init()
+    return [format for format in VARIANT_FORMATS if format in Image.SAVE]
+
+
+def get_variant_name(image_name, width, format):
+    stem = posixpath.splitext(posixpath.basename(image_name))[0]
+    return f'{VARIANTS_DIR}{stem}-{width}.{format.lower()}'
+
+
+def get_variant_names(image_name):
+    return [
+        get_variant_name(image_name, width, format)
+        for format in VARIANT_FORMATS
+        for width in VARIANT_WIDTHS
+    ]
+
+
+def render_variants(image_name):
+    with recipe_storage.open(image_name) as file:
+        content = file.read()
+    variants = {}
+    with Image.open(BytesIO(content)) as image:
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA')
+        for format in get_variant_formats():
+            for width in VARIANT_WIDTHS:
+                if width >= image.width:
+                    continue
+                name = get_variant_name(image_name, width, format)
+                if not default_storage.exists(name):
+                    resized = image.resize((
+                        width, round(image.height * width / image.width)
+                    ), Image.LANCZOS)
+                    buffer = BytesIO()
+                    resized.save(buffer, format, quality=VARIANT_QUALITY)
+                    default_storage.save(
+                        name, ContentFile(buffer.getvalue())
+                    )
+                variants.setdefault(format.lower(), {})[width] = name
+    return variants
+
+
+def build_image_variants(recipe_id, image_name):
+    from .models import Recipe
+
+    close_old_connections()
+    try:
+        variants = render_variants(image_name)
+        recipe = Recipe.objects.filter(pk=recipe_id, image=image_name).first()
+        if recipe is not None:
+            recipe.image_variants = {
+                'source': image_name,
+                'variants': variants
+            }
+            recipe.save(update_fields=('image_variants', 'updated_at'))
+    finally:
+        if executor is not None:
+            close_old_connections()
+
+
+def log_variant_failure(recipe_id, image_name):
+    logger.exception(
+        'Не удалось построить варианты изображения %s рецепта %s',
+        image_name, recipe_id
+    )
+
+
+def build_image_variants_inline(recipe_id, image_name):
+    try:
+        build_image_variants(recipe_id, image_name)
+    except Exception:
+        log_variant_failure(recipe_id, image_name)
+
+
+def submit_image_variants(recipe_id, image_name):
+    def report(future):
+        try:
+            future.result()
+        except Exception:
+            log_variant_failure(recipe_id, image_name)
+
+    executor.submit(
+        build_image_variants, recipe_id, image_name
+    ).add_done_callback(report)
+
+
+def schedule_image_variants(recipe_id, image_name):
+    build = (
+        build_image_variants_inline if executor is None
+        else submit_image_variants
+    )
+    transaction.on_commit(lambda: build(recipe_id, image_name))
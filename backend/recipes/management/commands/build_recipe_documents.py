@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from api.documents import BATCH_SIZE, build_documents
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = 'Сборка готовых JSON-документов рецептов для списка рецептов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Пересобрать все документы, а не только отсутствующие'
+        )
+
+    def handle(self, *args, **options):
+        recipes = Recipe.objects.order_by('id')
+        if not options['all']:
+            recipes = recipes.filter(document__isnull=True)
+        recipe_ids = list(recipes.values_list('id', flat=True))
+        for start in range(0, len(recipe_ids), BATCH_SIZE):
+            build_documents(recipe_ids[start:start + BATCH_SIZE])
+        self.stdout.write(self.style.SUCCESS(
+            f'Собрано документов: {len(recipe_ids)}'
+        ))
@@ -0,0 +1,21 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from recipes.matching import recipe_ingredient_index
+
+
+class Command(BaseCommand):
+    help = 'Пересборка индекса рецептов по ингредиентам и его снимка на диске'
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        recipe_ingredient_index.rebuild()
+        stats = recipe_ingredient_index.get_stats()
+        self.stdout.write(self.style.SUCCESS(
+            f'Рецептов: {stats["recipes"]}, '
+            f'ингредиентов: {stats["ingredients"]} '
+            f'(битовых карт: {stats["dense"]}), '
+            f'размер: {stats["bytes"] / 1024 / 1024:.1f} МБ, '
+            f'за {time.monotonic() - started:.1f} с'
+        ))
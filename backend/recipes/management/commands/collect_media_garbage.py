@@ -0,0 +1,127 @@
+import posixpath
+from datetime import timedelta
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from recipes.images import get_variant_names
+from recipes.models import MediaFile, Recipe
+from recipes.storage import recipe_storage
+
+
+class Command(BaseCommand):
+    help = 'Удаление изображений, на которые не ссылается ни один рецепт'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace',
+            type=int,
+            default=60,
+            help='Сколько минут файл без ссылок хранится до удаления'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Сколько файлов удалять за одну транзакцию'
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=None,
+            help='Максимальное число файлов за один запуск'
+        )
+        parser.add_argument(
+            '--include-untracked',
+            action='store_true',
+            help=(
+                'Сначала учесть файлы в хранилище без записи о ссылках, '
+                'чтобы неиспользуемые тоже были удалены'
+            )
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только показать файлы, которые будут удалены'
+        )
+
+    def handle(self, *args, **options):
+        self.verbosity = options['verbosity']
+        if options['include_untracked']:
+            registered = self.register_untracked(
+                options['batch_size'], options['dry_run']
+            )
+            if not options['dry_run']:
+                self.stdout.write(f'Учтено файлов без записи: {registered}')
+        before = timezone.now() - timedelta(minutes=options['grace'])
+        orphaned = MediaFile.objects.orphaned(before).order_by('changed_at')
+        if options['dry_run']:
+            for name in orphaned.values_list(
+                'name', flat=True
+            )[:options['limit']]:
+                self.stdout.write(name)
+            return
+        removed = 0
+        while options['limit'] is None or removed < options['limit']:
+            batch_size = options['batch_size']
+            if options['limit'] is not None:
+                batch_size = min(batch_size, options['limit'] - removed)
+            with transaction.atomic():
+                media_files = list(orphaned.select_for_update(
+                    skip_locked=True
+                )[:batch_size])
+                if not media_files:
+                    break
+                for media_file in media_files:
+                    self.remove(media_file.name)
+                MediaFile.objects.filter(
+                    pk__in=[media_file.pk for media_file in media_files]
+                ).delete()
+            removed += len(media_files)
+        self.stdout.write(self.style.SUCCESS(
+            f'Удалено файлов без ссылок: {removed}'
+        ))
+
+    def get_stored_names(self):
+        directory = Recipe._meta.get_field('image').upload_to
+        try:
+            _, files = recipe_storage.listdir(directory)
+        except FileNotFoundError:
+            return []
+        return sorted(posixpath.join(directory, name) for name in files)
+
+    def register_untracked(self, batch_size, dry_run):
+        names = self.get_stored_names()
+        registered = 0
+        for start in range(0, len(names), batch_size):
+            batch = names[start:start + batch_size]
+            tracked = set(MediaFile.objects.filter(
+                name__in=batch
+            ).values_list('name', flat=True))
+            untracked = [name for name in batch if name not in tracked]
+            registered += len(untracked)
+            if dry_run:
+                for name in untracked:
+                    self.stdout.write(name)
+                continue
+            references = dict(Recipe.objects.filter(
+                image__in=untracked
+            ).values_list('image').annotate(count=Count('id')).order_by())
+            MediaFile.objects.bulk_create(
+                (
+                    MediaFile(name=name, references=references.get(name, 0))
+                    for name in untracked
+                ),
+                ignore_conflicts=True
+            )
+        return registered
+
+    def remove(self, name):
+        recipe_storage.delete(name)
+        for variant in get_variant_names(name):
+            default_storage.delete(variant)
+        if self.verbosity > 1:
+            self.stdout.write(f'Удалён {name}')
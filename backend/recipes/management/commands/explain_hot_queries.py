@@ -0,0 +1,100 @@
+import re
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from api.viewer import get_state_query
+from favorites.models import Favorite
+from recipes.models import IngredientRecipe, Recipe
+from shoppingcarts.models import ShoppingCart, ShoppingCartItem
+from tags.models import Tag
+from users.models import Subscriptions
+
+User = get_user_model()
+
+HOT_TABLES = (
+    Recipe._meta.db_table,
+    IngredientRecipe._meta.db_table,
+    Favorite._meta.db_table,
+    ShoppingCart._meta.db_table,
+    ShoppingCartItem._meta.db_table,
+    Subscriptions._meta.db_table,
+    Recipe.tags.through._meta.db_table,
+)
+SEQUENTIAL_SCAN = {
+    'postgresql': re.compile(r'Seq Scan on (\w+)'),
+    'sqlite': re.compile(r'\bSCAN (\w+)(?: AS \w+)?\s*$', re.MULTILINE),
+}
+
+
+class Command(BaseCommand):
+    help = 'Проверка планов горячих запросов на полный просмотр таблиц'
+
+    def get_queries(self):
+        user = User.objects.filter(favorites__isnull=False).first()
+        recipe = Recipe.objects.filter(favorite_recipe__isnull=False).first()
+        tag = Tag.objects.first()
+        if not (user and recipe and tag):
+            raise CommandError(
+                'Нет данных для проверки, сначала заполните базу'
+            )
+        page = list(Recipe.objects.values_list('id', 'author_id')[:6])
+        page_ids = [recipe_id for recipe_id, _ in page]
+        return {
+            'Список рецептов': Recipe.objects.with_user_flags(user)[:6],
+            'Популярные рецепты': Recipe.objects.order_by(
+                '-favorites_count', '-carts_count', '-id'
+            )[:6],
+            'Рецепты в тренде': Recipe.objects.order_by('-score', '-id')[:6],
+            'Рецепты автора': Recipe.objects.filter(author=recipe.author)[:6],
+            'Рецепты по тегу': Recipe.objects.filter(tags__slug=tag.slug)[:6],
+            'Избранное пользователя': Recipe.objects.filter(
+                favorite_recipe__user=user
+            )[:6],
+            'Корзина пользователя': Recipe.objects.filter(
+                shopping_cart__user=user
+            )[:6],
+            'Избранное рецепта': Favorite.objects.filter(recipe=recipe),
+            'Корзины с рецептом': ShoppingCart.objects.filter(recipe=recipe),
+            'Ингредиенты страницы': IngredientRecipe.objects.filter(
+                recipe__in=page_ids
+            ),
+            'Состояние пользователя на странице': get_state_query(
+                user, page_ids, [author_id for _, author_id in page]
+            ),
+            'Подписки пользователя': User.objects.filter(
+                following__user=user
+            )[:6],
+            'Подписчики автора': Subscriptions.objects.filter(
+                following=recipe.author
+            ),
+            'Список покупок': ShoppingCartItem.objects.filter(user=user),
+        }
+
+    def handle(self, *args, **options):
+        pattern = SEQUENTIAL_SCAN.get(connection.vendor)
+        if pattern is None:
+            raise CommandError(
+                f'СУБД {connection.vendor} не поддерживается'
+            )
+        failures = []
+        for name, queryset in self.get_queries().items():
+            plan = queryset.explain()
+            scanned = sorted(
+                table for table in set(pattern.findall(plan))
+                if table in HOT_TABLES
+            )
+            if scanned:
+                failures.append(name)
+                self.stdout.write(self.style.ERROR(
+                    f'{name}: полный просмотр {", ".join(scanned)}'
+                ))
+            else:
+                self.stdout.write(f'{name}: OK')
+            if options['verbosity'] > 1 or scanned:
+                self.stdout.write(plan)
+        if failures:
+            raise CommandError(
+                f'Полный просмотр таблиц в запросах: {", ".join(failures)}'
+            )
@@ -1,34 +1,215 @@
 import csv
+import gzip
+import io
+import json
 import os
+import re
+import time
 
 from django.conf import settings
 from django.core.management.base import BaseCommand, CommandError
-from recipes.models import Ingredient
+from django.db import connection, transaction
 
-DATA_ROOT = os.path.join(settings.BASE_DIR)
+from api.cache import bump_versions
+from ingredients.models import Ingredient
+from ingredients.search import ingredient_index
+
+DATA_DIRS = (settings.BASE_DIR, settings.BASE_DIR.parent / 'data')
+FORMATS = ('csv', 'json')
+JSON_CHUNK_SIZE = 64 * 1024
+JSON_BUFFER_LIMIT = 1024 * 1024
+JSON_SEPARATOR = re.compile(r'\s*(?:,\s*)?')
+MAX_LENGTH = 200
+STAGING_TABLE = 'ingredients_ingredient_staging'
+
+
+def clean(value):
+    return ' '.join(str(value).split())
+
+
+def open_source(path):
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf8', newline='')
+    return open(path, encoding='utf8', newline='')
+
+
+def read_csv(file):
+    for row in csv.reader(file):
+        if row:
+            yield row
+
+
+def read_json(file):
+    decoder = json.JSONDecoder()
+    buffer = file.read(JSON_CHUNK_SIZE).lstrip()
+    if not buffer.startswith('['):
+        raise CommandError('Ожидался JSON-массив ингредиентов')
+    position = 1
+    while True:
+        position = JSON_SEPARATOR.match(buffer, position).end()
+        if buffer.startswith(']', position):
+            return
+        try:
+            item, position = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            chunk = file.read(JSON_CHUNK_SIZE)
+            if not chunk:
+                raise CommandError('Некорректный JSON с ингредиентами')
+            buffer = buffer[position:] + chunk
+            position = 0
+            if len(buffer) > JSON_BUFFER_LIMIT:
+                raise CommandError(
+                    'Некорректный JSON с ингредиентами: элемент длиннее '
+                    f'{JSON_BUFFER_LIMIT // 1024} КБ'
+                )
+            continue
+        if isinstance(item, dict):
+            yield (
+                item.get('name') or '', item.get('measurement_unit') or ''
+            )
+        else:
+            yield item
+
+
+class CSVStream:
+    def __init__(self, batches):
+        self.batches = batches
+        self.buffer = ''
+
+    def read(self, size=-1):
+        while size < 0 or len(self.buffer) < size:
+            batch = next(self.batches, None)
+            if batch is None:
+                break
+            output = io.StringIO()
+            csv.writer(output).writerows(batch)
+            self.buffer += output.getvalue()
+        if size < 0:
+            size = len(self.buffer)
+        data, self.buffer = self.buffer[:size], self.buffer[size:]
+        return data
 
 
 class Command(BaseCommand):
-    help = 'Загрузка данных из ingredients.csv'
+    help = 'Загрузка ингредиентов из CSV или JSON, в том числе сжатых gzip'
 
     def add_arguments(self, parser):
-        parser.add_argument('filename', default='ingredients.csv', nargs='?',
-                            type=str)
+        parser.add_argument(
+            'filename',
+            default='ingredients.csv',
+            nargs='?',
+            type=str
+        )
+        parser.add_argument(
+            '--format',
+            choices=FORMATS,
+            help='Формат файла, по умолчанию определяется по расширению'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Сколько ингредиентов загружать за один запрос'
+        )
 
     def handle(self, *args, **options):
-        try:
-            with open(
-                os.path.join(DATA_ROOT, options['filename']),
-                newline='',
-                encoding='utf8'
-            ) as csv_file:
-                data = csv.reader(csv_file)
-                Ingredient.objects.bulk_create(
-                    (Ingredient(
-                        name=row[0],
-                        measurement_unit=row[1])
-                        for row in data),
-                    batch_size=999
-                )
-        except FileNotFoundError:
-            raise CommandError('Файл ingredients.csv не найден')
+        path = self.get_path(options['filename'])
+        format = options['format'] or self.get_format(path)
+        self.read = self.skipped = 0
+        started = time.monotonic()
+        before = Ingredient.objects.count()
+        with open_source(path) as file:
+            rows = read_json(file) if format == 'json' else read_csv(file)
+            batches = self.get_batches(rows, options['batch_size'])
+            try:
+                if connection.vendor == 'postgresql':
+                    self.copy_batches(batches)
+                else:
+                    self.insert_batches(batches)
+            except (UnicodeDecodeError, csv.Error, OSError) as error:
+                raise CommandError(f'Не удалось прочитать {path}: {error}')
+        created = Ingredient.objects.count() - before
+        elapsed = time.monotonic() - started
+        ingredient_index.invalidate()
+        bump_versions('ingredients')
+        self.stdout.write(self.style.SUCCESS(
+            f'Прочитано строк: {self.read}, пропущено: {self.skipped}, '
+            f'добавлено ингредиентов: {created} '
+            f'за {elapsed:.1f} с ({self.read / (elapsed or 1):.0f} строк/с)'
+        ))
+
+    def get_path(self, filename):
+        for directory in ('',) + DATA_DIRS:
+            path = os.path.join(directory, filename)
+            if os.path.isfile(path):
+                return path
+        raise CommandError(f'Файл {filename} не найден')
+
+    def get_format(self, path):
+        name = path[:-len('.gz')] if path.endswith('.gz') else path
+        format = os.path.splitext(name)[1].lstrip('.').lower()
+        if format not in FORMATS:
+            raise CommandError(
+                f'Не удалось определить формат {path}, укажите --format'
+            )
+        return format
+
+    def get_batches(self, rows, batch_size):
+        batch = {}
+        for row in rows:
+            self.read += 1
+            if not isinstance(row, (list, tuple)):
+                self.skipped += 1
+                self.stderr.write(self.style.WARNING(
+                    f'Элемент {self.read} пропущен: ожидался объект '
+                    f'или массив, получено {type(row).__name__}'
+                ))
+                continue
+            if len(row) < 2:
+                self.skipped += 1
+                continue
+            name, measurement_unit = clean(row[0]), clean(row[1])
+            if not (
+                0 < len(name) <= MAX_LENGTH
+                and 0 < len(measurement_unit) <= MAX_LENGTH
+            ):
+                self.skipped += 1
+                continue
+            batch[name, measurement_unit] = None
+            if len(batch) >= batch_size:
+                yield list(batch)
+                batch = {}
+        if batch:
+            yield list(batch)
+
+    def insert_batches(self, batches):
+        for batch in batches:
+            Ingredient.objects.bulk_create(
+                (
+                    Ingredient(name=name, measurement_unit=measurement_unit)
+                    for name, measurement_unit in batch
+                ),
+                batch_size=len(batch),
+                ignore_conflicts=True
+            )
+
+    def copy_batches(self, batches):
+        table = connection.ops.quote_name(Ingredient._meta.db_table)
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE TEMPORARY TABLE {STAGING_TABLE} ('
+                f'name varchar({MAX_LENGTH}), '
+                f'measurement_unit varchar({MAX_LENGTH})'
+                f') ON COMMIT DROP'
+            )
+            cursor.copy_expert(
+                f'COPY {STAGING_TABLE} (name, measurement_unit) '
+                f'FROM STDIN WITH (FORMAT csv)',
+                CSVStream(batches)
+            )
+            cursor.execute(
+                f'INSERT INTO {table} (name, measurement_unit) '
+                f'SELECT DISTINCT name, measurement_unit '
+                f'FROM {STAGING_TABLE} '
+                f'ON CONFLICT (name, measurement_unit) DO NOTHING'
+            )
@@ -0,0 +1,69 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from favorites.models import Favorite
+from recipes.models import Recipe
+from shoppingcarts.models import ShoppingCart
+from users.models import Subscriptions
+
+User = get_user_model()
+
+COUNTERS = (
+    (Recipe, 'favorites_count', Favorite, 'recipe'),
+    (Recipe, 'carts_count', ShoppingCart, 'recipe'),
+    (User, 'recipes_count', Recipe, 'author'),
+    (User, 'followers_count', Subscriptions, 'following'),
+    (User, 'following_count', Subscriptions, 'user'),
+)
+BATCH_SIZE = 999
+
+
+def get_actual_count(related_model, field):
+    return Coalesce(
+        Subquery(
+            related_model.objects.filter(
+                **{field: OuterRef('pk')}
+            ).order_by().values(field).annotate(
+                total=Count('pk')
+            ).values('total')
+        ),
+        0
+    )
+
+
+class Command(BaseCommand):
+    help = 'Сверка и исправление денормализованных счётчиков'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Только проверить счётчики, не исправляя их'
+        )
+
+    def handle(self, *args, **options):
+        drifted_total = 0
+        for model, counter, related_model, field in COUNTERS:
+            drifted = model.objects.annotate(
+                actual=get_actual_count(related_model, field)
+            ).exclude(**{counter: F('actual')}).values_list('pk', 'actual')
+            fixed = [
+                model(pk=pk, **{counter: actual})
+                for pk, actual in drifted.iterator()
+            ]
+            drifted_total += len(fixed)
+            if fixed and not options['check']:
+                model.objects.bulk_update(
+                    fixed, [counter], batch_size=BATCH_SIZE
+                )
+            self.stdout.write(
+                f'{model._meta.verbose_name_plural}.{counter}: '
+                f'расхождений {len(fixed)}'
+            )
+        if options['check'] and drifted_total:
+            raise CommandError(
+                f'Найдено расхождений счётчиков: {drifted_total}'
+            )
+        self.stdout.write(self.style.SUCCESS('Счётчики согласованы'))
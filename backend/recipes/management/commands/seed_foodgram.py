@@ -0,0 +1,269 @@
+import random
+from bisect import bisect
+from io import BytesIO
+from itertools import accumulate
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import models, transaction
+from PIL import Image
+
+from api.cache import bump_versions
+from favorites.models import Favorite
+from ingredients.models import Ingredient
+from recipes.matching import mark_recipes_changed
+from recipes.models import IngredientRecipe, MediaFile, Recipe
+from recipes.search import update_search_index
+from recipes.storage import recipe_storage
+from shoppingcarts.models import ShoppingCart
+from tags.models import Tag
+from users.models import Subscriptions
+
+User = get_user_model()
+
+SEED_PREFIX = 'seed-'
+SEED_PASSWORD = 'foodgram-seed'
+BATCH_SIZE = 999
+DEFAULT_TAGS = (
+    ('Завтрак', '#E26C2D', 'breakfast'),
+    ('Обед', '#49B64E', 'lunch'),
+    ('Ужин', '#8775D2', 'dinner'),
+)
+FIRST_NAMES = (
+    'Анна', 'Иван', 'Мария', 'Пётр', 'Ольга', 'Сергей', 'Елена', 'Дмитрий'
+)
+LAST_NAMES = (
+    'Иванова', 'Петров', 'Смирнова', 'Кузнецов', 'Попова', 'Соколов'
+)
+DISHES = (
+    'Салат', 'Суп', 'Запеканка', 'Рагу', 'Пирог', 'Каша', 'Паста', 'Омлет'
+)
+AMOUNTS = (1, 2, 3, 5, 10, 50, 100, 150, 200, 250, 500)
+
+
+class ZipfSampler:
+    def __init__(self, items, exponent, rng):
+        self.items = list(items)
+        rng.shuffle(self.items)
+        self.cum_weights = list(accumulate(
+            1 / rank ** exponent for rank in range(1, len(self.items) + 1)
+        ))
+        self.rng = rng
+
+    def sample(self):
+        position = bisect(
+            self.cum_weights, self.rng.random() * self.cum_weights[-1]
+        )
+        return self.items[min(position, len(self.items) - 1)]
+
+    def sample_unique(self, count):
+        count = min(count, len(self.items))
+        sampled = {}
+        while len(sampled) < count:
+            sampled[self.sample()] = None
+        return list(sampled)
+
+
+class Command(BaseCommand):
+    help = 'Генерация синтетических пользователей, рецептов и связей'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--recipes', type=int, default=5000)
+        parser.add_argument('--favorites', type=int, default=20000)
+        parser.add_argument('--carts', type=int, default=5000)
+        parser.add_argument('--subscriptions', type=int, default=5000)
+        parser.add_argument(
+            '--feed-users',
+            type=int,
+            default=0,
+            help='Сколько пользователей подписать на --feed-following авторов'
+        )
+        parser.add_argument('--feed-following', type=int, default=1000)
+        parser.add_argument(
+            '--zipf',
+            type=float,
+            default=1.1,
+            help='Показатель распределения Ципфа для популярности'
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Начальное значение генератора случайных чисел'
+        )
+        parser.add_argument(
+            '--clear',
+            action='store_true',
+            help='Удалить ранее сгенерированные данные'
+        )
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.exponent = options['zipf']
+        seeded = User.objects.filter(username__startswith=SEED_PREFIX)
+        if options['clear']:
+            seeded.delete()
+        elif seeded.exists():
+            raise CommandError(
+                'Синтетические данные уже есть, используйте --clear'
+            )
+        ingredients = list(
+            Ingredient.objects.order_by('id').values_list('id', 'name')
+        )
+        if not ingredients:
+            raise CommandError(
+                'Нет ингредиентов, сначала выполните load_ingredients'
+            )
+        with transaction.atomic():
+            tags = self.get_tags()
+            users = self.create_users(options['users'])
+            recipes = self.create_recipes(
+                options['recipes'], users, tags, ingredients
+            )
+            self.create_pairs(
+                Favorite, 'user', 'recipe', options['favorites'],
+                users, recipes
+            )
+            self.create_pairs(
+                ShoppingCart, 'user', 'recipe', options['carts'],
+                users, recipes
+            )
+            self.create_pairs(
+                Subscriptions, 'user', 'following', options['subscriptions'],
+                users, users
+            )
+            self.create_feed_readers(
+                options['feed_users'], options['feed_following'], users
+            )
+            for start in range(0, len(recipes), BATCH_SIZE):
+                update_search_index(recipes[start:start + BATCH_SIZE])
+            call_command('rebuild_shopping_cart_items', stdout=self.stdout)
+            call_command('reconcile_counters', stdout=self.stdout)
+            call_command('update_trending_scores', stdout=self.stdout)
+        bump_versions('recipes', 'tags', 'ingredients')
+        mark_recipes_changed()
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано пользователей: {len(users)}, рецептов: {len(recipes)}. '
+            f'Пароль пользователей: {SEED_PASSWORD}'
+        ))
+
+    def get_tags(self):
+        if not Tag.objects.exists():
+            Tag.objects.bulk_create(
+                Tag(name=name, color=color, slug=slug)
+                for name, color, slug in DEFAULT_TAGS
+            )
+        return list(Tag.objects.order_by('id').values_list('id', flat=True))
+
+    def create_users(self, count, prefix=SEED_PREFIX):
+        password = make_password(SEED_PASSWORD)
+        users = User.objects.bulk_create(
+            (
+                User(
+                    username=f'{prefix}{number}',
+                    email=f'{prefix}{number}@example.com',
+                    first_name=self.rng.choice(FIRST_NAMES),
+                    last_name=self.rng.choice(LAST_NAMES),
+                    password=password
+                )
+                for number in range(count)
+            ),
+            batch_size=BATCH_SIZE
+        )
+        return [user.id for user in users]
+
+    def create_feed_readers(self, count, following, authors):
+        if not (count and authors):
+            return
+        readers = self.create_users(count, f'{SEED_PREFIX}feed-')
+        Subscriptions.objects.bulk_create(
+            (
+                Subscriptions(user_id=reader_id, following_id=author_id)
+                for reader_id in readers
+                for author_id in self.rng.sample(
+                    authors, min(following, len(authors))
+                )
+            ),
+            batch_size=BATCH_SIZE
+        )
+
+    def get_image(self):
+        buffer = BytesIO()
+        Image.new('RGB', (640, 480), '#E26C2D').save(buffer, 'PNG')
+        return recipe_storage.save(
+            'recipes/images/seed.png', ContentFile(buffer.getvalue())
+        )
+
+    def create_recipes(self, count, users, tags, ingredients):
+        if not users:
+            return []
+        image = self.get_image()
+        authors = ZipfSampler(users, self.exponent, self.rng)
+        popular = ZipfSampler(ingredients, self.exponent, self.rng)
+        recipes = []
+        contents = []
+        for number in range(count):
+            items = popular.sample_unique(self.rng.randint(3, 12))
+            recipes.append(Recipe(
+                author_id=authors.sample(),
+                name=f'{self.rng.choice(DISHES)} «{items[0][1]}» №{number}',
+                text='Понадобится: ' + ', '.join(name for _, name in items),
+                image=image,
+                cooking_time=max(1, min(
+                    480, round(self.rng.lognormvariate(3.3, 0.6))
+                ))
+            ))
+            contents.append((
+                self.rng.sample(tags, self.rng.randint(1, min(3, len(tags)))),
+                items
+            ))
+        recipes = Recipe.objects.bulk_create(recipes, batch_size=BATCH_SIZE)
+        MediaFile.objects.get_or_create(name=image)
+        MediaFile.objects.filter(name=image).update(
+            references=models.F('references') + len(recipes)
+        )
+        Recipe.tags.through.objects.bulk_create(
+            (
+                Recipe.tags.through(recipe_id=recipe.id, tag_id=tag_id)
+                for recipe, (recipe_tags, _) in zip(recipes, contents)
+                for tag_id in recipe_tags
+            ),
+            batch_size=BATCH_SIZE
+        )
+        IngredientRecipe.objects.bulk_create(
+            (
+                IngredientRecipe(
+                    recipe_id=recipe.id,
+                    ingredient_id=ingredient_id,
+                    amount=self.rng.choice(AMOUNTS)
+                )
+                for recipe, (_, items) in zip(recipes, contents)
+                for ingredient_id, _ in items
+            ),
+            batch_size=BATCH_SIZE
+        )
+        return [recipe.id for recipe in recipes]
+
+    def create_pairs(self, model, left, right, count, left_ids, right_ids):
+        if not (left_ids and right_ids):
+            return
+        actors = ZipfSampler(left_ids, self.exponent, self.rng)
+        targets = ZipfSampler(right_ids, self.exponent, self.rng)
+        pairs = {}
+        attempts = count * 3
+        while len(pairs) < count and attempts:
+            attempts -= 1
+            pair = actors.sample(), targets.sample()
+            if left_ids is not right_ids or pair[0] != pair[1]:
+                pairs[pair] = None
+        model.objects.bulk_create(
+            (
+                model(**{f'{left}_id': left_id, f'{right}_id': right_id})
+                for left_id, right_id in pairs
+            ),
+            batch_size=BATCH_SIZE
+        )
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from api.cache import bump_versions
+from favorites.models import Favorite
+from recipes.models import Recipe
+from recipes.trending import (CART_WEIGHT, FAVORITE_WEIGHT, get_score_epoch,
+                              rebase_trending_scores, score_new_events)
+from shoppingcarts.models import ShoppingCart
+
+
+class Command(BaseCommand):
+    help = 'Учёт новых добавлений в избранное и корзину в рейтинге рецептов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rebuild',
+            action='store_true',
+            help='Пересчитать рейтинг всех рецептов с нуля'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Сколько событий обрабатывать за одну транзакцию'
+        )
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            with transaction.atomic():
+                Recipe.objects.update(score=0, score_epoch=get_score_epoch())
+                Favorite.objects.update(scored=False)
+                ShoppingCart.objects.update(scored=False)
+        rebased = rebase_trending_scores(timezone.now())
+        scored = score_new_events(
+            Favorite, FAVORITE_WEIGHT, options['batch_size']
+        ) + score_new_events(
+            ShoppingCart, CART_WEIGHT, options['batch_size']
+        )
+        if scored or rebased:
+            bump_versions('recipes')
+        self.stdout.write(self.style.SUCCESS(
+            f'Учтено событий в рейтинге: {scored}'
+        ))
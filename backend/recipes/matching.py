@@ -0,0 +1,346 @@
+import os
+import pickle
+import threading
+from array import array
+from bisect import bisect_left, insort
+from datetime import timedelta
+from itertools import groupby, islice
+
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+
+from api.cache import bump_versions, get_versions
+from .models import IngredientRecipe, Recipe
+
+CHANGED_SCOPE = 'recipe_ingredients'
+DELETED_SCOPE = 'recipe_ingredients:deleted'
+SNAPSHOT_FORMAT = 1
+SYNC_MARGIN = timedelta(minutes=1)
+BUCKET_BITS = 16
+BATCH_SIZE = 1000
+RESNAPSHOT_CHANGES = 1000
+
+
+def to_bitset(ids):
+    ids = list(ids)
+    if not ids:
+        return 0
+    data = bytearray(max(ids) // 8 + 1)
+    for pk in ids:
+        data[pk >> 3] |= 1 << (pk & 7)
+    return int.from_bytes(data, 'little')
+
+
+def iter_bits(bitset):
+    while bitset:
+        position = bitset.bit_length() - 1
+        yield position
+        bitset ^= 1 << position
+
+
+def count_bits(bitset):
+    return bin(bitset).count('1')
+
+
+def clear_bits(bitset, mask):
+    return (bitset | mask) ^ mask
+
+
+def mark_recipes_changed():
+    bump_versions(CHANGED_SCOPE)
+
+
+def mark_recipes_deleted():
+    bump_versions(DELETED_SCOPE)
+
+
+class IngredientMatch:
+    def __init__(self, postings, alive, size_sets):
+        self.planes = []
+        for posting in postings:
+            carry = posting if isinstance(posting, int) else to_bitset(
+                posting
+            )
+            for position, plane in enumerate(self.planes):
+                self.planes[position] = plane ^ carry
+                carry &= plane
+                if not carry:
+                    break
+            if carry:
+                self.planes.append(carry)
+        self.candidates = 0
+        for plane in self.planes:
+            self.candidates |= plane
+        self.candidates &= alive
+        self.size_sets = size_sets
+        max_matched = min(len(postings), (1 << len(self.planes)) - 1)
+        self.groups = sorted(
+            (
+                (matched, size)
+                for size in size_sets
+                for matched in range(1, min(size, max_matched) + 1)
+            ),
+            key=lambda group: (group[0] / group[1], group[0]),
+            reverse=True
+        )
+        self.exact = {}
+
+    def count(self):
+        return count_bits(self.candidates)
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        skip, limit = index.start or 0, index.stop - (index.start or 0)
+        results = []
+        for matched, size in self.groups:
+            if len(results) >= limit:
+                break
+            bitset = self.get_exact(matched) & self.size_sets[size]
+            count = count_bits(bitset)
+            if count <= skip:
+                skip -= count
+                continue
+            for recipe_id in islice(iter_bits(bitset), skip, None):
+                results.append((recipe_id, matched, size))
+                if len(results) >= limit:
+                    break
+            skip = 0
+        return results
+
+    def get_exact(self, matched):
+        if matched not in self.exact:
+            bitset = self.candidates
+            for position, plane in enumerate(self.planes):
+                bitset &= plane if matched >> position & 1 else ~plane
+            self.exact[matched] = bitset
+        return self.exact[matched]
+
+
+class RecipeIngredientIndex:
+    def __init__(self, path=None):
+        self.path = path
+        self._lock = threading.Lock()
+        self.postings = None
+        self.versions = (None, None)
+
+    def match(self, ingredient_ids):
+        with self._lock:
+            self._sync()
+            postings = [
+                self.postings[ingredient_id]
+                for ingredient_id in set(ingredient_ids)
+                if ingredient_id in self.postings
+            ]
+            return IngredientMatch(postings, self.alive, self.size_sets)
+
+    def rebuild(self):
+        with self._lock:
+            self.versions = get_versions(CHANGED_SCOPE, DELETED_SCOPE)
+            self._build()
+            self.save()
+
+    def save(self):
+        if not self.path:
+            return
+        temp_path = f'{self.path}.{os.getpid()}.tmp'
+        with open(temp_path, 'wb') as file:
+            pickle.dump(
+                {
+                    'format': SNAPSHOT_FORMAT,
+                    'synced_at': self.synced_at,
+                    'postings': self.postings,
+                    'sizes': self.sizes,
+                    'size_sets': self.size_sets,
+                    'alive': self.alive,
+                },
+                file,
+                protocol=pickle.HIGHEST_PROTOCOL
+            )
+        os.replace(temp_path, self.path)
+        self.unsaved_changes = 0
+
+    def get_stats(self):
+        with self._lock:
+            self._sync()
+            dense = [
+                posting for posting in self.postings.values()
+                if isinstance(posting, int)
+            ]
+            return {
+                'recipes': count_bits(self.alive),
+                'ingredients': len(self.postings),
+                'dense': len(dense),
+                'bytes': sum(
+                    (posting.bit_length() + 7) // 8 for posting in dense
+                ) + sum(
+                    len(posting) * posting.itemsize
+                    for posting in self.postings.values()
+                    if not isinstance(posting, int)
+                ) + len(self.sizes) * self.sizes.itemsize + sum(
+                    (bitset.bit_length() + 7) // 8
+                    for bitset in self.size_sets.values()
+                ),
+            }
+
+    def _load(self):
+        if not (self.path and os.path.isfile(self.path)):
+            return False
+        try:
+            with open(self.path, 'rb') as file:
+                snapshot = pickle.load(file)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return False
+        if snapshot.get('format') != SNAPSHOT_FORMAT:
+            return False
+        self.synced_at = snapshot['synced_at']
+        self.postings = snapshot['postings']
+        self.sizes = snapshot['sizes']
+        self.size_sets = snapshot['size_sets']
+        self.alive = snapshot['alive']
+        self.unsaved_changes = 0
+        return True
+
+    def _build(self):
+        synced_at = timezone.now()
+        max_id = Recipe.objects.aggregate(max_id=models.Max('id'))['max_id']
+        rows = IngredientRecipe.objects.order_by(
+            'ingredient_id', 'recipe_id'
+        ).values_list('ingredient_id', 'recipe_id').iterator(
+            chunk_size=10000
+        )
+        self._index_rows(
+            rows,
+            Recipe.objects.values_list('id', flat=True).iterator(
+                chunk_size=10000
+            ),
+            max_id or 0
+        )
+        self.synced_at = synced_at
+
+    def _index_rows(self, rows, recipe_ids, max_id):
+        self.postings = {}
+        self.sizes = array('H', bytes(2 * (max_id + 1)))
+        for ingredient_id, group in groupby(rows, key=lambda row: row[0]):
+            ids = array('I', (recipe_id for _, recipe_id in group))
+            for recipe_id in ids:
+                self.sizes[recipe_id] += 1
+            self.postings[ingredient_id] = (
+                to_bitset(ids) if len(ids) * 32 > max_id else ids
+            )
+        by_size = {}
+        for recipe_id, size in enumerate(self.sizes):
+            if size:
+                by_size.setdefault(size, []).append(recipe_id)
+        self.size_sets = {
+            size: to_bitset(ids) for size, ids in by_size.items()
+        }
+        self.alive = to_bitset(recipe_ids)
+        self.unsaved_changes = 0
+
+    def _sync(self):
+        versions = get_versions(CHANGED_SCOPE, DELETED_SCOPE)
+        if self.postings is None:
+            if not self._load():
+                self._build()
+                self.save()
+        if versions == self.versions:
+            return
+        synced_at = timezone.now()
+        if versions[0] != self.versions[0]:
+            self._update(Recipe.objects.filter(
+                updated_at__gte=self.synced_at - SYNC_MARGIN
+            ).values_list('id', flat=True))
+        if versions[1] != self.versions[1]:
+            self._remove_deleted()
+        self.synced_at = synced_at
+        self.versions = versions
+        if self.unsaved_changes >= RESNAPSHOT_CHANGES:
+            self.save()
+
+    def _remove_deleted(self):
+        bucket_size = 1 << BUCKET_BITS
+        counts = dict(Recipe.objects.annotate(
+            bucket=models.F('id') / bucket_size
+        ).values_list('bucket').annotate(count=models.Count('id')))
+        bucket_mask = (1 << bucket_size) - 1
+        stale = []
+        for bucket in range(self.alive.bit_length() // bucket_size + 1):
+            bits = self.alive >> (bucket * bucket_size) & bucket_mask
+            if count_bits(bits) == counts.get(bucket, 0):
+                continue
+            existing = set(Recipe.objects.filter(
+                id__gte=bucket * bucket_size,
+                id__lt=(bucket + 1) * bucket_size
+            ).values_list('id', flat=True))
+            stale.extend(
+                recipe_id for recipe_id in (
+                    position + bucket * bucket_size
+                    for position in iter_bits(bits)
+                )
+                if recipe_id not in existing
+            )
+        self._update(stale)
+
+    def _update(self, recipe_ids):
+        recipe_ids = sorted(set(recipe_ids))
+        for start in range(0, len(recipe_ids), BATCH_SIZE):
+            self._update_batch(recipe_ids[start:start + BATCH_SIZE])
+        self.unsaved_changes += len(recipe_ids)
+
+    def _update_batch(self, recipe_ids):
+        mask = to_bitset(recipe_ids)
+        existing = Recipe.objects.filter(
+            pk__in=recipe_ids
+        ).values_list('id', flat=True)
+        rows = IngredientRecipe.objects.filter(
+            recipe_id__in=recipe_ids
+        ).order_by('ingredient_id', 'recipe_id').values_list(
+            'ingredient_id', 'recipe_id'
+        )
+        self.alive = clear_bits(self.alive, mask) | to_bitset(existing)
+        for ingredient_id, posting in self.postings.items():
+            if isinstance(posting, int):
+                self.postings[ingredient_id] = clear_bits(posting, mask)
+                continue
+            for recipe_id in recipe_ids:
+                position = bisect_left(posting, recipe_id)
+                if position < len(posting) and posting[position] == recipe_id:
+                    del posting[position]
+        self.size_sets = {
+            size: clear_bits(bitset, mask)
+            for size, bitset in self.size_sets.items()
+        }
+        if recipe_ids[-1] >= len(self.sizes):
+            self.sizes.frombytes(
+                bytes(2 * (recipe_ids[-1] + 1 - len(self.sizes)))
+            )
+        for recipe_id in recipe_ids:
+            self.sizes[recipe_id] = 0
+        for ingredient_id, group in groupby(rows, key=lambda row: row[0]):
+            ids = [recipe_id for _, recipe_id in group]
+            for recipe_id in ids:
+                self.sizes[recipe_id] += 1
+            posting = self.postings.setdefault(ingredient_id, array('I'))
+            if isinstance(posting, int):
+                self.postings[ingredient_id] = posting | to_bitset(ids)
+                continue
+            for recipe_id in ids:
+                insort(posting, recipe_id)
+        by_size = {}
+        for recipe_id in recipe_ids:
+            if self.sizes[recipe_id]:
+                by_size.setdefault(self.sizes[recipe_id], []).append(
+                    recipe_id
+                )
+        for size, ids in by_size.items():
+            self.size_sets[size] = self.size_sets.get(size, 0) | to_bitset(
+                ids
+            )
+
+
+recipe_ingredient_index = RecipeIngredientIndex(
+    settings.RECIPE_INDEX_SNAPSHOT
+)
@@ -0,0 +1,77 @@
+# Generated by Django 4.2.4 on 2026-10-18 01:35
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+FTS_TABLE = 'recipes_recipe_fts'
+
+
+def fold_yo(column):
+    return f"replace(replace({column}, 'ё', 'е'), 'Ё', 'Е')"
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            'CREATE INDEX recipes_recipe_search_vector_gin '
+            'ON recipes_recipe USING gin (search_vector)'
+        )
+        schema_editor.execute('''
+            UPDATE recipes_recipe AS recipe SET search_vector =
+                setweight(to_tsvector('russian', recipe.name), 'A')
+                || setweight(to_tsvector('russian', recipe.text), 'B')
+                || setweight(to_tsvector('russian', coalesce((
+                    SELECT string_agg(ingredient.name, ' ')
+                    FROM recipes_ingredientrecipe AS item
+                    JOIN ingredients_ingredient AS ingredient
+                        ON ingredient.id = item.ingredient_id
+                    WHERE item.recipe_id = recipe.id
+                ), '')), 'C')
+        ''')
+    elif schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(
+            f'CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5('
+            'name, text, ingredients, '
+            "tokenize = 'unicode61 remove_diacritics 2')"
+        )
+        schema_editor.execute(f'''
+            INSERT INTO {FTS_TABLE} (rowid, name, text, ingredients)
+            SELECT id, {fold_yo('name')}, {fold_yo('text')},
+                {fold_yo('ingredients')}
+            FROM (
+                SELECT recipe.id, recipe.name, recipe.text, (
+                    SELECT group_concat(ingredient.name, ' ')
+                    FROM recipes_ingredientrecipe AS item
+                    JOIN ingredients_ingredient AS ingredient
+                        ON ingredient.id = item.ingredient_id
+                    WHERE item.recipe_id = recipe.id
+                ) AS ingredients
+                FROM recipes_recipe AS recipe
+            )
+        ''')
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            'DROP INDEX IF EXISTS recipes_recipe_search_vector_gin'
+        )
+    elif schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ingredients', '0001_initial'),
+        ('recipes', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True, verbose_name='Поисковый вектор'),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
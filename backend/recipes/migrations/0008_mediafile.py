@@ -0,0 +1,51 @@
+# Generated by Django 4.2.4 on 2026-10-18 04:05
+
+from django.db import migrations, models
+import django.utils.timezone
+import recipes.storage
+
+
+def count_references(apps, schema_editor):
+    Recipe = apps.get_model('recipes', 'Recipe')
+    MediaFile = apps.get_model('recipes', 'MediaFile')
+    MediaFile.objects.bulk_create(
+        (
+            MediaFile(name=item['image'], references=item['references'])
+            for item in Recipe.objects.exclude(image='').values(
+                'image'
+            ).annotate(
+                references=models.Count('id')
+            ).order_by().iterator()
+        ),
+        batch_size=999
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0007_recipe_image_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaFile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True, verbose_name='Путь к файлу')),
+                ('references', models.PositiveIntegerField(default=0, verbose_name='Число ссылок')),
+                ('changed_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Дата изменения')),
+            ],
+            options={
+                'verbose_name': 'Медиафайл',
+                'verbose_name_plural': 'Медиафайлы',
+                'indexes': [models.Index(condition=models.Q(('references', 0)), fields=['changed_at'], name='mediafile_orphaned_idx')],
+            },
+        ),
+        migrations.AlterField(
+            model_name='recipe',
+            name='image',
+            field=models.ImageField(storage=recipes.storage.ContentAddressedStorage(), upload_to='recipes/images/', verbose_name='Изображение'),
+        ),
+        migrations.RunPython(count_references, migrations.RunPython.noop),
+    ]
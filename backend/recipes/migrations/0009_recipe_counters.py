@@ -0,0 +1,50 @@
+# Generated by Django 4.2.4 on 2026-10-18 05:20
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def get_actual_count(related_model, field):
+    return Coalesce(
+        models.Subquery(
+            related_model.objects.filter(
+                **{field: models.OuterRef('pk')}
+            ).order_by().values(field).annotate(
+                total=models.Count('pk')
+            ).values('total')
+        ),
+        0
+    )
+
+
+def fill_counters(apps, schema_editor):
+    Recipe = apps.get_model('recipes', 'Recipe')
+    Favorite = apps.get_model('favorites', 'Favorite')
+    ShoppingCart = apps.get_model('shoppingcarts', 'ShoppingCart')
+    Recipe.objects.update(
+        favorites_count=get_actual_count(Favorite, 'recipe'),
+        carts_count=get_actual_count(ShoppingCart, 'recipe')
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('favorites', '0004_favorite_recipe_user_idx'),
+        ('shoppingcarts', '0004_shoppingcart_recipe_user_idx'),
+        ('recipes', '0008_mediafile'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='carts_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Добавлений в список покупок'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='favorites_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Добавлений в избранное'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
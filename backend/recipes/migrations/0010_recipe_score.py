@@ -0,0 +1,32 @@
+# Generated by Django 4.2.4 on 2026-10-18 12:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0009_recipe_counters'),
+        ('favorites', '0005_favorite_created_at_scored'),
+        ('shoppingcarts', '0005_shoppingcart_created_at_scored'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='score',
+            field=models.FloatField(default=0, editable=False, verbose_name='Рейтинг популярности'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['-favorites_count', '-carts_count', '-id'], name='recipe_popular_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['-score', '-id'], name='recipe_score_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['cooking_time', '-id'], name='recipe_cooking_time_idx'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 4.2.4 on 2026-10-18 18:40
+
+import datetime
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0011_recipedocument'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='score_epoch',
+            field=models.DateTimeField(default=datetime.datetime(2023, 1, 1, 0, 0, tzinfo=datetime.timezone.utc), editable=False, verbose_name='Точка отсчёта рейтинга'),
+        ),
+    ]
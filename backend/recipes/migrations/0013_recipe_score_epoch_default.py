@@ -0,0 +1,19 @@
+# Generated by Django 4.2.4 on 2026-10-18 03:00
+
+from django.db import migrations, models
+import recipes.trending
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0012_recipe_score_epoch'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='recipe',
+            name='score_epoch',
+            field=models.DateTimeField(default=recipes.trending.get_score_epoch, editable=False, verbose_name='Точка отсчёта рейтинга'),
+        ),
+    ]
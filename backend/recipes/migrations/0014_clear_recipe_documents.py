@@ -0,0 +1,18 @@
+# Generated by Django 4.2.4 on 2026-10-18 03:20
+
+from django.db import migrations
+
+
+def clear_documents(apps, schema_editor):
+    apps.get_model('recipes', 'RecipeDocument').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0013_recipe_score_epoch_default'),
+    ]
+
+    operations = [
+        migrations.RunPython(clear_documents, migrations.RunPython.noop),
+    ]
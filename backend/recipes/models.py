@@ -1,9 +1,98 @@
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MinValueValidator
-from django.db import models
+from django.db import models, transaction
+from django.db.models.functions import Greatest
+from django.utils import timezone
 
 from ingredients.models import Ingredient
 from tags.models import Tag
-from users.models import CustomUser
+from users.models import CustomUser, Subscriptions
+from .storage import recipe_storage
+from .trending import get_score_epoch, unscore_events
+
+
+class RecipeQuerySet(models.QuerySet):
+    def change_counter(self, field, delta):
+        return self.update(**{
+            field: Greatest(models.F(field) + delta, 0),
+            'updated_at': timezone.now()
+        })
+
+    def change_counters(self, field, deltas):
+        by_delta = {}
+        for pk, delta in deltas.items():
+            by_delta.setdefault(delta, []).append(pk)
+        for delta, pks in by_delta.items():
+            self.filter(pk__in=pks).change_counter(field, delta)
+
+    def with_related(self):
+        return self.prefetch_related(
+            'tags',
+            models.Prefetch(
+                'ingredientrecipes',
+                queryset=IngredientRecipe.objects.select_related('ingredient')
+            )
+        )
+
+    def annotate_user_flags(self, user):
+        from favorites.models import Favorite
+        from shoppingcarts.models import ShoppingCart
+        return self.annotate(
+            is_favorited=models.Exists(Favorite.objects.filter(
+                user=user, recipe=models.OuterRef('pk')
+            )),
+            is_in_shopping_cart=models.Exists(ShoppingCart.objects.filter(
+                user=user, recipe=models.OuterRef('pk')
+            ))
+        )
+
+    def with_user_flags(self, user):
+        if not user.is_authenticated:
+            return self.select_related('author')
+        return self.annotate_user_flags(user).prefetch_related(
+            models.Prefetch(
+                'author',
+                queryset=CustomUser.objects.annotate(
+                    is_subscribed=models.Exists(Subscriptions.objects.filter(
+                        user=user, following=models.OuterRef('pk')
+                    ))
+                )
+            )
+        )
+
+
+class RecipeRelationQuerySet(models.QuerySet):
+    counter = None
+    weight = None
+
+    def release(self, events):
+        deltas = {}
+        for _, recipe_id, _, _ in events:
+            deltas[recipe_id] = deltas.get(recipe_id, 0) - 1
+        Recipe.objects.change_counters(self.counter, deltas)
+        unscore_events(
+            [
+                (recipe_id, created_at)
+                for _, recipe_id, created_at, scored in events if scored
+            ],
+            self.weight
+        )
+
+    def release_instance(self, instance):
+        scored = self.filter(pk=instance.pk, scored=True).update(scored=False)
+        self.release([
+            (instance.user_id, instance.recipe_id, instance.created_at, scored)
+        ])
+
+    def delete(self):
+        with transaction.atomic():
+            self.release(list(self.select_for_update().values_list(
+                'user_id', 'recipe_id', 'created_at', 'scored'
+            )))
+            return super().delete()
+
+    delete.alters_data = True
+    delete.queryset_only = True
 
 
 class Recipe(models.Model):
@@ -29,6 +118,7 @@ class Recipe(models.Model):
     image = models.ImageField(
         'Изображение',
         upload_to='recipes/images/',
+        storage=recipe_storage,
     )
     tags = models.ManyToManyField(
         Tag,
@@ -46,11 +136,69 @@ class Recipe(models.Model):
         'Дата публикации',
         auto_now_add=True
     )
+    updated_at = models.DateTimeField(
+        'Дата изменения',
+        auto_now=True
+    )
+    favorites_count = models.PositiveIntegerField(
+        'Добавлений в избранное',
+        default=0,
+        editable=False
+    )
+    carts_count = models.PositiveIntegerField(
+        'Добавлений в список покупок',
+        default=0,
+        editable=False
+    )
+    score = models.FloatField(
+        'Рейтинг популярности',
+        default=0,
+        editable=False
+    )
+    score_epoch = models.DateTimeField(
+        'Точка отсчёта рейтинга',
+        default=get_score_epoch,
+        editable=False
+    )
+    image_variants = models.JSONField(
+        'Варианты изображения',
+        default=dict,
+        editable=False
+    )
+    search_vector = SearchVectorField(
+        'Поисковый вектор',
+        null=True,
+        editable=False
+    )
+
+    objects = RecipeQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
         ordering = ['-pub_date']
+        indexes = [
+            models.Index(
+                fields=['-pub_date', '-id'],
+                name='recipe_pub_date_id_idx'
+            ),
+            models.Index(
+                fields=['author', '-pub_date'],
+                name='recipe_author_pub_date_idx'
+            ),
+            models.Index(
+                fields=['-favorites_count', '-carts_count', '-id'],
+                name='recipe_popular_idx'
+            ),
+            models.Index(
+                fields=['-score', '-id'],
+                name='recipe_score_idx'
+            ),
+            models.Index(
+                fields=['cooking_time', '-id'],
+                name='recipe_cooking_time_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -86,9 +234,91 @@ class IngredientRecipe(models.Model):
                 name='unique_ingredient_recipe'
             )
         ]
+        indexes = [
+            models.Index(
+                fields=['recipe', 'ingredient'],
+                name='ingredientrecipe_recipe_idx'
+            ),
+        ]
 
     def __str__(self):
         return (
             f'{self.ingredient.name} ({self.ingredient.measurement_unit})'
             f' - {self.amount} '
         )
+
+
+class MediaFileQuerySet(models.QuerySet):
+    def touch(self, name):
+        return self.filter(name=name).update(changed_at=timezone.now())
+
+    def acquire(self, name):
+        media_file, created = self.get_or_create(
+            name=name,
+            defaults={'references': 1}
+        )
+        if not created:
+            self.filter(pk=media_file.pk).update(
+                references=models.F('references') + 1,
+                changed_at=timezone.now()
+            )
+
+    def release(self, name):
+        self.filter(name=name, references__gt=0).update(
+            references=models.F('references') - 1,
+            changed_at=timezone.now()
+        )
+
+    def orphaned(self, before):
+        return self.filter(references=0, changed_at__lte=before)
+
+
+class MediaFile(models.Model):
+    name = models.CharField(
+        'Путь к файлу',
+        max_length=255,
+        unique=True
+    )
+    references = models.PositiveIntegerField(
+        'Число ссылок',
+        default=0
+    )
+    changed_at = models.DateTimeField(
+        'Дата изменения',
+        default=timezone.now
+    )
+
+    objects = MediaFileQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'Медиафайл'
+        verbose_name_plural = 'Медиафайлы'
+        indexes = [
+            models.Index(
+                fields=['changed_at'],
+                condition=models.Q(references=0),
+                name='mediafile_orphaned_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return self.name
+
+
+class RecipeDocument(models.Model):
+    recipe = models.OneToOneField(
+        Recipe,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='document',
+        verbose_name='Рецепт'
+    )
+    body = models.BinaryField('JSON рецепта')
+    built_at = models.DateTimeField('Дата сборки', auto_now=True)
+
+    class Meta:
+        verbose_name = 'Документ рецепта'
+        verbose_name_plural = 'Документы рецептов'
+
+    def __str__(self):
+        return str(self.recipe_id)
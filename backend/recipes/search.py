@@ -0,0 +1,110 @@
+import re
+
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            SearchVector)
+from django.db import connection
+from django.db.models import F, FloatField, OuterRef, Subquery, Value
+from django.db.models.expressions import RawSQL
+
+from .models import IngredientRecipe, Recipe
+
+SEARCH_CONFIG = 'russian'
+FTS_TABLE = 'recipes_recipe_fts'
+SEARCH_ORDERING = ('-rank', '-pub_date', '-id')
+
+INGREDIENT_NAMES_SQL = """(
+    SELECT group_concat(ingredient.name, ' ')
+    FROM recipes_ingredientrecipe AS item
+    JOIN ingredients_ingredient AS ingredient
+        ON ingredient.id = item.ingredient_id
+    WHERE item.recipe_id = recipe.id
+)"""
+
+
+def fold_yo_sql(column):
+    return f"replace(replace({column}, 'ё', 'е'), 'Ё', 'Е')"
+
+
+FTS_DELETE_SQL = f'DELETE FROM {FTS_TABLE} WHERE rowid IN ({{}})'
+FTS_INSERT_SQL = f"""
+    INSERT INTO {FTS_TABLE} (rowid, name, text, ingredients)
+    SELECT
+        recipe.id,
+        {fold_yo_sql('recipe.name')},
+        {fold_yo_sql('recipe.text')},
+        {fold_yo_sql(INGREDIENT_NAMES_SQL)}
+    FROM recipes_recipe AS recipe
+    WHERE recipe.id IN ({{}})
+"""
+FTS_RANK_SQL = (
+    f'SELECT -rank FROM {FTS_TABLE} '
+    f'WHERE {FTS_TABLE} MATCH %s AND rowid = recipes_recipe.id'
+)
+FTS_MATCH_SQL = f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s'
+
+
+def is_postgresql():
+    return connection.vendor == 'postgresql'
+
+
+def update_search_index(recipe_ids):
+    recipe_ids = list(recipe_ids)
+    if not recipe_ids:
+        return
+    if is_postgresql():
+        ingredient_names = IngredientRecipe.objects.filter(
+            recipe=OuterRef('pk')
+        ).values('recipe').annotate(
+            names=StringAgg('ingredient__name', ' ')
+        ).values('names')
+        Recipe.objects.filter(pk__in=recipe_ids).update(
+            search_vector=(
+                SearchVector('name', weight='A', config=SEARCH_CONFIG)
+                + SearchVector('text', weight='B', config=SEARCH_CONFIG)
+                + SearchVector(
+                    Subquery(ingredient_names),
+                    weight='C',
+                    config=SEARCH_CONFIG
+                )
+            )
+        )
+        return
+    placeholders = ', '.join(['%s'] * len(recipe_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(FTS_DELETE_SQL.format(placeholders), recipe_ids)
+        cursor.execute(FTS_INSERT_SQL.format(placeholders), recipe_ids)
+
+
+def remove_from_search_index(recipe_ids):
+    recipe_ids = list(recipe_ids)
+    if not recipe_ids or is_postgresql():
+        return
+    placeholders = ', '.join(['%s'] * len(recipe_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(FTS_DELETE_SQL.format(placeholders), recipe_ids)
+
+
+def get_fts_query(value):
+    words = re.findall(r'\w+', value.replace('ё', 'е').replace('Ё', 'Е'))
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def search_recipes(queryset, value):
+    if is_postgresql():
+        query = SearchQuery(
+            value, config=SEARCH_CONFIG, search_type='websearch'
+        )
+        return queryset.filter(search_vector=query).annotate(
+            rank=SearchRank(F('search_vector'), query)
+        ).order_by(*SEARCH_ORDERING)
+    query = get_fts_query(value)
+    if not query:
+        return queryset.none().annotate(
+            rank=Value(0, output_field=FloatField())
+        )
+    return queryset.filter(
+        id__in=RawSQL(FTS_MATCH_SQL, [query])
+    ).annotate(
+        rank=RawSQL(FTS_RANK_SQL, [query], output_field=FloatField())
+    ).order_by(*SEARCH_ORDERING)
@@ -0,0 +1,92 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from ingredients.models import Ingredient
+from users.models import change_user_counter
+from .images import schedule_image_variants
+from .matching import mark_recipes_changed, mark_recipes_deleted
+from .models import IngredientRecipe, MediaFile, Recipe
+from .search import remove_from_search_index, update_search_index
+
+
+@receiver(post_save, sender=Recipe)
+def index_recipe(sender, instance, **kwargs):
+    update_search_index([instance.pk])
+
+
+@receiver(post_save, sender=Recipe)
+def build_recipe_image_variants(sender, instance, **kwargs):
+    if instance.image and (
+        instance.image_variants.get('source') != instance.image.name
+    ):
+        schedule_image_variants(instance.pk, instance.image.name)
+
+
+@receiver(post_save, sender=Recipe)
+def count_author_recipe(sender, instance, created, **kwargs):
+    if created:
+        change_user_counter([instance.author_id], 'recipes_count', 1)
+
+
+@receiver(post_delete, sender=Recipe)
+def uncount_author_recipe(sender, instance, **kwargs):
+    change_user_counter([instance.author_id], 'recipes_count', -1)
+
+
+@receiver(post_delete, sender=Recipe)
+def unindex_recipe(sender, instance, **kwargs):
+    remove_from_search_index([instance.pk])
+
+
+@receiver(post_save, sender=IngredientRecipe)
+@receiver(post_delete, sender=IngredientRecipe)
+def index_recipe_ingredients(sender, instance, **kwargs):
+    update_search_index([instance.recipe_id])
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_save, sender=IngredientRecipe)
+@receiver(post_delete, sender=IngredientRecipe)
+def reindex_recipe_ingredients(sender, **kwargs):
+    transaction.on_commit(mark_recipes_changed)
+
+
+@receiver(post_delete, sender=Recipe)
+def unindex_recipe_ingredients(sender, **kwargs):
+    transaction.on_commit(mark_recipes_deleted)
+
+
+@receiver(post_save, sender=Ingredient)
+def index_ingredient_recipes(sender, instance, created, **kwargs):
+    if not created:
+        update_search_index(
+            instance.ingredientrecipes.values_list('recipe_id', flat=True)
+        )
+
+
+@receiver(post_init, sender=Recipe)
+def remember_recipe_image(sender, instance, **kwargs):
+    if instance.pk is None:
+        instance._stored_image = ''
+    elif 'image' in instance.__dict__:
+        instance._stored_image = instance.image.name or ''
+
+
+@receiver(post_save, sender=Recipe)
+def count_recipe_image(sender, instance, **kwargs):
+    if not hasattr(instance, '_stored_image'):
+        return
+    name = instance.image.name or ''
+    if name != instance._stored_image:
+        if name:
+            MediaFile.objects.acquire(name)
+        if instance._stored_image:
+            MediaFile.objects.release(instance._stored_image)
+        instance._stored_image = name
+
+
+@receiver(post_delete, sender=Recipe)
+def release_recipe_image(sender, instance, **kwargs):
+    if getattr(instance, '_stored_image', ''):
+        MediaFile.objects.release(instance._stored_image)
@@ -0,0 +1,40 @@
+import posixpath
+from hashlib import sha256
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+
+def get_content_hash(content):
+    digest = sha256()
+    for chunk in content.chunks():
+        digest.update(chunk)
+    content.seek(0)
+    return digest.hexdigest()
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    def save(self, name, content, max_length=None):
+        from .models import MediaFile
+
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        directory, filename = posixpath.split(name)
+        name = posixpath.join(
+            directory,
+            get_content_hash(content) + posixpath.splitext(filename)[1].lower()
+        )
+        touched = MediaFile.objects.touch(name)
+        if not self.exists(name):
+            name = super().save(name, content, max_length)
+            touched = False
+        if not touched:
+            MediaFile.objects.get_or_create(name=name)
+        return name
+
+
+recipe_storage = ContentAddressedStorage()
@@ -0,0 +1,192 @@
+import gzip
+import json
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from favorites.models import Favorite
+from ingredients.models import Ingredient
+from . import images
+from .management.commands import load_ingredients
+from .models import Recipe
+from .trending import (FAVORITE_WEIGHT, get_half_life, get_score_epoch,
+                       score_new_events)
+
+User = get_user_model()
+
+INGREDIENTS = [
+    ('абрикосовое варенье', 'г'),
+    ('вода', 'мл'),
+    ('соль', 'г'),
+    ('соль', 'щепотка'),
+]
+
+
+class ImageVariantFailureTest(TestCase):
+    def assert_failure_logged(self):
+        with mock.patch.object(
+            images, 'render_variants', side_effect=OSError('битый файл')
+        ), mock.patch.object(
+            images, 'close_old_connections'
+        ), self.assertLogs('recipes.images', 'ERROR') as logs:
+            with self.captureOnCommitCallbacks(execute=True):
+                images.schedule_image_variants(1, 'recipes/images/a.png')
+            if images.executor is not None:
+                images.executor.shutdown(wait=True)
+        self.assertIn('recipes/images/a.png', logs.output[0])
+        self.assertIn('битый файл', logs.output[0])
+
+    def test_inline_failure_is_logged(self):
+        with mock.patch.object(images, 'executor', None):
+            self.assert_failure_logged()
+
+    def test_worker_failure_is_logged(self):
+        with mock.patch.object(images, 'executor', ThreadPoolExecutor(1)):
+            self.assert_failure_logged()
+
+
+class LoadIngredientsTest(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def write(self, name, content):
+        path = os.path.join(self.directory, name)
+        opener = gzip.open if name.endswith('.gz') else open
+        with opener(path, 'wt', encoding='utf8', newline='') as file:
+            file.write(content)
+        return path
+
+    def write_json(self, name):
+        items = [
+            {'name': ingredient, 'measurement_unit': unit}
+            for ingredient, unit in INGREDIENTS
+        ]
+        return self.write(name, json.dumps(
+            items + items[:1] + [['  соль ', 'г'], 5, {'name': None}],
+            ensure_ascii=False,
+            indent=2
+        ))
+
+    def write_csv(self, name):
+        return self.write(name, ''.join(
+            f'{ingredient},{unit}\n'
+            for ingredient, unit in INGREDIENTS + [('вода', '')]
+        ))
+
+    def load(self, path, **options):
+        call_command(
+            'load_ingredients', path, stdout=StringIO(), stderr=StringIO(),
+            **options
+        )
+
+    def assert_loaded(self, path, **options):
+        for _ in range(2):
+            self.load(path, **options)
+            self.assertEqual(
+                sorted(Ingredient.objects.values_list(
+                    'name', 'measurement_unit'
+                )),
+                INGREDIENTS
+            )
+
+    def test_json(self):
+        self.assert_loaded(self.write_json('ingredients.json'))
+
+    def test_json_across_small_chunks(self):
+        with mock.patch.object(load_ingredients, 'JSON_CHUNK_SIZE', 7):
+            self.assert_loaded(self.write_json('ingredients.json'))
+
+    def test_csv(self):
+        self.assert_loaded(self.write_csv('ingredients.csv'))
+
+    def test_gzip(self):
+        self.assert_loaded(self.write_json('ingredients.json.gz'))
+        self.assert_loaded(self.write_csv('ingredients.csv.gz'))
+
+    def test_explicit_format(self):
+        self.assert_loaded(self.write_csv('ingredients.txt'), format='csv')
+
+    def test_malformed_json(self):
+        for content in ('{}', '[{"name": "соль", ', '[{"name": }]'):
+            with self.subTest(content=content):
+                with self.assertRaises(CommandError):
+                    self.load(self.write('broken.json', content))
+
+    def test_oversized_json_item(self):
+        path = self.write('broken.json', '["' + 'а' * 100)
+        with mock.patch.object(
+            load_ingredients, 'JSON_CHUNK_SIZE', 8
+        ), mock.patch.object(load_ingredients, 'JSON_BUFFER_LIMIT', 32):
+            with self.assertRaisesMessage(CommandError, 'элемент длиннее'):
+                self.load(path)
+
+
+class TrendingScoresTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username='author', email='author@example.com', password='test'
+        )
+        cls.readers = [
+            User.objects.create_user(
+                username=f'reader{number}',
+                email=f'reader{number}@example.com',
+                password='test'
+            )
+            for number in range(2)
+        ]
+
+    def create_recipe(self):
+        return Recipe.objects.create(
+            author=self.author,
+            name='Рецепт',
+            text='Описание',
+            image='',
+            cooking_time=1
+        )
+
+    def get_weight(self, created_at, epoch):
+        return 2 ** (
+            (created_at - epoch) / timedelta(seconds=get_half_life())
+        )
+
+    def test_scores_events_far_from_the_epoch(self):
+        now = datetime(2200, 1, 1, tzinfo=timezone.utc)
+        with mock.patch('django.utils.timezone.now', return_value=now):
+            recipe = self.create_recipe()
+            self.assertEqual(recipe.score_epoch, get_score_epoch(now))
+            self.assertLessEqual(recipe.score_epoch, now)
+            for reader in self.readers:
+                Favorite.objects.create(user=reader, recipe=recipe)
+            self.assertEqual(
+                score_new_events(Favorite, FAVORITE_WEIGHT, 1000), 2
+            )
+        recipe.refresh_from_db()
+        self.assertAlmostEqual(
+            recipe.score, 2 * self.get_weight(now, recipe.score_epoch)
+        )
+
+    def test_rebases_stale_epochs_before_scoring(self):
+        recipe = self.create_recipe()
+        Recipe.objects.filter(pk=recipe.pk).update(
+            score=1, score_epoch=datetime(2023, 1, 1, tzinfo=timezone.utc)
+        )
+        now = datetime(2200, 1, 1, tzinfo=timezone.utc)
+        with mock.patch('django.utils.timezone.now', return_value=now):
+            Favorite.objects.create(user=self.readers[0], recipe=recipe)
+            call_command('update_trending_scores', stdout=StringIO())
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.score_epoch, get_score_epoch(now))
+        self.assertAlmostEqual(
+            recipe.score, self.get_weight(now, recipe.score_epoch)
+        )
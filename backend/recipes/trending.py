@@ -0,0 +1,116 @@
+import logging
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+
+from django.conf import settings
+from django.db import DatabaseError, models, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+TRENDING_EPOCH = datetime(2023, 1, 1, tzinfo=dt_timezone.utc)
+TRENDING_REBASE_HALF_LIVES = 32
+FAVORITE_WEIGHT = 1.0
+CART_WEIGHT = 1.0
+
+
+def get_half_life():
+    return settings.TRENDING_HALF_LIFE_HOURS * 3600
+
+
+def get_trending_weight(created_at, weight, epoch):
+    age = (created_at - epoch).total_seconds()
+    return weight * 2 ** (age / get_half_life())
+
+
+def get_score_epoch(now=None):
+    step = TRENDING_REBASE_HALF_LIVES * get_half_life()
+    age = ((now or timezone.now()) - TRENDING_EPOCH).total_seconds()
+    return TRENDING_EPOCH + timedelta(seconds=age // step * step)
+
+
+def rebase_trending_scores(now):
+    from .models import Recipe
+
+    current = get_score_epoch(now)
+    rebased = 0
+    with transaction.atomic():
+        for epoch in Recipe.objects.exclude(
+            score_epoch=current
+        ).order_by().values_list('score_epoch', flat=True).distinct():
+            rebased += Recipe.objects.filter(score_epoch=epoch).update(
+                score=models.F('score') * get_trending_weight(
+                    epoch, 1, current
+                ),
+                score_epoch=current
+            )
+    return rebased
+
+
+@transaction.atomic
+def apply_trending_events(events):
+    from .models import Recipe
+
+    pending = {}
+    for recipe_id, created_at, weight in events:
+        pending.setdefault(recipe_id, []).append((created_at, weight))
+    while pending:
+        groups = {}
+        for recipe_id, epoch in Recipe.objects.filter(
+            pk__in=pending
+        ).values_list('id', 'score_epoch'):
+            groups.setdefault(epoch, {})[recipe_id] = sum(
+                get_trending_weight(created_at, weight, epoch)
+                for created_at, weight in pending[recipe_id]
+            )
+        retry = {}
+        for epoch, deltas in groups.items():
+            updated = Recipe.objects.filter(
+                pk__in=deltas, score_epoch=epoch
+            ).update(score=models.F('score') + models.Case(
+                *(
+                    models.When(pk=recipe_id, then=models.Value(delta))
+                    for recipe_id, delta in deltas.items()
+                ),
+                output_field=models.FloatField()
+            ))
+            if updated < len(deltas):
+                retry.update(
+                    (recipe_id, pending[recipe_id])
+                    for recipe_id in Recipe.objects.filter(
+                        pk__in=deltas
+                    ).exclude(score_epoch=epoch).values_list('pk', flat=True)
+                )
+        pending = retry
+
+
+def unscore_events(events, weight):
+    try:
+        apply_trending_events(
+            (recipe_id, created_at, -weight)
+            for recipe_id, created_at in events
+        )
+    except (ArithmeticError, DatabaseError):
+        logger.exception('Не удалось обновить рейтинг рецептов')
+
+
+def score_new_events(model, weight, batch_size):
+    rebase_trending_scores(timezone.now())
+    scored = 0
+    while True:
+        with transaction.atomic():
+            events = list(model.objects.select_for_update(
+                skip_locked=True
+            ).filter(scored=False).order_by('created_at').values_list(
+                'pk', 'recipe_id', 'created_at'
+            )[:batch_size])
+            if not events:
+                return scored
+            apply_trending_events(
+                (recipe_id, created_at, weight)
+                for _, recipe_id, created_at in events
+            )
+            model.objects.filter(
+                pk__in=[pk for pk, _, _ in events]
+            ).update(scored=True)
+        scored += len(events)
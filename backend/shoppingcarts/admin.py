@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import ShoppingCart
+from .models import ShoppingCart, ShoppingCartItem
 
 
 @admin.register(ShoppingCart)
@@ -9,3 +9,16 @@ class ShoppingCartAdmin(admin.ModelAdmin):
         'user',
         'recipe'
     )
+
+
+@admin.register(ShoppingCartItem)
+class ShoppingCartItemAdmin(admin.ModelAdmin):
+    list_display = (
+        'user',
+        'ingredient',
+        'total_amount'
+    )
+    list_select_related = (
+        'user',
+        'ingredient'
+    )
@@ -5,3 +5,6 @@ class ShoppingcartsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'shoppingcarts'
     verbose_name = 'Список покупок'
+
+    def ready(self):
+        from . import signals  # noqa: F401
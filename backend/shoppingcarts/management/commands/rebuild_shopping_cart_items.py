@@ -0,0 +1,73 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from shoppingcarts.models import ShoppingCartItem, get_live_totals
+
+
+class Command(BaseCommand):
+    help = 'Пересборка и сверка сводных списков покупок'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Только сверить таблицу с содержимым корзин'
+        )
+
+    def handle(self, *args, **options):
+        if not options['check']:
+            with transaction.atomic():
+                ShoppingCartItem.objects.all().delete()
+                ShoppingCartItem.objects.bulk_create(
+                    (
+                        ShoppingCartItem(
+                            user_id=user_id,
+                            ingredient_id=ingredient_id,
+                            total_amount=total_amount
+                        )
+                        for user_id, ingredient_id, total_amount
+                        in get_live_totals().iterator()
+                    ),
+                    batch_size=999
+                )
+        mismatches = self.compare(
+            get_live_totals().iterator(),
+            ShoppingCartItem.objects.values_list(
+                'user', 'ingredient', 'total_amount'
+            ).order_by('user', 'ingredient').iterator()
+        )
+        if mismatches:
+            raise CommandError(
+                f'Найдено расхождений с корзинами: {mismatches}'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            'Сводные списки покупок совпадают с корзинами'
+        ))
+
+    def compare(self, live, stored):
+        mismatches = 0
+        live_row, stored_row = next(live, None), next(stored, None)
+        while live_row or stored_row:
+            live_key = live_row[:2] if live_row else None
+            stored_key = stored_row[:2] if stored_row else None
+            if live_key == stored_key:
+                if live_row[2] != stored_row[2]:
+                    mismatches += 1
+                    self.report(live_key, live_row[2], stored_row[2])
+                live_row, stored_row = next(live, None), next(stored, None)
+            elif stored_key is None or (live_key and live_key < stored_key):
+                mismatches += 1
+                self.report(live_key, live_row[2], None)
+                live_row = next(live, None)
+            else:
+                mismatches += 1
+                self.report(stored_key, None, stored_row[2])
+                stored_row = next(stored, None)
+        return mismatches
+
+    def report(self, key, live_amount, stored_amount):
+        user_id, ingredient_id = key
+        self.stderr.write(
+            f'Пользователь {user_id}, ингредиент {ingredient_id}: '
+            f'в корзинах {live_amount}, в таблице {stored_amount}'
+        )
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.4 on 2026-10-18 12:10
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shoppingcarts', '0004_shoppingcart_recipe_user_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='shoppingcart',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now, verbose_name='Дата добавления'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='shoppingcart',
+            name='scored',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Учтено в рейтинге'),
+        ),
+        migrations.AddIndex(
+            model_name='shoppingcart',
+            index=models.Index(condition=models.Q(('scored', False)), fields=['created_at'], name='shoppingcart_unscored_idx'),
+        ),
+    ]
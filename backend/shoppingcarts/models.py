@@ -1,10 +1,27 @@
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import connections, models, transaction
 
-from recipes.models import Recipe
+from ingredients.models import Ingredient
+from recipes.models import IngredientRecipe, Recipe, RecipeRelationQuerySet
+from recipes.trending import CART_WEIGHT
 
 User = get_user_model()
 
+UPSERT_BATCH_SIZE = 300
+
+
+class ShoppingCartQuerySet(RecipeRelationQuerySet):
+    counter = 'carts_count'
+    weight = CART_WEIGHT
+
+    def release(self, events):
+        super().release(events)
+        by_user = {}
+        for user_id, recipe_id, _, _ in events:
+            by_user.setdefault(user_id, []).append(recipe_id)
+        for user_id, recipe_ids in by_user.items():
+            ShoppingCartItem.objects.remove_recipes(user_id, recipe_ids)
+
 
 class ShoppingCart(models.Model):
     user = models.ForeignKey(
@@ -19,6 +36,17 @@ class ShoppingCart(models.Model):
         related_name='shopping_cart',
         verbose_name='Рецепт'
     )
+    created_at = models.DateTimeField(
+        'Дата добавления',
+        auto_now_add=True
+    )
+    scored = models.BooleanField(
+        'Учтено в рейтинге',
+        default=False,
+        editable=False
+    )
+
+    objects = ShoppingCartQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'Список покупок'
@@ -29,6 +57,161 @@ class ShoppingCart(models.Model):
                 name='unique_shopping_list_recipe'
             ),
         )
+        indexes = (
+            models.Index(
+                fields=('recipe', 'user'),
+                name='shoppingcart_recipe_user_idx'
+            ),
+            models.Index(
+                fields=('created_at',),
+                condition=models.Q(scored=False),
+                name='shoppingcart_unscored_idx'
+            ),
+        )
 
     def __str__(self):
         return f'{self.user} добавил "{self.recipe}" в свой список покупок'
+
+
+def get_recipe_amounts(recipe_id):
+    return dict(
+        IngredientRecipe.objects.filter(
+            recipe_id=recipe_id
+        ).values_list('ingredient_id', 'amount')
+    )
+
+
+def get_recipes_amounts(recipe_ids):
+    return dict(
+        IngredientRecipe.objects.filter(
+            recipe_id__in=recipe_ids
+        ).values_list('ingredient_id').annotate(
+            total_amount=models.Sum('amount')
+        ).order_by()
+    )
+
+
+def get_live_totals():
+    return IngredientRecipe.objects.filter(
+        recipe__shopping_cart__isnull=False
+    ).values_list(
+        'recipe__shopping_cart__user', 'ingredient'
+    ).annotate(
+        total_amount=models.Sum('amount')
+    ).order_by('recipe__shopping_cart__user', 'ingredient')
+
+
+class ShoppingCartItemQuerySet(models.QuerySet):
+    @transaction.atomic
+    def add_amounts(self, user_ids, amounts):
+        amounts = {
+            ingredient_id: amount
+            for ingredient_id, amount in amounts.items() if amount
+        }
+        user_ids = list(user_ids)
+        if not (amounts and user_ids):
+            return
+        items = {
+            (item.user_id, item.ingredient_id): item
+            for item in self.select_for_update().filter(
+                user_id__in=user_ids,
+                ingredient_id__in=amounts
+            )
+        }
+        created, updated, removed = [], [], []
+        for user_id in user_ids:
+            for ingredient_id, amount in amounts.items():
+                item = items.get((user_id, ingredient_id))
+                if item is None:
+                    if amount > 0:
+                        created.append((user_id, ingredient_id, amount))
+                    continue
+                item.total_amount += amount
+                if item.total_amount > 0:
+                    updated.append(item)
+                else:
+                    removed.append(item.pk)
+        self.filter(pk__in=removed).delete()
+        self.bulk_update(updated, ('total_amount',))
+        self.insert_amounts(created)
+
+    def insert_amounts(self, rows):
+        connection = connections[self.db]
+        table = connection.ops.quote_name(self.model._meta.db_table)
+        with connection.cursor() as cursor:
+            for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+                batch = rows[start:start + UPSERT_BATCH_SIZE]
+                cursor.execute(
+                    f'INSERT INTO {table} '
+                    f'(user_id, ingredient_id, total_amount) '
+                    f'VALUES {", ".join(["(%s, %s, %s)"] * len(batch))} '
+                    f'ON CONFLICT (user_id, ingredient_id) DO UPDATE SET '
+                    f'total_amount = {table}.total_amount '
+                    f'+ EXCLUDED.total_amount',
+                    [value for row in batch for value in row]
+                )
+
+    def add_recipe(self, user_id, recipe_id):
+        self.add_amounts([user_id], get_recipe_amounts(recipe_id))
+
+    def add_recipes(self, user_id, recipe_ids):
+        self.add_amounts([user_id], get_recipes_amounts(recipe_ids))
+
+    def remove_recipe(self, user_id, recipe_id):
+        self.add_amounts([user_id], {
+            ingredient_id: -amount
+            for ingredient_id, amount in get_recipe_amounts(recipe_id).items()
+        })
+
+    def remove_recipes(self, user_id, recipe_ids):
+        self.add_amounts([user_id], {
+            ingredient_id: -amount
+            for ingredient_id, amount in get_recipes_amounts(
+                recipe_ids
+            ).items()
+        })
+
+    def change_recipe(self, recipe_id, old_amounts, new_amounts):
+        self.add_amounts(
+            ShoppingCart.objects.filter(
+                recipe_id=recipe_id
+            ).values_list('user_id', flat=True),
+            {
+                ingredient_id: (
+                    new_amounts.get(ingredient_id, 0)
+                    - old_amounts.get(ingredient_id, 0)
+                )
+                for ingredient_id in old_amounts.keys() | new_amounts.keys()
+            }
+        )
+
+
+class ShoppingCartItem(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='shopping_cart_items',
+        verbose_name='Пользователь'
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,
+        related_name='shopping_cart_items',
+        verbose_name='Ингредиент'
+    )
+    total_amount = models.PositiveIntegerField('Общее количество')
+
+    objects = ShoppingCartItemQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'Ингредиент в списке покупок'
+        verbose_name_plural = 'Ингредиенты в списках покупок'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'ingredient'),
+                name='unique_shopping_cart_item'
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.user}: {self.ingredient} - {self.total_amount}'
@@ -0,0 +1,22 @@
+from django.db.models.signals import post_save, pre_delete
+from django.dispatch import receiver
+
+from recipes.models import Recipe
+from .models import ShoppingCart, ShoppingCartItem, ShoppingCartQuerySet
+
+
+@receiver(post_save, sender=ShoppingCart)
+def add_recipe_to_totals(sender, instance, created, **kwargs):
+    if created:
+        ShoppingCartItem.objects.add_recipe(
+            instance.user_id, instance.recipe_id
+        )
+        Recipe.objects.filter(pk=instance.recipe_id).change_counter(
+            'carts_count', 1
+        )
+
+
+@receiver(pre_delete, sender=ShoppingCart)
+def remove_recipe_from_totals(sender, instance, origin=None, **kwargs):
+    if not isinstance(origin, ShoppingCartQuerySet):
+        ShoppingCart.objects.release_instance(instance)
@@ -14,6 +14,8 @@ class CustomUserAdmin(admin.ModelAdmin):
         'email',
         'first_name',
         'last_name',
+        'recipes_count',
+        'followers_count',
     )
     search_fields = ('email', 'username')
     list_filter = ('email', 'first_name')
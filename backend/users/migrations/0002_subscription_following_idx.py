@@ -0,0 +1,17 @@
+# Generated by Django 4.2.4 on 2026-10-18 02:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='subscriptions',
+            index=models.Index(fields=['following', 'user'], name='subscription_following_idx'),
+        ),
+    ]
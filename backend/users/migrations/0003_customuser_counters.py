@@ -0,0 +1,55 @@
+# Generated by Django 4.2.4 on 2026-10-18 05:20
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def get_actual_count(related_model, field):
+    return Coalesce(
+        models.Subquery(
+            related_model.objects.filter(
+                **{field: models.OuterRef('pk')}
+            ).order_by().values(field).annotate(
+                total=models.Count('pk')
+            ).values('total')
+        ),
+        0
+    )
+
+
+def fill_counters(apps, schema_editor):
+    CustomUser = apps.get_model('users', 'CustomUser')
+    Subscriptions = apps.get_model('users', 'Subscriptions')
+    Recipe = apps.get_model('recipes', 'Recipe')
+    CustomUser.objects.update(
+        recipes_count=get_actual_count(Recipe, 'author'),
+        followers_count=get_actual_count(Subscriptions, 'following'),
+        following_count=get_actual_count(Subscriptions, 'user')
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0009_recipe_counters'),
+        ('users', '0002_subscription_following_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='followers_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Число подписчиков'),
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='following_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Число подписок'),
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='recipes_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Число рецептов'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,7 @@
 from django.contrib.auth.models import AbstractUser
 from django.core.exceptions import ValidationError
 from django.db import models
+from django.db.models.functions import Greatest
 
 
 class CustomUser(AbstractUser):
@@ -16,6 +17,21 @@ class CustomUser(AbstractUser):
         max_length=30,
         verbose_name='Фамилия'
     )
+    recipes_count = models.PositiveIntegerField(
+        'Число рецептов',
+        default=0,
+        editable=False
+    )
+    followers_count = models.PositiveIntegerField(
+        'Число подписчиков',
+        default=0,
+        editable=False
+    )
+    following_count = models.PositiveIntegerField(
+        'Число подписок',
+        default=0,
+        editable=False
+    )
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username', 'first_name', 'last_name']
@@ -35,6 +51,12 @@ class CustomUser(AbstractUser):
             )
 
 
+def change_user_counter(user_ids, field, delta):
+    CustomUser.objects.filter(pk__in=user_ids).update(
+        **{field: Greatest(models.F(field) + delta, 0)}
+    )
+
+
 class Subscriptions(models.Model):
     user = models.ForeignKey(
         CustomUser,
@@ -66,6 +88,15 @@ class Subscriptions(models.Model):
                 violation_error_message='Подписчик не может быть автором.',
             )
         )
+        indexes = (
+            models.Index(
+                fields=(
+                    'following',
+                    'user',
+                ),
+                name='subscription_following_idx',
+            ),
+        )
 
     def __str__(self):
         return (
@@ -0,0 +1,17 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Subscriptions, change_user_counter
+
+
+@receiver(post_save, sender=Subscriptions)
+def count_subscription(sender, instance, created, **kwargs):
+    if created:
+        change_user_counter([instance.following_id], 'followers_count', 1)
+        change_user_counter([instance.user_id], 'following_count', 1)
+
+
+@receiver(post_delete, sender=Subscriptions)
+def uncount_subscription(sender, instance, **kwargs):
+    change_user_counter([instance.following_id], 'followers_count', -1)
+    change_user_counter([instance.user_id], 'following_count', -1)